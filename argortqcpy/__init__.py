@@ -1,3 +1,33 @@
-"""argortqcpy Python package."""
-from . import checks
-from . import profile
+"""argortqcpy Python package.
+
+Submodules are imported on first use, so importing the package is quick, and netCDF4 is only imported by the
+modules reading or writing netCDF files.
+"""
+
+import importlib
+import sys
+from types import ModuleType
+from typing import List
+
+# the submodules available as attributes of the package
+__all__ = ["checks", "profile", "pipeline"]
+
+
+def __getattr__(name: str) -> ModuleType:
+    """Import a submodule on first access."""
+    if name in __all__:
+        return importlib.import_module(f"{__name__}.{name}")
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> List[str]:
+    """List the attributes of the package, including the submodules not yet imported."""
+    return sorted(set(globals()) | set(__all__))
+
+
+# module __getattr__ is not supported before Python 3.7
+if sys.version_info < (3, 7):
+    from . import checks  # noqa: F401
+    from . import profile  # noqa: F401
+    from . import pipeline  # noqa: F401
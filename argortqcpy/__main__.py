@@ -0,0 +1,7 @@
+"""Run the argortqcpy command line interface."""
+
+import sys
+
+from argortqcpy.cli import main
+
+sys.exit(main())
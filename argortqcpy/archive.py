@@ -0,0 +1,246 @@
+"""Run Argo checks over an archive of netCDF profile files."""
+
+import contextlib
+import fnmatch
+import multiprocessing
+import os
+import re
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Type
+
+from numpy import ma
+from netCDF4 import Dataset
+
+from argortqcpy.cache import DEFAULT_MAX_BYTES, ResultCache
+from argortqcpy.checks import CheckBase
+from argortqcpy.pipeline import DEFAULT_CHECKS, CheckPipeline
+from argortqcpy.profile import Profile
+
+# file names of Argo profile files to be processed when walking a directory
+PROFILE_FILE_PATTERNS = ("*_prof.nc", "R*.nc")
+
+# single-profile file names, e.g. R6901234_001.nc or R6901234_001D.nc for a descending profile
+SINGLE_PROFILE_FILE_NAME = re.compile(r"^[RD]?(?P<platform>\w+?)_(?P<cycle>\d+)(?P<descending>D?)\.nc$")
+
+# the pipeline of a worker process of process_archive, see _initialise_worker
+_WORKER_PIPELINE: Optional[CheckPipeline] = None
+
+
+class ProfileResult(NamedTuple):
+    """The outcome of running the checks on a single profile of a file.
+
+    Flags are given as uint8 codes, see :data:`argortqcpy.checks.FLAG_BYTES` for the Argo flags, masked where the
+    values are missing, e.g. the padding levels of a ``*_prof.nc`` file. If the file could not be processed,
+    ``error`` describes why and there are no flags.
+    """
+
+    path: str
+    profile_index: Optional[int]
+    flags: Dict[str, ma.MaskedArray]
+    tests_performed: int
+    tests_failed: int
+    error: Optional[str] = None
+
+
+def find_profile_files(paths: Iterable[str]) -> List[str]:
+    """Return the profile files given directly, or found by walking the given directories, in sorted order.
+
+    Args:
+        paths: Files and/or directories. Directories are searched recursively for Argo profile files.
+    """
+    files = []
+    for path in paths:
+        if not os.path.isdir(path):
+            files.append(path)
+            continue
+
+        for directory, _, file_names in os.walk(path):
+            for file_name in file_names:
+                if any(fnmatch.fnmatch(file_name, pattern) for pattern in PROFILE_FILE_PATTERNS):
+                    files.append(os.path.join(directory, file_name))
+
+    return sorted(files)
+
+
+def pair_with_predecessors(paths: Sequence[str]) -> List[Tuple[str, Optional[str]]]:
+    """Pair each single-profile file with the file of the previous cycle of the same float.
+
+    Files which are not single-profile files, such as multi-profile ``*_prof.nc`` files, are not paired as their
+    profiles are paired within the file.
+
+    Return: tuples of each path and the path of its predecessor (``None`` if there is none), in the given order.
+    """
+    cycles: Dict[str, List[Tuple[int, bool, str]]] = {}
+    for path in paths:
+        match = SINGLE_PROFILE_FILE_NAME.match(os.path.basename(path))
+        if match:
+            cycles.setdefault(match["platform"], []).append(
+                (int(match["cycle"]), not match["descending"], path),
+            )
+
+    predecessors: Dict[str, Optional[str]] = {}
+    for platform_cycles in cycles.values():
+        # a descending profile precedes the ascending profile of the same cycle
+        platform_paths = [path for _, _, path in sorted(platform_cycles)]
+        previous_paths: List[Optional[str]] = [None, *platform_paths[:-1]]
+        predecessors.update(zip(platform_paths, previous_paths))
+
+    return [(path, predecessors.get(path)) for path in paths]
+
+
+def process_file(
+    pipeline: CheckPipeline,
+    path: str,
+    previous_path: Optional[str] = None,
+) -> List[ProfileResult]:
+    """Run the pipeline on every profile in a file.
+
+    Profiles along the N_PROF dimension are each paired with the one before, and those of a single-profile file
+    with the same profile of its predecessor file. A file which cannot be opened or read gives a single result
+    describing the error. Errors raised by the checks are not caught, so they are not mistaken for unreadable files.
+
+    Args:
+        pipeline: The checks to be run.
+        path: The netCDF file to be checked.
+        previous_path: Optional file holding the previous cycle of the same float.
+    """
+    with contextlib.ExitStack() as datasets:
+        try:
+            dataset = datasets.enter_context(Dataset(path))
+            previous_dataset = datasets.enter_context(Dataset(previous_path)) if previous_path is not None else None
+            profiles = _read_profiles(path, dataset, previous_dataset)
+        except (OSError, KeyError, IndexError, ValueError) as error:
+            return [ProfileResult(path, None, {}, 0, 0, error=f"{type(error).__name__}: {error}")]
+
+        return [
+            _process_profile(pipeline, path, profile_index, profile, profile_previous)
+            for profile_index, profile, profile_previous in profiles
+        ]
+
+
+def _read_profiles(
+    path: str,
+    dataset: Dataset,
+    previous_dataset: Optional[Dataset],
+) -> List[Tuple[Optional[int], Profile, Optional[Profile]]]:
+    """Read every profile in an open dataset, returning the index of each with the profile and its predecessor."""
+    if "N_PROF" not in dataset.dimensions:
+        previous = _read_profile(Profile(previous_dataset)) if previous_dataset is not None else None
+        return [(None, _read_profile(Profile(dataset)), previous)]
+
+    multi_profile = fnmatch.fnmatch(os.path.basename(path), "*_prof.nc")
+    number_of_previous = len(previous_dataset.dimensions["N_PROF"]) if previous_dataset is not None else 0
+
+    profiles: List[Tuple[Optional[int], Profile, Optional[Profile]]] = []
+    profile_previous = None
+    for profile_index in range(len(dataset.dimensions["N_PROF"])):
+        if not multi_profile:
+            profile_previous = (
+                _read_profile(Profile(previous_dataset, profile_index=profile_index))
+                if previous_dataset is not None and profile_index < number_of_previous
+                else None
+            )
+
+        profile = _read_profile(Profile(dataset, profile_index=profile_index))
+        profiles.append((profile_index, profile, profile_previous))
+        # reuse the profile as the predecessor of the next one, so anything cached on it is not recomputed
+        profile_previous = profile
+
+    return profiles
+
+
+def _read_profile(profile: Profile) -> Profile:
+    """Read the data of every property a profile has, so errors reading the file are raised before any check."""
+    for property_name in sorted(profile.valid_properties):
+        if profile.has_property(property_name):
+            profile.get_property_data(property_name)
+
+    return profile
+
+
+def _process_profile(
+    pipeline: CheckPipeline,
+    path: str,
+    profile_index: Optional[int],
+    profile: Profile,
+    profile_previous: Optional[Profile],
+) -> ProfileResult:
+    """Run the pipeline on a single profile."""
+    result = pipeline.run(profile, profile_previous)
+    # flags of missing values, such as padding levels, are masked, as they are not written to the file
+    flags = {
+        property_name: ma.masked_array(
+            result.output.get_output_codes_for_property(property_name),
+            mask=ma.getmaskarray(profile.get_property_data(property_name)),
+        )
+        for property_name in result.output.get_output_property_names()
+    }
+    return ProfileResult(path, profile_index, flags, result.tests_performed, result.tests_failed)
+
+
+def _initialise_worker(
+    checks: Sequence[Type[CheckBase]],
+    cache_directory: Optional[str],
+    cache_max_bytes: int,
+) -> None:
+    """Build the pipeline, and cache, of a worker process once, rather than pickling them with each task."""
+    global _WORKER_PIPELINE  # pylint: disable=global-statement
+    _WORKER_PIPELINE = _make_pipeline(checks, cache_directory, cache_max_bytes)
+
+
+def _process_task(task: Tuple[str, Optional[str]]) -> List[ProfileResult]:
+    """Process a single file and its predecessor with the pipeline of a worker process."""
+    if _WORKER_PIPELINE is None:
+        raise RuntimeError("argortqcpy.archive: the worker process has not been initialised.")
+
+    return process_file(_WORKER_PIPELINE, *task)
+
+
+def _make_pipeline(
+    checks: Sequence[Type[CheckBase]],
+    cache_directory: Optional[str],
+    cache_max_bytes: int,
+) -> CheckPipeline:
+    """Return a pipeline of the checks, with a cache of results in a directory if one is given."""
+    cache = ResultCache(cache_directory, max_bytes=cache_max_bytes) if cache_directory is not None else None
+    return CheckPipeline(checks, cache=cache)
+
+
+def process_archive(  # pylint: disable=too-many-arguments
+    paths: Iterable[str],
+    checks: Sequence[Type[CheckBase]] = DEFAULT_CHECKS,
+    workers: Optional[int] = None,
+    chunksize: int = 1,
+    cache_directory: Optional[str] = None,
+    cache_max_bytes: int = DEFAULT_MAX_BYTES,
+) -> Iterator[ProfileResult]:
+    """Run checks on every profile of an archive of netCDF files, in a pool of worker processes.
+
+    Results are streamed back in file order as they become available. Files which cannot be read give a single
+    result describing the error, and processing continues. Each worker process builds its pipeline and cache once,
+    so the total size of the cache is only counted once by each worker.
+
+    Args:
+        paths: Files and/or directories, which are searched recursively for Argo profile files.
+        checks: The check classes to be run, in order, on each profile.
+        workers: Optional number of worker processes. Defaults to the number of CPUs. If 1, files are
+            processed in the calling process.
+        chunksize: The number of files sent to a worker at a time.
+        cache_directory: Optional directory of cached results, so profiles unchanged since they were last checked
+            are not checked again.
+        cache_max_bytes: The largest total size of the cached results.
+    """
+    tasks = pair_with_predecessors(find_profile_files(paths))
+
+    if workers == 1:
+        pipeline = _make_pipeline(checks, cache_directory, cache_max_bytes)
+        for task in tasks:
+            yield from process_file(pipeline, *task)
+        return
+
+    with multiprocessing.Pool(
+        processes=workers,
+        initializer=_initialise_worker,
+        initargs=(checks, cache_directory, cache_max_bytes),
+    ) as pool:
+        for results in pool.imap(_process_task, tasks, chunksize=chunksize):
+            yield from results
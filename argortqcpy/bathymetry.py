@@ -0,0 +1,147 @@
+"""Look up the elevation of the sea floor in a memory-mapped global bathymetry grid.
+
+The grid is a ``.npy`` file of elevations (m, positive up) on a regular global grid of cells, rows running north
+from 90S and columns running east from 180W, with values at the cell centres as in the GEBCO and ETOPO grids.
+The file is memory-mapped rather than read, so opening it is immediate, only the pages holding the cells looked
+up are read, and processes looking up the same file share its pages through the operating system's page cache.
+
+A grid distributed as netCDF is converted once with :func:`convert_grid`, and used by setting the
+``ARGORTQCPY_BATHYMETRY`` environment variable to its path.
+"""
+
+import functools
+import os
+from typing import Optional, Tuple
+
+import numpy as np
+from numpy import ma
+
+# the environment variable giving the path of the bathymetry grid used by the checks
+BATHYMETRY_PATH_VARIABLE = "ARGORTQCPY_BATHYMETRY"
+
+
+class BathymetryGrid:
+    """A global grid of elevations, memory-mapped from a ``.npy`` file."""
+
+    def __init__(self, path: str) -> None:
+        """Map the grid file into memory, without reading it.
+
+        Args:
+            path: The path of a ``.npy`` file of a 2-D (latitude, longitude) grid of elevations.
+        """
+        self._path = path
+        self._grid = np.load(path, mmap_mode="r")
+        if self._grid.ndim != 2:
+            raise ValueError(f"BathymetryGrid: {path} is not a 2-D grid.")
+
+    @property
+    def path(self) -> str:
+        """Return the path of the grid file."""
+        return self._path
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        """Return the number of rows (latitudes) and columns (longitudes) of the grid."""
+        return self._grid.shape  # type: ignore
+
+    def elevation(self, latitude: np.ndarray, longitude: np.ndarray) -> np.ndarray:
+        """Return the elevation at each position (m, positive up), bilinearly interpolated between cell centres.
+
+        Longitudes wrap around the globe, and latitudes beyond the outermost cell centres take their values.
+
+        Args:
+            latitude: Array of latitudes (degrees north), broadcasting against the longitudes. NaN if missing.
+            longitude: Array of longitudes (degrees east). NaN if missing.
+
+        Return: array of elevations, NaN for missing positions.
+        """
+        latitude, longitude = np.broadcast_arrays(np.asarray(latitude, dtype=float), np.asarray(longitude, dtype=float))
+        number_of_rows, number_of_columns = self._grid.shape
+        elevation = np.full(latitude.shape, np.nan)
+
+        valid = np.isfinite(latitude) & np.isfinite(longitude)
+        row = np.clip((latitude[valid] + 90.0) * number_of_rows / 180.0 - 0.5, 0.0, number_of_rows - 1)
+        column = np.mod(longitude[valid] + 180.0, 360.0) * number_of_columns / 360.0 - 0.5
+
+        row_below = np.minimum(np.floor(row).astype(np.intp), max(number_of_rows - 2, 0))
+        row_above = np.minimum(row_below + 1, number_of_rows - 1)
+        row_fraction = row - row_below
+        column_left = np.floor(column).astype(np.intp)
+        column_fraction = column - column_left
+        column_right = (column_left + 1) % number_of_columns
+        column_left %= number_of_columns
+
+        def interpolate_columns(rows: np.ndarray) -> np.ndarray:
+            # only the cells at the corners of each position are read from the mapped file
+            return (1.0 - column_fraction) * self._grid[rows, column_left] + column_fraction * self._grid[
+                rows, column_right
+            ]
+
+        below = interpolate_columns(row_below)
+        above = interpolate_columns(row_above)
+        elevation[valid] = (1.0 - row_fraction) * below + row_fraction * above
+
+        return elevation
+
+
+def convert_grid(  # pylint: disable=too-many-arguments
+    netcdf_path: str,
+    path: str,
+    variable_name: str = "elevation",
+    latitude_name: str = "lat",
+    dtype: str = "i2",
+    rows_per_read: int = 1024,
+) -> None:
+    """Convert a global netCDF grid, such as GEBCO's, to a ``.npy`` file for memory-mapping.
+
+    The grid is copied in blocks of rows, so grids larger than memory can be converted.
+
+    Args:
+        netcdf_path: The netCDF file of the grid, with dimensions of latitude and longitude.
+        path: The ``.npy`` file to be written.
+        variable_name: The name of the elevation variable.
+        latitude_name: The name of the latitude coordinate variable, used to orient the rows north.
+        dtype: The data type of the elevations written.
+        rows_per_read: The number of rows copied at a time.
+    """
+    # imported here, as the checks looking up a grid never need netCDF4
+    from netCDF4 import Dataset  # pylint: disable=import-outside-toplevel
+
+    with Dataset(netcdf_path) as dataset:
+        variable = dataset[variable_name]
+        latitude = dataset[latitude_name][:]
+        descending = latitude.size > 1 and latitude[0] > latitude[-1]
+
+        grid = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=variable.shape)
+        number_of_rows = variable.shape[0]
+        for start in range(0, number_of_rows, rows_per_read):
+            stop = min(start + rows_per_read, number_of_rows)
+            rows = ma.filled(variable[start:stop, :], 0)
+            if descending:
+                first_row, last_row = number_of_rows - stop, number_of_rows - start
+                grid[first_row:last_row] = rows[::-1]
+            else:
+                grid[start:stop] = rows
+
+        grid.flush()
+        del grid
+
+
+def get_bathymetry(path: Optional[str] = None) -> Optional[BathymetryGrid]:
+    """Return the bathymetry grid shared by the checks of this process, or ``None`` if there is none.
+
+    Args:
+        path: Optional path of the grid. Defaults to the path given by the ``ARGORTQCPY_BATHYMETRY`` environment
+            variable.
+    """
+    path = path or os.environ.get(BATHYMETRY_PATH_VARIABLE)
+    if not path:
+        return None
+
+    return _open_grid(os.path.abspath(path))
+
+
+@functools.lru_cache(maxsize=None)
+def _open_grid(path: str) -> BathymetryGrid:
+    """Map each grid file once per process."""
+    return BathymetryGrid(path)
@@ -0,0 +1,276 @@
+"""Cache the results of checks on disk, keyed by a hash of everything the results depend on.
+
+Each result is a compressed ``.npz`` file of the flag codes of each property and the bitmasks of the tests
+performed and failed, named by a hash of the data of the profile and its predecessor, the checks run, the version
+and source code of argortqcpy, and the grey list and bathymetry files used. A profile whose data have not changed
+since its result was cached is not checked again.
+"""
+
+import functools
+import hashlib
+import io
+import os
+import tempfile
+import zipfile
+import zlib
+from typing import Iterator, List, Optional, Sequence, Tuple, Type
+
+import numpy as np
+from numpy import ma
+
+from argortqcpy import bathymetry, greylist
+from argortqcpy.checks import CheckBase, CheckOutput, CompactFlags
+from argortqcpy.profile import ProfileBase
+
+# the default largest total size of the cached results
+DEFAULT_MAX_BYTES = 1024**3
+
+# the fraction of the largest total size the cached results are reduced to when evicting
+EVICTION_FRACTION = 0.9
+
+# the suffix of cached result files
+RESULT_SUFFIX = ".npz"
+
+
+class ResultCache:
+    """A size-bounded directory of cached check results, evicting the least recently used.
+
+    The total size of the results is counted when the first result is stored, and then kept up to date by each
+    process storing results. Processes sharing a cache each evict results once their count exceeds the largest
+    size, so the size is bounded approximately.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        """Initialise a cache in a directory, which is created if it does not exist.
+
+        Args:
+            directory: The directory holding the cached results.
+            max_bytes: The largest total size of the cached results.
+        """
+        self._directory = directory
+        self._max_bytes = max_bytes
+        self._total_bytes: Optional[int] = None
+
+    @property
+    def directory(self) -> str:
+        """Return the directory holding the cached results."""
+        return self._directory
+
+    def make_key(
+        self,
+        checks: Sequence[Type[CheckBase]],
+        profile: ProfileBase,
+        profile_previous: Optional[ProfileBase],
+    ) -> str:
+        """Return the key of the result of checks on a profile.
+
+        Args:
+            checks: The check classes run, in order.
+            profile: The profile of interest.
+            profile_previous: The profile prior to the profile of interest, or ``None`` if it is the first.
+        """
+        key = hashlib.blake2b(digest_size=20)
+        key.update(f"argortqcpy {_package_version()} {_hash_package_source()}\n".encode())
+        for check_class in checks:
+            key.update(f"{check_class.__module__}.{check_class.__qualname__}\n".encode())
+        for path in _external_data_paths():
+            try:
+                modified = str(os.stat(path).st_mtime_ns)
+            except OSError:
+                # a missing file is part of the key, so results without it are not reused once the file exists
+                modified = "absent"
+            key.update(f"{path} {modified}\n".encode())
+
+        key.update(hash_profile(profile).encode())
+        key.update(b"previous " + (hash_profile(profile_previous).encode() if profile_previous is not None else b""))
+
+        return key.hexdigest()
+
+    def get(self, key: str, profile: ProfileBase) -> Optional[Tuple[CheckOutput, int, int]]:
+        """Return the cached output for a profile, and bitmasks of the tests performed and failed, if there is one.
+
+        A result which cannot be read, e.g. a truncated or corrupt file, is treated as not being cached.
+
+        Args:
+            key: The key of the result, see :meth:`make_key`.
+            profile: The profile the output is for.
+        """
+        path = self._path(key)
+        try:
+            # the file is opened here, as np.load does not close it if it is not a valid archive
+            with open(path, "rb") as file, np.load(file) as result:
+                arrays = {name: result[name] for name in result.files}
+            tests_performed, tests_failed = arrays["tests"].tolist()
+        except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile, zlib.error):
+            return None
+
+        # mark the result as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        output = CheckOutput(profile=profile)
+        for name, codes in arrays.items():
+            if name.endswith(".codes"):
+                property_name = name[: -len(".codes")]
+                output.set_output_compact_flags_for_property(
+                    property_name,
+                    CompactFlags(codes, missing=arrays.get(f"{property_name}.missing")),
+                )
+
+        return output, tests_performed, tests_failed
+
+    def put(self, key: str, output: CheckOutput, tests_performed: int, tests_failed: int) -> None:
+        """Store the output of checks, and bitmasks of the tests performed and failed, evicting results if needed.
+
+        Args:
+            key: The key of the result, see :meth:`make_key`.
+            output: The output of the checks.
+            tests_performed: The ``argo_binary_id`` bitmask of the tests performed.
+            tests_failed: The ``argo_binary_id`` bitmask of the tests failed.
+        """
+        arrays = {"tests": np.array([tests_performed, tests_failed], dtype=np.int64)}
+        for property_name in output.get_output_property_names():
+            flags = output.get_output_compact_flags_for_property(property_name)
+            arrays[f"{property_name}.codes"] = flags.codes
+            if flags.missing is not None:
+                arrays[f"{property_name}.missing"] = flags.missing
+
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, **arrays)  # type: ignore
+
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # write to a temporary file renamed into place, so other processes never read a partial result
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(file_descriptor, "wb") as file:
+                file.write(buffer.getbuffer())
+            os.replace(temporary_path, path)
+        except BaseException:
+            # partial results are not left in the cache
+            try:
+                os.remove(temporary_path)
+            except OSError:
+                pass
+            raise
+
+        if self._total_bytes is None:
+            self._total_bytes = sum(os.path.getsize(result_path) for result_path in self._result_paths())
+        else:
+            self._total_bytes += buffer.getbuffer().nbytes
+
+        if self._total_bytes > self._max_bytes:
+            self.evict(int(self._max_bytes * EVICTION_FRACTION))
+
+    def evict(self, max_bytes: int) -> int:
+        """Remove the least recently used results until their total size is at most a given size.
+
+        Return: the number of results removed.
+        """
+        results = []
+        for path in self._result_paths():
+            try:
+                status = os.stat(path)
+            except OSError:
+                continue
+            results.append((status.st_mtime, status.st_size, path))
+
+        results.sort()
+        total_bytes = sum(size for _, size, _ in results)
+        removed = 0
+        for _, size, path in results:
+            if total_bytes <= max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total_bytes -= size
+            removed += 1
+
+        self._total_bytes = total_bytes
+        return removed
+
+    def clear(self) -> int:
+        """Remove every cached result.
+
+        Return: the number of results removed.
+        """
+        return self.evict(0)
+
+    def _path(self, key: str) -> str:
+        """Return the path of the file of a result, in a subdirectory named by the start of its key."""
+        return os.path.join(self._directory, key[:2], key + RESULT_SUFFIX)
+
+    def _result_paths(self) -> Iterator[str]:
+        """Return the paths of every cached result."""
+        if not os.path.isdir(self._directory):
+            return
+
+        for directory, _, file_names in os.walk(self._directory):
+            for file_name in file_names:
+                if file_name.endswith(RESULT_SUFFIX):
+                    yield os.path.join(directory, file_name)
+
+
+def hash_profile(profile: ProfileBase) -> str:
+    """Return a hash of the data of every valid property of a profile, cached on the profile."""
+    return profile.get_derived_data("content_hash", functools.partial(_hash_profile_data, profile))
+
+
+def _hash_profile_data(profile: ProfileBase) -> str:
+    """Hash the data, and missing values, of every valid property of a profile."""
+    profile_hash = hashlib.blake2b(digest_size=20)
+    for property_name in sorted(profile.valid_properties):
+        if not profile.has_property(property_name):
+            continue
+
+        values = profile.get_property_data(property_name)
+        data = np.ascontiguousarray(ma.getdata(values))
+        profile_hash.update(f"{property_name} {data.dtype.str} {data.shape}\n".encode())
+        profile_hash.update(data.tobytes())
+        profile_hash.update(np.packbits(ma.getmaskarray(values)).tobytes())
+
+    return profile_hash.hexdigest()
+
+
+def _external_data_paths() -> List[str]:
+    """Return the paths of the grey list and bathymetry files used by the checks, where there are any."""
+    paths = []
+    for variable in (greylist.GREYLIST_PATH_VARIABLE, bathymetry.BATHYMETRY_PATH_VARIABLE):
+        path = os.environ.get(variable)
+        if path:
+            paths.append(os.path.abspath(path))
+
+    return paths
+
+
+@functools.lru_cache(maxsize=None)
+def _package_version() -> str:
+    """Return the installed version of argortqcpy, or ``"unknown"`` if it is not installed."""
+    try:
+        from importlib import metadata  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        # importlib.metadata needs Python 3.8 or later, and the source hash identifies the code without it
+        return "unknown"
+
+    try:
+        return metadata.version("argortqcpy")
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+
+@functools.lru_cache(maxsize=None)
+def _hash_package_source() -> str:
+    """Return a hash of the source code of argortqcpy, so results are not reused once the checks are changed."""
+    package_directory = os.path.dirname(os.path.abspath(__file__))
+    source_hash = hashlib.blake2b(digest_size=20)
+    for file_name in sorted(os.listdir(package_directory)):
+        if file_name.endswith(".py"):
+            with open(os.path.join(package_directory, file_name), "rb") as file:
+                source_hash.update(f"{file_name}\n".encode())
+                source_hash.update(file.read())
+
+    return source_hash.hexdigest()
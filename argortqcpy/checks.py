@@ -1,13 +1,17 @@
 """Implement Argo checks."""
 
+import functools
+import time
 from abc import ABC, abstractmethod
 from enum import Enum
-from typing import Dict, List, Optional, Set
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Set, Tuple, Union
 
 import numpy as np
 from numpy import ma
 
-from argortqcpy.profile import ProfileBase
+from argortqcpy import bathymetry, greylist, instrumentation, kernels, regions, seawater, trajectory
+from argortqcpy.kernels import neighbour_indices, take_neighbours
+from argortqcpy.profile import ProfileBase, ProfileBatch
 
 
 class ArgoQcFlag(Enum):
@@ -62,6 +66,138 @@ FLAG_PRECEDENCE: Dict[ArgoQcFlag, Set[ArgoQcFlag]] = {
     },
 }
 
+# compact uint8 code for each flag, the code being the digit of the Argo flag
+FLAG_CODES: Dict[ArgoQcFlag, int] = {flag: int(flag.value) for flag in ArgoQcFlag if flag.value}
+
+# the Argo byte-string flag for each uint8 code
+FLAG_BYTES = np.array([str(code).encode() for code in range(10)], dtype="|S2")
+
+# the Argo flag of each uint8 code, for the codes which are flags
+FLAGS_BY_CODE: Dict[int, ArgoQcFlag] = {code: flag for flag, code in FLAG_CODES.items()}
+
+
+def _build_flag_precedence_table() -> np.ndarray:
+    """Tabulate the flag code resulting from setting a new flag (row) over an existing flag (column)."""
+    # by default the existing flag is kept
+    table = np.tile(np.arange(len(FLAG_BYTES), dtype=np.uint8), (len(FLAG_BYTES), 1))
+    for flag, overridable_flags in FLAG_PRECEDENCE.items():
+        for overridable_flag in overridable_flags:
+            table[FLAG_CODES[flag], FLAG_CODES[overridable_flag]] = FLAG_CODES[flag]
+
+    return table
+
+
+FLAG_PRECEDENCE_TABLE = _build_flag_precedence_table()
+
+
+def merge_flag_codes(existing: np.ndarray, new: Union[int, np.ndarray]) -> np.ndarray:
+    """Return the flag codes resulting from setting new flag codes over existing ones, accounting for precedence.
+
+    Args:
+        existing: Array of existing flag codes.
+        new: A single flag code, or an array of flag codes broadcastable against the existing codes.
+
+    Return: a new array of the resulting flag codes.
+    """
+    return FLAG_PRECEDENCE_TABLE[new, existing]
+
+
+class CompactFlags:
+    """Class for storing flags compactly as uint8 codes, with an optional bitmask of missing values.
+
+    Flags take one byte per value, plus one bit per value if any are missing, and are only converted to Argo
+    byte-string flags when asked for.
+    """
+
+    def __init__(self, codes: np.ndarray, missing: Optional[np.ndarray] = None) -> None:
+        """Initialise the flags from their codes.
+
+        Args:
+            codes: Array of flag codes, see :data:`FLAG_CODES`.
+            missing: Optional boolean array, ``True`` where values are missing and have no flag.
+        """
+        self._codes = np.asarray(codes, dtype=np.uint8)
+        self._missing_bits: Optional[np.ndarray] = None
+        if missing is not None and np.any(missing):
+            self._missing_bits = np.packbits(np.broadcast_to(missing, self._codes.shape), axis=None)
+
+    @classmethod
+    def full(cls, shape: Sequence[int], flag: ArgoQcFlag, missing: Optional[np.ndarray] = None) -> "CompactFlags":
+        """Return flags of the given shape, all set to the same flag."""
+        return cls(np.full(shape, FLAG_CODES[flag], dtype=np.uint8), missing=missing)
+
+    @classmethod
+    def from_argo(cls, flags: np.ndarray) -> "CompactFlags":
+        """Return compact flags from an array of Argo byte-string flags.
+
+        Masked values, and values which are not flags (such as fill values), are missing.
+        """
+        digits = np.asarray(ma.getdata(flags), dtype="|S1").view(np.uint8).astype(np.int16) - ord("0")
+        missing = (digits < 0) | (digits >= len(FLAG_BYTES)) | ma.getmaskarray(flags)
+        return cls(np.where(missing, FLAG_CODES[ArgoQcFlag.NO_QC], digits), missing=missing)
+
+    @property
+    def codes(self) -> np.ndarray:
+        """Return the array of uint8 flag codes."""
+        return self._codes
+
+    @property
+    def missing(self) -> Optional[np.ndarray]:
+        """Return a boolean array which is ``True`` where values are missing, or ``None`` if none are."""
+        if self._missing_bits is None:
+            return None
+
+        return np.unpackbits(self._missing_bits, count=self._codes.size).reshape(self._codes.shape).astype(bool)
+
+    @property
+    def nbytes(self) -> int:
+        """Return the number of bytes used to store the flags."""
+        return self._codes.nbytes + (0 if self._missing_bits is None else self._missing_bits.nbytes)
+
+    def merge_codes(
+        self,
+        codes: Union[int, np.ndarray],
+        where: Optional[np.ndarray] = None,
+        number_of_profiles: int = 1,
+    ) -> np.ndarray:
+        """Merge an array of flag codes over the flags (possibly only on some values) accounting for precedence.
+
+        Args:
+            codes: A single flag code, or an array of flag codes broadcasting against the flags.
+            where: Optional boolean array, broadcasting against the flags, restricting the codes merged.
+            number_of_profiles: The number of profiles along the first axis of the flags, such as those of a batch,
+                or 1 for the flags of a single profile.
+
+        Return: the number of values of each profile each code was merged on, indexed by profile and code.
+        """
+        return kernels.get_backend().merge_codes(self._codes, codes, where, FLAG_PRECEDENCE_TABLE, number_of_profiles)
+
+    def select(self, where: Optional[np.ndarray]) -> Optional[np.ndarray]:
+        """Return a boolean array of the values selected by an index, or ``None`` if it selects every value.
+
+        An array of the shape of the flags is returned as it is, and other indices, such as slices, select values as
+        NumPy does.
+        """
+        if where is None or (isinstance(where, np.ndarray) and where.shape == self._codes.shape):
+            return where
+
+        selected = np.zeros(self._codes.shape, dtype=bool)
+        selected[where] = True
+        return selected
+
+    def set_flag(self, flag: ArgoQcFlag, where: Optional[np.ndarray] = None) -> int:
+        """Set a flag (possibly only on some values, see :meth:`select`) accounting for flag precedence.
+
+        Return: the number of values the flag was set on.
+        """
+        numbers_set = self.merge_codes(FLAG_CODES[flag], where=self.select(where))
+        return int(numbers_set[0, FLAG_CODES[flag]])
+
+    def to_argo(self) -> ma.MaskedArray:
+        """Return the flags as Argo byte-string flags, with missing values masked."""
+        missing = self.missing
+        return ma.masked_array(FLAG_BYTES[self._codes], mask=ma.nomask if missing is None else missing)
+
 
 class CheckOutput:
     """Class for storing the output of a single check."""
@@ -69,13 +205,28 @@ class CheckOutput:
     def __init__(self, profile: ProfileBase) -> None:
         """Initialise a check output with the profile of interest, and the output data."""
         self._profile: ProfileBase = profile
-        self._output: Dict[str, ma.MaskedArray] = {}
+        self._output: Dict[str, CompactFlags] = {}
+        self._flag_counts: Dict[ArgoQcFlag, int] = {}
+        self._number_of_profiles = profile.number_of_profiles if isinstance(profile, ProfileBatch) else 1
+        self._profile_flag_counts = np.zeros((self._number_of_profiles, len(FLAG_BYTES)), dtype=np.int64)
+
+    @property
+    def profile(self) -> ProfileBase:
+        """Return the profile the output flags are for."""
+        return self._profile
 
     def ensure_output_for_property(self, property_name: str) -> None:
         """Create an output flag array if it does not exist."""
         if property_name not in self._output:
-            self._output[property_name] = ma.empty_like(self._profile.get_property_data(property_name), dtype="|S2")
-            self._output[property_name][:] = ArgoQcFlag.GOOD.value
+            padding = None
+            if isinstance(self._profile, ProfileBatch):
+                padding = self._profile.get_property_padding(property_name)
+
+            self._output[property_name] = CompactFlags.full(
+                np.shape(self._profile.get_property_data(property_name)),
+                ArgoQcFlag.GOOD,
+                missing=padding,
+            )
 
     def ensure_output_for_properties(self, property_names: List[str]) -> None:
         """Create an output flag array if it does not exist for each property."""
@@ -90,12 +241,14 @@ class CheckOutput:
     ) -> None:
         """Set a flag for a given property (possibly only on some values) accounting for flag precedence."""
         self.ensure_output_for_property(property_name)
-        where = slice(None) if where is None else where
-        flags = self._output[property_name][where]
-        for overridable_flag in FLAG_PRECEDENCE[flag]:
-            flags[flags == overridable_flag.value] = flag.value
-
-        self._output[property_name][where] = flags
+        flags = self._output[property_name]
+        numbers_set = flags.merge_codes(
+            FLAG_CODES[flag],
+            where=flags.select(where),
+            number_of_profiles=self._number_of_profiles,
+        )
+        self._profile_flag_counts += numbers_set
+        self._flag_counts[flag] = self._flag_counts.get(flag, 0) + int(numbers_set[:, FLAG_CODES[flag]].sum())
 
     def set_output_flag_for_properties(
         self,
@@ -107,10 +260,74 @@ class CheckOutput:
         for property_name in property_names:
             self.set_output_flag_for_property(property_name, flag, where=where)
 
+    def merge_output_codes_for_property(
+        self,
+        property_name: str,
+        codes: np.ndarray,
+        where: Optional[np.ndarray] = None,
+    ) -> None:
+        """Merge flag codes for a given property (possibly only on some values) accounting for flag precedence."""
+        self.ensure_output_for_property(property_name)
+        numbers_set = self._output[property_name].merge_codes(codes, where, self._number_of_profiles)
+        self._profile_flag_counts += numbers_set
+        totals = numbers_set.sum(axis=0)
+        for flag, code in FLAG_CODES.items():
+            if totals[code]:
+                self._flag_counts[flag] = self._flag_counts.get(flag, 0) + int(totals[code])
+
     def get_output_flags_for_property(self, property_name: str) -> ma.MaskedArray:
-        """Return the array of flags for the given property."""
+        """Return the array of flags for the given property, with any padding of a batch masked.
+
+        The flags are held as uint8 codes, so the array is a new copy of them as Argo byte-string flags, and setting
+        values of it does not change the output. Flags are set with :meth:`set_output_flag_for_property`, or in place
+        through the codes of :meth:`get_output_codes_for_property`.
+        """
+        return self._output[property_name].to_argo()
+
+    def get_output_codes_for_property(self, property_name: str) -> np.ndarray:
+        """Return the array of uint8 flag codes for the given property."""
+        return self._output[property_name].codes
+
+    def get_output_compact_flags_for_property(self, property_name: str) -> CompactFlags:
+        """Return the compact flags for the given property."""
         return self._output[property_name]
 
+    def set_output_compact_flags_for_property(self, property_name: str, flags: CompactFlags) -> None:
+        """Set the compact flags for the given property, replacing any flags it has."""
+        self._output[property_name] = flags
+
+    def get_output_property_names(self) -> List[str]:
+        """Return the names of the properties which have output flags."""
+        return list(self._output)
+
+    def get_flag_counts(self) -> Dict[ArgoQcFlag, int]:
+        """Return the number of values each flag has been set on, across all properties."""
+        return dict(self._flag_counts)
+
+    def get_profile_flag_counts(self) -> np.ndarray:
+        """Return the number of values of each profile each flag has been set on, across all properties.
+
+        Return: array of the counts indexed by profile and flag code, with a single profile unless the output is for
+            a batch.
+        """
+        return self._profile_flag_counts.copy()
+
+    def merge_output(self, other: "CheckOutput") -> None:
+        """Merge the flags set in another output for the same profile over these, accounting for flag precedence.
+
+        Values the other output has left good are not merged, so merging the outputs of checks, each run with its
+        own output, gives the same flags as running the checks with a single output. Its flag counts are added.
+        """
+        good = FLAG_CODES[ArgoQcFlag.GOOD]
+        for property_name in other.get_output_property_names():
+            self.ensure_output_for_property(property_name)
+            codes = other.get_output_codes_for_property(property_name)
+            self._output[property_name].merge_codes(codes, where=codes != good)
+
+        self._profile_flag_counts += other.get_profile_flag_counts()
+        for flag, count in other.get_flag_counts().items():
+            self._flag_counts[flag] = self._flag_counts.get(flag, 0) + count
+
 
 class CheckBase(ABC):
     """Abstract base class for Argo checks."""
@@ -120,16 +337,51 @@ class CheckBase(ABC):
     argo_name: str
     nvs_uri: str
 
-    def __init__(self, profile: ProfileBase, profile_previous: Optional[ProfileBase]) -> None:
+    # whether the check can be run on successive windows of levels of a profile, see :mod:`argortqcpy.streaming`
+    streamable: bool = False
+
+    # the argo_ids of the tests which must be run before the check when both are run, see :mod:`argortqcpy.scheduler`
+    depends_on: Tuple[int, ...] = ()
+
+    # the properties whose data the check reads, and whose flags it sets, or None if they are not declared, in which
+    # case the check is never run concurrently with others
+    reads: Optional[Tuple[str, ...]] = None
+    writes: Optional[Tuple[str, ...]] = None
+
+    # whether a run of the check is being recorded, so a run calling its parent's run method is recorded once
+    _instrumenting: bool = False
+
+    def __init_subclass__(cls, **kwargs: object) -> None:
+        """Instrument the run method of each check, see :mod:`argortqcpy.instrumentation`."""
+        super().__init_subclass__(**kwargs)  # type: ignore
+        if "run" in cls.__dict__:
+            setattr(cls, "run", _instrument_run(cls.__dict__["run"]))
+
+    def __init__(
+        self,
+        profile: ProfileBase,
+        profile_previous: Optional[ProfileBase],
+        output: Optional[CheckOutput] = None,
+    ) -> None:
         """Initialise the test with the relevant profile and its precursor.
 
         Args:
             profile: The profile of interest to be checked.
             profile_previous: The profile prior to the profile of interest.
                 ``None`` if the profile of interest is the first.
+            output: Optional output, shared with other checks, into which the flags are to be set.
+                Defaults to a new output for each run.
         """
         self._profile = profile
         self._profile_previous = profile_previous
+        self._output = output
+
+    def create_output(self) -> CheckOutput:
+        """Return the output into which the check should set its flags."""
+        if self._output is not None:
+            return self._output
+
+        return CheckOutput(profile=self._profile)
 
     @abstractmethod
     def run(self) -> CheckOutput:
@@ -138,10 +390,83 @@ class CheckBase(ABC):
         Return: a CheckOutput instance with checked properties flagged.
         """
 
+    @classmethod
+    def run_batch(
+        cls,
+        profiles: Union[ProfileBatch, Sequence[ProfileBase]],
+        profiles_previous: Optional[Union[ProfileBatch, Sequence[ProfileBase]]] = None,
+    ) -> CheckOutput:
+        """Run the check on many profiles at once, stacked as padded (N_PROF, N_LEVELS) arrays.
+
+        Args:
+            profiles: A batch of profiles, or a collection of profiles to be stacked into a batch.
+            profiles_previous: Optional batch (or collection) of the profiles prior to each profile of interest.
+
+        Return: a CheckOutput instance with 2-D flag arrays, padding values masked.
+        """
+        if not isinstance(profiles, ProfileBatch):
+            profiles = ProfileBatch.from_profiles(profiles)
+        if profiles_previous is not None and not isinstance(profiles_previous, ProfileBatch):
+            profiles_previous = ProfileBatch.from_profiles(profiles_previous)
+
+        return cls(profiles, profiles_previous).run()
+
     def is_required(self) -> bool:  # pylint: disable=no-self-use
         """Is the check required to run or not."""
         return True
 
+    def get_stream_state(self) -> object:  # pylint: disable=no-self-use
+        """Return the state to be carried into the run on the next window of levels, when streaming."""
+        return None
+
+    def set_stream_state(self, state: object) -> None:
+        """Set the state carried over from the run on the previous window of levels, when streaming."""
+
+
+def _instrument_run(run: Callable[[CheckBase], CheckOutput]) -> Callable[[CheckBase], CheckOutput]:
+    """Wrap the run method of a check to record its timing and flags while instrumentation is enabled."""
+
+    @functools.wraps(run)
+    def instrumented_run(check: CheckBase) -> CheckOutput:
+        # a run calling the run method of its parent class is only recorded once
+        if not instrumentation.is_enabled() or check._instrumenting:  # pylint: disable=protected-access
+            return run(check)
+
+        shared_output = getattr(check, "_output", None)
+        flag_counts_before = shared_output.get_flag_counts() if shared_output is not None else {}
+
+        check._instrumenting = True  # pylint: disable=protected-access
+        try:
+            start = time.perf_counter()
+            output = run(check)
+            seconds = time.perf_counter() - start
+        finally:
+            check._instrumenting = False  # pylint: disable=protected-access
+
+        flag_counts = {}
+        levels = 0
+        if output is not None:
+            for flag, count in output.get_flag_counts().items():
+                if count > flag_counts_before.get(flag, 0):
+                    flag_counts[flag.name] = count - flag_counts_before.get(flag, 0)
+
+            levels = max(
+                (np.size(output.get_output_codes_for_property(name)) for name in output.get_output_property_names()),
+                default=0,
+            )
+
+        instrumentation.record_check(
+            type(check).__name__,
+            getattr(check, "argo_id", None),
+            getattr(check, "argo_name", None),
+            seconds,
+            levels,
+            flag_counts,
+        )
+        return output
+
+    return instrumented_run
+
 
 class PressureIncreasingCheck(CheckBase):
     """Check for monotonically increasing pressure in a profile."""
@@ -151,46 +476,188 @@ class PressureIncreasingCheck(CheckBase):
     argo_name = "Pressure increasing test"
     nvs_uri = "http://vocab.nerc.ac.uk/collection/R11/current/8/"
 
+    streamable = True
+
+    reads = ("PRES",)
+    writes = ("PRES", "TEMP", "PSAL")
+
+    def __init__(
+        self,
+        profile: ProfileBase,
+        profile_previous: Optional[ProfileBase],
+        output: Optional[CheckOutput] = None,
+    ) -> None:
+        """Initialise the test, with no levels before those of the profile."""
+        super().__init__(profile, profile_previous, output=output)
+        # the last pressure, and maximum pressure, of the levels before those of the profile
+        self._stream_state: Tuple[Union[float, np.ndarray], Union[float, np.ndarray]] = (-np.inf, -np.inf)
+
+    def get_stream_state(self) -> object:
+        """Return the last pressure and the running maximum pressure of the levels checked."""
+        return self._stream_state
+
+    def set_stream_state(self, state: object) -> None:
+        """Set the last pressure and the running maximum pressure of the levels before the profile."""
+        self._stream_state = state  # type: ignore
+
     def run(self) -> CheckOutput:
         """Check a profile for monotonically increasing pressure."""
         pressure = self._profile.get_property_data("PRES")
 
-        output = CheckOutput(profile=self._profile)
-        output.ensure_output_for_properties(["PRES", "TEMP", "PSAL"])
+        # missing values (e.g. the padding of a batch) are never flagged and do not affect the running maximum
+        valid = ~ma.getmaskarray(pressure)
+        pressure = ma.filled(ma.asarray(pressure, dtype=float), -np.inf)
+        previous_pressure, previous_maximum = self._stream_state
 
-        # do the first pass checking that every value is increasing
-        diff = np.diff(pressure, prepend=-np.inf)  # ensures the first measurement always passes
-        non_monotonic_elements = diff < 0.0
+        output = self.create_output()
+        output.ensure_output_for_properties(["PRES", "TEMP", "PSAL"])
 
-        output.set_output_flag_for_properties(
-            ["PRES", "TEMP", "PSAL"],
-            ArgoQcFlag.BAD,
-            where=non_monotonic_elements,
+        # values which decrease, are constant, or are still below the greatest value before them are bad
+        not_increasing, last_pressure, last_maximum = kernels.get_backend().pressure_not_increasing(
+            pressure, valid, previous_pressure, previous_maximum
         )
+        output.set_output_flag_for_properties(["PRES", "TEMP", "PSAL"], ArgoQcFlag.BAD, where=not_increasing)
 
-        # do the second pass finding consecutive constant values
-        constant = diff == 0.0
-        output.set_output_flag_for_properties(
-            ["PRES", "TEMP", "PSAL"],
-            ArgoQcFlag.BAD,
-            where=constant,
-        )
+        if pressure.shape[-1]:
+            self._stream_state = (last_pressure, last_maximum)
 
-        # do the third pass finding any sections where it has been non-montonic and is still below the last good value
-        # this is a running maximum, constant parts mean bad values
-        running_maximum = np.maximum.accumulate(pressure, axis=-1)
-        running_maximum_constant = np.diff(running_maximum, prepend=-np.inf) == 0.0
-        output.set_output_flag_for_properties(
-            ["PRES", "TEMP", "PSAL"],
-            ArgoQcFlag.BAD,
-            where=running_maximum_constant,
+        return output
+
+
+def broadcast_to_levels(profile: ProfileBase, values: np.ndarray) -> np.ndarray:
+    """Reshape values for each profile, e.g. from its position, to broadcast against the levels of the profiles.
+
+    A single profile has a single value, and each profile of a batch has one value for its row of levels.
+    """
+    if np.ndim(profile.get_property_data("PRES")) > 1:
+        return np.reshape(values, (-1, 1))
+
+    return np.reshape(values, ())
+
+
+class RangeRule(NamedTuple):
+    """A rule flagging values of a property outside a range (inclusive of bounds).
+
+    The flag is set either for the property tested, or for a given tuple of properties.
+    """
+
+    property_name: str
+    flag: ArgoQcFlag
+    lower_limit: float = -np.inf
+    upper_limit: float = np.inf
+    properties_to_be_flagged: Optional[Tuple[str, ...]] = None
+
+
+class CompiledRangeRules(NamedTuple):
+    """Range rules compiled for evaluation in a single pass over each property.
+
+    Each property tested has the limits of its rules, one rule per column of the comparisons. Each property flagged
+    has the columns of the rules flagging it, and a table of the flag code of every combination of those rules
+    being broken, with precedence already applied.
+    """
+
+    tested: Tuple[Tuple[str, np.ndarray, np.ndarray], ...]
+    flagged: Tuple[Tuple[str, np.ndarray, np.ndarray], ...]
+
+
+# the most rules flagging a single property, limiting the size of its table of flag codes
+MAX_RULES_PER_PROPERTY = 16
+
+
+@functools.lru_cache(maxsize=None)
+def compile_range_rules(rules: Tuple[RangeRule, ...]) -> CompiledRangeRules:
+    """Compile range rules for evaluation in a single pass, once for each table of rules."""
+    tested_names = list(dict.fromkeys(rule.property_name for rule in rules))
+    ordered_rules = sorted(
+        range(len(rules)), key=lambda rule_index: tested_names.index(rules[rule_index].property_name)
+    )
+    column_of_rule = {rule_index: column for column, rule_index in enumerate(ordered_rules)}
+
+    tested = tuple(
+        (
+            property_name,
+            np.array([rule.lower_limit for rule in rules if rule.property_name == property_name], dtype=float),
+            np.array([rule.upper_limit for rule in rules if rule.property_name == property_name], dtype=float),
         )
+        for property_name in tested_names
+    )
 
-        return output
+    flagged = []
+    rule_targets = [rule.properties_to_be_flagged or (rule.property_name,) for rule in rules]
+    for property_name in dict.fromkeys(target for targets in rule_targets for target in targets):
+        rule_indices = [rule_index for rule_index, targets in enumerate(rule_targets) if property_name in targets]
+        if len(rule_indices) > MAX_RULES_PER_PROPERTY:
+            raise ValueError(f"compile_range_rules: more than {MAX_RULES_PER_PROPERTY} rules flag {property_name}.")
+
+        # the flag of each combination of rules being broken, merged in the order of the rules
+        table = np.zeros(2 ** len(rule_indices), dtype=np.uint8)
+        for combination in range(1, table.size):
+            codes = [
+                FLAG_CODES[rules[rule_index].flag]
+                for bit, rule_index in enumerate(rule_indices)
+                if combination >> bit & 1
+            ]
+            table[combination] = functools.reduce(lambda existing, new: int(merge_flag_codes(existing, new)), codes)
+
+        columns = np.array([column_of_rule[rule_index] for rule_index in rule_indices], dtype=np.intp)
+        flagged.append((property_name, columns, table))
+
+    return CompiledRangeRules(tested=tested, flagged=tuple(flagged))
 
 
 class PropertyRangeCheck(CheckBase):
-    """A class which provides generalised range checking functionality."""
+    """A class which provides generalised range checking functionality.
+
+    Subclasses declare their limits as a table of :class:`RangeRule`, which the check evaluates in a single pass.
+    """
+
+    range_rules: Tuple[RangeRule, ...] = ()
+
+    def run(self) -> CheckOutput:
+        """Check a profile against the range rules of the check."""
+        output = self.create_output()
+        self.set_output_flags_for_range_rules(output, self.range_rules)
+        return output
+
+    def set_output_flags_for_range_rules(
+        self,
+        output: CheckOutput,
+        rules: Sequence[RangeRule],
+        where: Optional[np.ndarray] = None,
+    ) -> None:
+        """Set the output flags for values outside the ranges of a table of rules.
+
+        Each property tested is read once and compared against the limits of all of its rules at once, and the
+        final flag of each value is merged into the output once for each property flagged. Missing values are
+        never flagged.
+
+        Args:
+            output: An CheckOutput object to hold output flags.
+            rules: The range rules, whose properties tested must have the same shape.
+            where: Optional boolean array, broadcasting against the property values, restricting the values
+                checked. Defaults to checking every value.
+        """
+        compiled = compile_range_rules(tuple(rules))
+        if not compiled.tested:
+            return
+
+        broken = []
+        for property_name, lower_limits, upper_limits in compiled.tested:
+            property_values = self._profile.get_property_data(property_name)
+            values = ma.getdata(property_values)[..., np.newaxis]
+            with np.errstate(invalid="ignore"):
+                outside = (values < lower_limits) | (values > upper_limits)
+            broken.append(outside & ~ma.getmaskarray(property_values)[..., np.newaxis])
+        broken_rules = np.concatenate(broken, axis=-1)
+
+        for property_name, columns, table in compiled.flagged:
+            # each combination of broken rules as the bits of an index into the table of flag codes
+            combination = broken_rules[..., columns] @ (1 << np.arange(columns.size))
+            flagged = combination > 0
+            if where is not None:
+                flagged = flagged & where
+
+            output.merge_output_codes_for_property(property_name, table[combination], where=flagged)
 
     def set_output_flags_for_value_outside_range(  # pylint: disable=too-many-arguments
         self,
@@ -200,6 +667,7 @@ class PropertyRangeCheck(CheckBase):
         lower_limit: float = -np.inf,
         upper_limit: float = np.inf,
         properties_to_be_flagged: Optional[List[str]] = None,
+        where: Optional[np.ndarray] = None,
     ) -> None:
         """Set the output flags based on whether a value is outside a range (inclusive of bounds).
 
@@ -215,12 +683,16 @@ class PropertyRangeCheck(CheckBase):
                 Values greater than this will be flagged.
             properties_to_be_flagged: Optional list of properties to be flagged.
                 Defaults to the property specified to be checked.
+            where: Optional boolean array, broadcasting against the property values, restricting the values
+                checked. Defaults to checking every value.
         """
         properties_to_be_flagged = properties_to_be_flagged or [property_name]
         property_values = self._profile.get_property_data(property_name)
 
-        # boolean array where values are above *or* below the specified limits
-        bad_values = (property_values < lower_limit) | (property_values > upper_limit)
+        # boolean array where values are above *or* below the specified limits, missing values are never flagged
+        bad_values = ma.filled((property_values < lower_limit) | (property_values > upper_limit), False)
+        if where is not None:
+            bad_values = bad_values & where
 
         output.ensure_output_for_properties(properties_to_be_flagged)
         output.set_output_flag_for_properties(properties_to_be_flagged, flag, where=bad_values)
@@ -234,40 +706,676 @@ class GlobalRangeCheck(PropertyRangeCheck):
     argo_name = "Global range test"
     nvs_uri = "http://vocab.nerc.ac.uk/collection/R11/current/6/"
 
+    streamable = True
+
+    reads = ("PRES", "TEMP", "PSAL")
+    writes = ("PRES", "TEMP", "PSAL")
+
+    range_rules = (
+        RangeRule("PRES", ArgoQcFlag.BAD, lower_limit=-5.0, properties_to_be_flagged=("PRES", "TEMP", "PSAL")),
+        RangeRule("PRES", ArgoQcFlag.PROBABLY_BAD, lower_limit=-2.4, properties_to_be_flagged=("PRES", "TEMP", "PSAL")),
+        RangeRule("TEMP", ArgoQcFlag.BAD, lower_limit=-2.5, upper_limit=40.0),
+        RangeRule("PSAL", ArgoQcFlag.BAD, lower_limit=2.0, upper_limit=41.0),
+    )
+
+
+class RegionalRangeCheck(PropertyRangeCheck):
+    """Check the temperature and salinity meet the range requirements of the region of the profile's position."""
+
+    argo_id = 7
+    argo_binary_id = 128
+    argo_name = "Regional range test"
+    nvs_uri = "http://vocab.nerc.ac.uk/collection/R11/current/7/"
+
+    streamable = True
+
+    depends_on = (3, 4)
+    reads = ("LATITUDE", "LONGITUDE", "TEMP", "PSAL")
+    writes = ("TEMP", "PSAL")
+
+    @staticmethod
+    def get_region_rules(region: regions.Region) -> Tuple[RangeRule, ...]:
+        """Return the range rules of a region, flagging values outside its limits as bad."""
+        return tuple(
+            RangeRule(property_name, ArgoQcFlag.BAD, lower_limit=lower_limit, upper_limit=upper_limit)
+            for property_name, (lower_limit, upper_limit) in region.limits.items()
+        )
+
+    def is_required(self) -> bool:
+        """Return whether the profile has a position to be located."""
+        return self._profile.has_property("LATITUDE") and self._profile.has_property("LONGITUDE")
+
     def run(self) -> CheckOutput:
-        """Check a profile for correct value limits."""
-        output = CheckOutput(profile=self._profile)
+        """Check a profile for correct value limits within its region."""
+        output = self.create_output()
+        output.ensure_output_for_properties(["TEMP", "PSAL"])
+        region_index = regions.get_region_index()
+
+        # locate every profile of a batch at once, missing positions being in no region
+        latitude = ma.filled(ma.asarray(self._profile.get_property_data("LATITUDE"), dtype=float), np.nan)
+        longitude = ma.filled(ma.asarray(self._profile.get_property_data("LONGITUDE"), dtype=float), np.nan)
+        region_numbers = region_index.find(latitude, longitude)
+
+        region_numbers = broadcast_to_levels(self._profile, region_numbers)
+
+        for region_number, region in enumerate(region_index.regions):
+            in_region = region_numbers == region_number
+            if not np.any(in_region):
+                continue
+
+            self.set_output_flags_for_range_rules(output, self.get_region_rules(region), where=in_region)
+
+        return output
+
+
+class TrajectoryCheck(CheckBase):
+    """A class which provides the trajectory tests of the cycles of profiles, evaluated together.
+
+    The tests of every profile of a batch, e.g. every cycle of a float, are evaluated in a single pass, see
+    :mod:`argortqcpy.trajectory`, and shared by the checks of the batch. The speed of a single profile is tested
+    from the previous profile.
+    """
+
+    # the properties the check needs
+    required_properties: Tuple[str, ...] = ()
+
+    # the tests of every cycle are evaluated together, from all of the trajectory properties of the profiles
+    reads = trajectory.TRAJECTORY_PROPERTIES
+
+    def is_required(self) -> bool:
+        """Return whether the profile has the properties tested."""
+        return all(self._profile.has_property(property_name) for property_name in self.required_properties)
+
+    def get_trajectory_tests(self) -> trajectory.TrajectoryTests:
+        """Return whether the date, location and speed of each profile failed the trajectory tests."""
+        # tests from a previous profile depend on it, and are cheap to evaluate for the two profiles
+        if self._profile_previous is not None:
+            return self._compute_trajectory_tests()
+
+        return self._profile.get_derived_data("trajectory_tests", self._compute_trajectory_tests)
+
+    def _compute_trajectory_tests(self) -> trajectory.TrajectoryTests:
+        """Evaluate the trajectory tests on the profiles, after the previous profile if there is one."""
+        profiles = [self._profile] if self._profile_previous is None else [self._profile_previous, self._profile]
+        juld, latitude, longitude = (
+            np.concatenate([_read_cycles(profile, property_name) for profile in profiles])
+            for property_name in ("JULD", "LATITUDE", "LONGITUDE")
+        )
+
+        platform_numbers = None
+        if all(profile.has_property("PLATFORM_NUMBER") for profile in profiles):
+            platform_numbers = np.concatenate(
+                [np.ravel(ma.filled(profile.get_property_data("PLATFORM_NUMBER"), "")) for profile in profiles]
+            )
+
+        tests = trajectory.evaluate_trajectory(juld, latitude, longitude, platform_numbers=platform_numbers)
+
+        # only the tests of the profile itself, not of the previous profile
+        shape = _get_cycles_shape(self._profile)
+        first_cycle = tests.impossible_date.size - int(np.prod(shape))
+        return trajectory.TrajectoryTests(*(test[first_cycle:].reshape(shape) for test in tests))
+
 
-        self.set_output_flags_for_value_outside_range(
-            output,
-            "PRES",
+def _get_cycles_shape(profile: ProfileBase) -> Tuple[int, ...]:
+    """Return the shape of the properties of a profile with a value for each cycle, () for a single profile."""
+    for property_name in trajectory.TRAJECTORY_PROPERTIES:
+        if profile.has_property(property_name):
+            return np.shape(profile.get_property_data(property_name))
+
+    return ()
+
+
+def _read_cycles(profile: ProfileBase, property_name: str) -> np.ndarray:
+    """Return the values of a property for each cycle of a profile as floats, NaN where missing."""
+    if not profile.has_property(property_name):
+        return np.full(int(np.prod(_get_cycles_shape(profile))), np.nan)
+
+    return ma.filled(ma.asarray(profile.get_property_data(property_name), dtype=float), np.nan).ravel()
+
+
+class ImpossibleDateCheck(TrajectoryCheck):
+    """Check the date of a profile is after the start of Argo and not in the future."""
+
+    argo_id = 2
+    argo_binary_id = 4
+    argo_name = "Impossible date test"
+    nvs_uri = "http://vocab.nerc.ac.uk/collection/R11/current/2/"
+
+    required_properties = ("JULD",)
+    writes = ("JULD",)
+
+    def run(self) -> CheckOutput:
+        """Check a profile for an impossible date."""
+        output = self.create_output()
+        output.set_output_flag_for_property("JULD", ArgoQcFlag.BAD, where=self.get_trajectory_tests().impossible_date)
+
+        return output
+
+
+class ImpossibleLocationCheck(TrajectoryCheck):
+    """Check the latitude and longitude of a profile are within their possible ranges."""
+
+    argo_id = 3
+    argo_binary_id = 8
+    argo_name = "Impossible location test"
+    nvs_uri = "http://vocab.nerc.ac.uk/collection/R11/current/3/"
+
+    required_properties = ("LATITUDE", "LONGITUDE")
+    writes = ("LATITUDE", "LONGITUDE")
+
+    def run(self) -> CheckOutput:
+        """Check a profile for an impossible location."""
+        output = self.create_output()
+        output.set_output_flag_for_properties(
+            ["LATITUDE", "LONGITUDE"],
             ArgoQcFlag.BAD,
-            lower_limit=-5.0,
-            properties_to_be_flagged=["PRES", "TEMP", "PSAL"],
+            where=self.get_trajectory_tests().impossible_location,
         )
 
-        self.set_output_flags_for_value_outside_range(
-            output,
-            "PRES",
-            ArgoQcFlag.PROBABLY_BAD,
-            lower_limit=-2.4,
-            properties_to_be_flagged=["PRES", "TEMP", "PSAL"],
+        return output
+
+
+class ImpossibleSpeedCheck(TrajectoryCheck):
+    """Check the drift speed of a float between cycles is not impossibly fast.
+
+    The position and date of a profile whose speeds from, and to, its neighbouring cycles are all too fast are
+    flagged, see :func:`argortqcpy.trajectory.evaluate_trajectory`.
+    """
+
+    argo_id = 5
+    argo_binary_id = 32
+    argo_name = "Impossible speed test"
+    nvs_uri = "http://vocab.nerc.ac.uk/collection/R11/current/5/"
+
+    required_properties = ("JULD", "LATITUDE", "LONGITUDE")
+    depends_on = (2, 3, 4)
+    writes = ("LATITUDE", "LONGITUDE", "JULD")
+
+    def run(self) -> CheckOutput:
+        """Check a profile for an impossible speed from the previous, or to the next, cycle of its float."""
+        output = self.create_output()
+        output.set_output_flag_for_properties(
+            ["LATITUDE", "LONGITUDE", "JULD"],
+            ArgoQcFlag.BAD,
+            where=self.get_trajectory_tests().impossible_speed,
         )
 
-        self.set_output_flags_for_value_outside_range(
-            output,
-            "TEMP",
+        return output
+
+
+class BathymetryCheck(CheckBase):
+    """A class which provides the elevation of the sea floor at the position of a profile.
+
+    The elevation is looked up in the grid given by the ``ARGORTQCPY_BATHYMETRY`` environment variable, see
+    :mod:`argortqcpy.bathymetry`, and checks are only required if there is a grid and the profile has a position.
+    """
+
+    depends_on: Tuple[int, ...] = (3,)
+    reads: Optional[Tuple[str, ...]] = ("LATITUDE", "LONGITUDE")
+
+    def is_required(self) -> bool:
+        """Return whether there is a bathymetry grid and the profile has a position to be looked up."""
+        return (
+            bathymetry.get_bathymetry() is not None
+            and self._profile.has_property("LATITUDE")
+            and self._profile.has_property("LONGITUDE")
+        )
+
+    def get_elevation(self) -> np.ndarray:
+        """Return the elevation (m, positive up) at the position of each profile, NaN for missing positions."""
+        return self._profile.get_derived_data("elevation", self._compute_elevation)
+
+    def _compute_elevation(self) -> np.ndarray:
+        """Look up the elevation at the position of each profile."""
+        grid = bathymetry.get_bathymetry()
+        if grid is None:
+            raise ValueError(f"{type(self).__name__}: no bathymetry grid, see {bathymetry.BATHYMETRY_PATH_VARIABLE}.")
+
+        latitude = ma.filled(ma.asarray(self._profile.get_property_data("LATITUDE"), dtype=float), np.nan)
+        longitude = ma.filled(ma.asarray(self._profile.get_property_data("LONGITUDE"), dtype=float), np.nan)
+        return grid.elevation(latitude, longitude)
+
+
+class PositionOnLandCheck(BathymetryCheck):
+    """Check the position of a profile is not on land."""
+
+    argo_id = 4
+    argo_binary_id = 16
+    argo_name = "Position on land test"
+    nvs_uri = "http://vocab.nerc.ac.uk/collection/R11/current/4/"
+
+    writes = ("LATITUDE", "LONGITUDE")
+
+    def run(self) -> CheckOutput:
+        """Check a profile for a position above sea level."""
+        output = self.create_output()
+
+        with np.errstate(invalid="ignore"):
+            on_land = self.get_elevation() > 0.0
+
+        output.set_output_flag_for_properties(["LATITUDE", "LONGITUDE"], ArgoQcFlag.BAD, where=on_land)
+
+        return output
+
+
+class DeepestPressureCheck(BathymetryCheck):
+    """Check the pressures of a profile are not deeper than the sea floor at its position.
+
+    Pressures (dbar) are compared with depths (m), which differ by a few percent, with a margin beyond the depth.
+    Profiles positioned on land are left to the position on land test.
+    """
+
+    argo_id = 19
+    argo_binary_id = 524288
+    argo_name = "Deepest pressure test"
+    nvs_uri = "http://vocab.nerc.ac.uk/collection/R11/current/19/"
+
+    streamable = True
+
+    depends_on = (3, 4)
+    reads = ("LATITUDE", "LONGITUDE", "PRES")
+    writes = ("PRES", "TEMP", "PSAL")
+
+    # the fraction of the depth beyond it which pressures may be
+    depth_margin = 0.1
+
+    def run(self) -> CheckOutput:
+        """Check a profile for pressures deeper than the sea floor."""
+        output = self.create_output()
+        output.ensure_output_for_properties(["PRES", "TEMP", "PSAL"])
+
+        elevation = self.get_elevation()
+        with np.errstate(invalid="ignore"):
+            depth = np.where(elevation < 0.0, -elevation, np.nan)
+        maximum_pressure = broadcast_to_levels(self._profile, depth * (1.0 + self.depth_margin))
+        pressure = self._profile.get_property_data("PRES")
+        with np.errstate(invalid="ignore"):
+            too_deep = ma.filled(pressure > maximum_pressure, False)
+
+        output.set_output_flag_for_properties(["PRES", "TEMP", "PSAL"], ArgoQcFlag.BAD, where=too_deep)
+
+        return output
+
+
+def three_point_stencil(values: np.ndarray, valid: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return the previous and next valid neighbours of each value along the last axis, skipping invalid values.
+
+    Args:
+        values: Array of values with levels along the last axis.
+        valid: Boolean array, ``True`` where values may be used.
+
+    Return: the previous neighbours, next neighbours, and a boolean array which is ``True`` where a value is valid
+        and has valid neighbours on both sides. Neighbours are undefined where this is ``False``.
+    """
+    return kernels.get_backend().three_point_stencil(values, valid)
+
+
+class PropertyStencilCheck(CheckBase):
+    """A class which provides generalised checking of each value against its neighbours in a profile.
+
+    Subclasses give the test value of each value from it and its neighbours, and the pressure-dependent thresholds
+    above which the test value is flagged. Missing values are skipped, each value being compared with the nearest
+    values which are not missing, and are never flagged.
+    """
+
+    flag = ArgoQcFlag.BAD
+
+    depends_on = (8,)
+    reads = ("PRES", "TEMP", "PSAL")
+    writes = ("TEMP", "PSAL")
+
+    # for each property, pairs of a pressure and the threshold applying to pressures less than it, by pressure
+    thresholds: Dict[str, Sequence[Tuple[float, float]]]
+
+    @staticmethod
+    @abstractmethod
+    def test_value(previous_values: np.ndarray, values: np.ndarray, next_values: np.ndarray) -> np.ndarray:
+        """Return the test value of each value, given the values before and after it."""
+
+    def run(self) -> CheckOutput:
+        """Check each property for values whose test value exceeds the threshold for their pressure."""
+        output = self.create_output()
+        pressure = self._profile.get_property_data("PRES")
+
+        for property_name, thresholds in self.thresholds.items():
+            self.set_output_flags_for_test_value_above_threshold(output, property_name, pressure, thresholds)
+
+        return output
+
+    def set_output_flags_for_test_value_above_threshold(
+        self,
+        output: CheckOutput,
+        property_name: str,
+        pressure: ma.MaskedArray,
+        thresholds: Sequence[Tuple[float, float]],
+    ) -> None:
+        """Set the output flags of a property where the test value is greater than the threshold.
+
+        Args:
+            output: An CheckOutput object to hold output flags.
+            property_name: The property to check.
+            pressure: The pressure of each value of the property.
+            thresholds: Pairs of a pressure and the threshold applying to pressures less than it, by pressure.
+        """
+        property_values = self._profile.get_property_data(property_name)
+        valid = ~(ma.getmaskarray(property_values) | ma.getmaskarray(pressure))
+        values = ma.filled(ma.asarray(property_values, dtype=float), np.nan)
+
+        previous_values, next_values, has_neighbours = three_point_stencil(values, valid)
+        with np.errstate(invalid="ignore"):
+            test_values = self.test_value(previous_values, values, next_values)
+
+        bounds = np.array([bound for bound, _ in thresholds])
+        limits = np.array([limit for _, limit in thresholds])
+        pressure_band = np.minimum(
+            np.searchsorted(bounds, ma.filled(ma.asarray(pressure, dtype=float), np.inf), side="right"),
+            len(limits) - 1,
+        )
+
+        output.ensure_output_for_property(property_name)
+        with np.errstate(invalid="ignore"):
+            bad_values = has_neighbours & (test_values > limits[pressure_band])
+        output.set_output_flag_for_property(property_name, self.flag, where=bad_values)
+
+
+class SpikeCheck(PropertyStencilCheck):
+    """Check the temperature and salinity for spikes."""
+
+    argo_id = 9
+    argo_binary_id = 512
+    argo_name = "Spike test"
+    nvs_uri = "http://vocab.nerc.ac.uk/collection/R11/current/9/"
+
+    thresholds = {
+        "TEMP": ((500.0, 6.0), (np.inf, 2.0)),
+        "PSAL": ((500.0, 0.9), (np.inf, 0.3)),
+    }
+
+    @staticmethod
+    def test_value(previous_values: np.ndarray, values: np.ndarray, next_values: np.ndarray) -> np.ndarray:
+        """Return the spike test value, |V2 - (V3 + V1) / 2| - |(V3 - V1) / 2|."""
+        return np.abs(values - (next_values + previous_values) / 2.0) - np.abs((next_values - previous_values) / 2.0)
+
+
+class GradientCheck(PropertyStencilCheck):
+    """Check the temperature and salinity for large gradients."""
+
+    argo_id = 11
+    argo_binary_id = 2048
+    argo_name = "Gradient test"
+    nvs_uri = "http://vocab.nerc.ac.uk/collection/R11/current/11/"
+
+    thresholds = {
+        "TEMP": ((500.0, 9.0), (np.inf, 3.0)),
+        "PSAL": ((500.0, 1.5), (np.inf, 0.5)),
+    }
+
+    @staticmethod
+    def test_value(previous_values: np.ndarray, values: np.ndarray, next_values: np.ndarray) -> np.ndarray:
+        """Return the gradient test value, |V2 - (V3 + V1) / 2|."""
+        return np.abs(values - (next_values + previous_values) / 2.0)
+
+
+class DensityInversionCheck(CheckBase):
+    """Check the temperature and salinity for density inversions."""
+
+    argo_id = 14
+    argo_binary_id = 16384
+    argo_name = "Density inversion test"
+    nvs_uri = "http://vocab.nerc.ac.uk/collection/R11/current/14/"
+
+    depends_on = (8,)
+    reads = ("PRES", "TEMP", "PSAL")
+    writes = ("TEMP", "PSAL")
+
+    # the decrease in potential density with pressure (kg m-3) above which levels are flagged
+    threshold = 0.03
+
+    def run(self) -> CheckOutput:
+        """Check a profile for density inversions between neighbouring levels."""
+        output = self.create_output()
+        self.set_output_flags_for_density_inversion(output, ["TEMP", "PSAL"])
+        return output
+
+    def set_output_flags_for_density_inversion(self, output: CheckOutput, properties_to_be_flagged: List[str]) -> None:
+        """Set the output flags of both levels of each pair of neighbouring levels with a density inversion.
+
+        The potential density of each level is compared with that of the previous level (from top to bottom) and of
+        the next level (from bottom to top), both referenced to the mid-point pressure of the pair. Levels with any
+        of pressure, temperature or salinity missing are skipped.
+
+        Args:
+            output: An CheckOutput object to hold output flags.
+            properties_to_be_flagged: The properties to be flagged at inverted levels.
+        """
+        density_decrease, previous_index, next_index = self._profile.get_derived_data(
+            "potential_density_decrease",
+            self._compute_potential_density_decrease,
+        )
+        number_of_levels = density_decrease.shape[-1]
+
+        with np.errstate(invalid="ignore"):
+            # the level is less dense than the level above it
+            inverted_above = (previous_index >= 0) & (density_decrease > self.threshold)
+        # the level below is less dense than this one
+        inverted_below = (next_index < number_of_levels) & take_neighbours(inverted_above, next_index)
+
+        output.ensure_output_for_properties(properties_to_be_flagged)
+        output.set_output_flag_for_properties(
+            properties_to_be_flagged,
             ArgoQcFlag.BAD,
-            lower_limit=-2.5,
-            upper_limit=40.0,
+            where=inverted_above | inverted_below,
         )
 
-        self.set_output_flags_for_value_outside_range(
-            output,
-            "PSAL",
+    def _compute_potential_density_decrease(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Return the decrease in potential density from the previous valid level, and the neighbour indices.
+
+        The densities of both levels of each pair are computed in one vectorised pass over the profile.
+        """
+        properties = [self._profile.get_property_data(property_name) for property_name in ("PRES", "TEMP", "PSAL")]
+        valid = ~np.logical_or.reduce([ma.getmaskarray(values) for values in properties])
+        pressure, temperature, salinity = (ma.filled(ma.asarray(values, dtype=float), np.nan) for values in properties)
+
+        previous_index, next_index = neighbour_indices(valid)
+        previous_index = np.where(valid, previous_index, -1)
+        next_index = np.where(valid, next_index, valid.shape[-1])
+
+        previous_pressure = take_neighbours(pressure, previous_index)
+        reference_pressure = (pressure + previous_pressure) / 2.0
+        with np.errstate(invalid="ignore"):
+            density_decrease = seawater.potential_density(
+                take_neighbours(salinity, previous_index),
+                take_neighbours(temperature, previous_index),
+                previous_pressure,
+                reference_pressure,
+            ) - seawater.potential_density(salinity, temperature, pressure, reference_pressure)
+
+        return density_decrease, previous_index, next_index
+
+
+class StuckValueCheck(CheckBase):
+    """Check the temperature and salinity of a profile are not stuck at the same value at every level."""
+
+    argo_id = 13
+    argo_binary_id = 8192
+    argo_name = "Stuck value test"
+    nvs_uri = "http://vocab.nerc.ac.uk/collection/R11/current/13/"
+
+    reads = ("TEMP", "PSAL")
+    writes = ("TEMP", "PSAL")
+
+    def run(self) -> CheckOutput:
+        """Check a profile for properties with the same value at every level."""
+        output = self.create_output()
+
+        for property_name in ["TEMP", "PSAL"]:
+            output.ensure_output_for_property(property_name)
+            property_values = self._profile.get_property_data(property_name)
+
+            # missing values are ignored, and a profile needs more than one value to be stuck
+            valid = ~ma.getmaskarray(property_values)
+            values = ma.getdata(property_values)
+            maximum = np.max(np.where(valid, values, -np.inf), axis=-1, initial=-np.inf)
+            minimum = np.min(np.where(valid, values, np.inf), axis=-1, initial=np.inf)
+            stuck = (np.count_nonzero(valid, axis=-1) > 1) & (maximum == minimum)
+
+            output.set_output_flag_for_property(property_name, ArgoQcFlag.BAD, where=valid & stuck[..., np.newaxis])
+
+        return output
+
+
+def bin_means(pressure: np.ndarray, values: np.ndarray, bin_width: float) -> np.ndarray:
+    """Return the mean of values in bins of pressure, NaN for bins without values.
+
+    Bins start at zero pressure, with shallower values in the first bin. Values are binned along the last axis,
+    with every profile of a batch binned in one aggregation.
+
+    Args:
+        pressure: Masked array of pressures, with levels along the last axis.
+        values: Masked array of values at the pressures.
+        bin_width: The width (dbar) of the bins.
+
+    Return: array of means, with the bins along the last axis.
+    """
+    valid = ~(ma.getmaskarray(pressure) | ma.getmaskarray(values))
+    pressure = np.where(valid, ma.getdata(pressure), 0.0)
+    values = np.where(valid, ma.getdata(values), 0.0)
+
+    number_of_bins = int(np.max(pressure, initial=0.0) // bin_width) + 1
+    bin_edges = np.arange(number_of_bins) * bin_width
+    bins = np.maximum(np.searchsorted(bin_edges, pressure, side="right") - 1, 0)
+
+    # each bin of each profile is a separate bin of a single aggregation
+    leading_shape = pressure.shape[:-1]
+    flat_bins = (np.arange(int(np.prod(leading_shape))).reshape(leading_shape + (1,)) * number_of_bins + bins)[valid]
+    size = int(np.prod(leading_shape)) * number_of_bins
+    sums = np.bincount(flat_bins, weights=values[valid], minlength=size)
+    counts = np.bincount(flat_bins, minlength=size)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (sums / counts).reshape(leading_shape + (number_of_bins,))
+
+
+class FrozenProfileCheck(CheckBase):
+    """Check a profile is not a copy of the previous profile, as transmitted by a float with a frozen sensor.
+
+    Both profiles are averaged in bins of pressure, and the profile is frozen if its temperature and salinity
+    differ too little from those of the previous profile in every respect. The binned means of each profile are
+    cached on it, so checking the next profile of a float reuses those of this one.
+    """
+
+    argo_id = 18
+    argo_binary_id = 262144
+    argo_name = "Frozen profile test"
+    nvs_uri = "http://vocab.nerc.ac.uk/collection/R11/current/18/"
+
+    reads = ("PRES", "TEMP", "PSAL")
+    writes = ("PRES", "TEMP", "PSAL")
+
+    # the width (dbar) of the bins in which profiles are averaged
+    bin_width = 50.0
+
+    # upper limits of the mean, maximum, and minimum absolute differences of binned means of frozen profiles
+    limits = {
+        "TEMP": (0.02, 0.3, 0.001),
+        "PSAL": (0.004, 0.3, 0.001),
+    }
+
+    def is_required(self) -> bool:
+        """Return whether there is a previous profile to compare against."""
+        return self._profile_previous is not None
+
+    def run(self) -> CheckOutput:
+        """Check a profile for being frozen, flagging every level if it is."""
+        output = self.create_output()
+        output.ensure_output_for_properties(["PRES", "TEMP", "PSAL"])
+        if self._profile_previous is None:
+            return output
+
+        frozen = np.ones(np.shape(self._profile.get_property_data("PRES"))[:-1], dtype=bool)
+        for property_name, (mean_limit, maximum_limit, minimum_limit) in self.limits.items():
+            current = self.get_bin_means(self._profile, property_name)
+            previous = self.get_bin_means(self._profile_previous, property_name)
+
+            # compare the bins both profiles have values in
+            number_of_bins = min(current.shape[-1], previous.shape[-1])
+            difference = np.abs(current[..., :number_of_bins] - previous[..., :number_of_bins])
+            common = np.isfinite(difference)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                mean = np.sum(np.where(common, difference, 0.0), axis=-1) / np.count_nonzero(common, axis=-1)
+            maximum = np.max(np.where(common, difference, -np.inf), axis=-1, initial=-np.inf)
+            minimum = np.min(np.where(common, difference, np.inf), axis=-1, initial=np.inf)
+
+            frozen &= (mean < mean_limit) & (maximum < maximum_limit) & (minimum < minimum_limit)
+
+        output.set_output_flag_for_properties(
+            ["PRES", "TEMP", "PSAL"],
             ArgoQcFlag.BAD,
-            lower_limit=2.0,
-            upper_limit=41.0,
+            where=frozen[..., np.newaxis] & ~ma.getmaskarray(self._profile.get_property_data("PRES")),
+        )
+
+        return output
+
+    def get_bin_means(self, profile: ProfileBase, property_name: str) -> np.ndarray:
+        """Return the means of a property of a profile in bins of pressure, cached on the profile."""
+        return profile.get_derived_data(
+            f"bin_means_{property_name}_{self.bin_width}",
+            functools.partial(self._compute_bin_means, profile, property_name),
         )
 
+    def _compute_bin_means(self, profile: ProfileBase, property_name: str) -> np.ndarray:
+        """Average a property of a profile in bins of pressure."""
+        return bin_means(profile.get_property_data("PRES"), profile.get_property_data(property_name), self.bin_width)
+
+
+class GreyListCheck(CheckBase):
+    """Check the float of a profile is not on the grey list for a parameter at the date of the profile.
+
+    The grey list is given by the ``ARGORTQCPY_GREYLIST`` environment variable, see :mod:`argortqcpy.greylist`, and
+    the check is only required if there is a grey list and the profile has a platform number and date. Ranges of the
+    grey list whose flag is not an Argo flag are ignored.
+    """
+
+    argo_id = 15
+    argo_binary_id = 32768
+    argo_name = "Grey list test"
+    nvs_uri = "http://vocab.nerc.ac.uk/collection/R11/current/15/"
+
+    streamable = True
+
+    reads = ("PLATFORM_NUMBER", "JULD", "PRES", "TEMP", "PSAL")
+    writes = ("PRES", "TEMP", "PSAL")
+
+    def is_required(self) -> bool:
+        """Return whether there is a grey list and the profile has a platform number and date to be looked up."""
+        return (
+            greylist.get_greylist() is not None
+            and self._profile.has_property("PLATFORM_NUMBER")
+            and self._profile.has_property("JULD")
+        )
+
+    def run(self) -> CheckOutput:
+        """Check a profile for parameters on the grey list, flagging them with the flag given in the list."""
+        grey_list = greylist.get_greylist()
+        if grey_list is None:
+            raise ValueError(f"GreyListCheck: no grey list, see {greylist.GREYLIST_PATH_VARIABLE}.")
+
+        output = self.create_output()
+        platform_numbers = self._profile.get_property_data("PLATFORM_NUMBER")
+        julds = self._profile.get_property_data("JULD")
+
+        for property_name in ["PRES", "TEMP", "PSAL"]:
+            output.ensure_output_for_property(property_name)
+            valid = ~ma.getmaskarray(self._profile.get_property_data(property_name))
+            flag_codes = grey_list.lookup(platform_numbers, property_name, julds)
+
+            for flag_code in np.unique(flag_codes.compressed()):
+                # codes of the grey list which are not Argo flags, such as the unused 6 and 7, are ignored
+                flag = FLAGS_BY_CODE.get(int(flag_code))
+                if flag is None:
+                    continue
+
+                listed = broadcast_to_levels(self._profile, ma.filled(flag_codes == flag_code, False))
+                output.set_output_flag_for_property(property_name, flag, where=valid & listed)
+
         return output
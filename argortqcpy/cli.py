@@ -0,0 +1,101 @@
+"""Command line interface for argortqcpy."""
+
+import argparse
+import contextlib
+import sys
+from typing import Optional, Sequence
+
+from argortqcpy.archive import process_archive
+from argortqcpy.cache import DEFAULT_MAX_BYTES, ResultCache
+
+
+def _process(args: argparse.Namespace) -> int:
+    """Run the default checks over an archive, writing a line per profile, and optionally a Parquet file."""
+    errors = 0
+    results = process_archive(
+        args.paths,
+        workers=args.workers,
+        chunksize=args.chunksize,
+        cache_directory=args.cache,
+        cache_max_bytes=args.cache_max_bytes,
+    )
+
+    with contextlib.ExitStack() as stack:
+        parquet_writer = None
+        if args.parquet is not None:
+            # imported here, as exporting needs pyarrow, which is optional
+            from argortqcpy.export import ParquetResultWriter  # pylint: disable=import-outside-toplevel
+
+            parquet_writer = stack.enter_context(ParquetResultWriter(args.parquet, per_level=args.parquet_levels))
+
+        for result in results:
+            if parquet_writer is not None:
+                parquet_writer.write(result)
+
+            if result.error is not None:
+                errors += 1
+                print(f"{result.path}: {result.error}", file=sys.stderr)
+                continue
+
+            profile_index = "" if result.profile_index is None else result.profile_index
+            print(f"{result.path}\t{profile_index}\t{result.tests_performed}\t{result.tests_failed}")
+
+    return 1 if errors else 0
+
+
+def _cache_clear(args: argparse.Namespace) -> int:
+    """Remove every cached result."""
+    removed = ResultCache(args.directory).clear()
+    print(f"removed {removed} cached results from {args.directory}")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Return the parser for the command line arguments."""
+    parser = argparse.ArgumentParser(prog="argortqcpy", description="Real time QC automated tests for Argo data.")
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.required = True
+
+    process = subparsers.add_parser(
+        "process",
+        help="run the checks over Argo netCDF files",
+        description=(
+            "Run the checks over Argo netCDF files, writing the path, profile index, and bitmasks of the tests "
+            "performed and failed for each profile, tab-separated. Unreadable files are reported on stderr."
+        ),
+    )
+    process.add_argument("paths", nargs="+", help="netCDF files, or directories searched for *_prof.nc and R*.nc")
+    process.add_argument("--workers", type=int, default=None, help="number of worker processes (default: CPUs)")
+    process.add_argument("--chunksize", type=int, default=1, help="number of files sent to a worker at a time")
+    process.add_argument("--cache", help="directory of cached results, so unchanged profiles are not checked again")
+    process.add_argument(
+        "--cache-max-bytes",
+        type=int,
+        default=DEFAULT_MAX_BYTES,
+        help="largest total size of the cached results (default: %(default)s)",
+    )
+    process.add_argument("--parquet", help="Parquet file to which the flags and tests of each profile are exported")
+    process.add_argument(
+        "--parquet-levels",
+        action="store_true",
+        help="export a row for each level of each profile, rather than for each profile",
+    )
+    process.set_defaults(function=_process)
+
+    cache = subparsers.add_parser("cache", help="manage the cache of results")
+    cache_subparsers = cache.add_subparsers(dest="cache_command")
+    cache_subparsers.required = True
+    cache_clear = cache_subparsers.add_parser("clear", help="remove every cached result")
+    cache_clear.add_argument("directory", help="directory of cached results")
+    cache_clear.set_defaults(function=_cache_clear)
+
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Run the command line interface.
+
+    Return: the exit status.
+    """
+    args = build_parser().parse_args(argv)
+    return args.function(args)
@@ -0,0 +1,301 @@
+"""Export the results of checks over an archive to Parquet files, for analysing flags across many profiles.
+
+Results are streamed into Arrow record batches, written to a Parquet file a row group at a time, so only the
+results of a single row group are held in memory however many profiles are exported. Each row is a profile, with
+the flags of each level of a property as a list, or each row is a level of a profile. Flags are dictionary-encoded
+in the files, and the flags of each row are dictionary arrays, their uint8 codes being the indices of the Argo
+flags, so they are scanned as small integers.
+
+Exporting needs pyarrow (``pip install argortqcpy[parquet]``), which is imported when first used.
+"""
+
+from types import ModuleType
+from typing import TYPE_CHECKING, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from numpy import ma
+
+from argortqcpy.checks import FLAG_BYTES
+
+if TYPE_CHECKING:
+    import pyarrow  # pylint: disable=unused-import
+
+    from argortqcpy.archive import ProfileResult
+
+# the properties with flags at each level of a profile, and with a single flag for each profile, which are exported
+LEVEL_PROPERTIES = ("PRES", "TEMP", "PSAL")
+PROFILE_PROPERTIES = ("JULD", "LATITUDE", "LONGITUDE")
+
+# the default number of rows of each row group, with a row for each profile, or for each level of a profile
+DEFAULT_PROFILE_ROW_GROUP_SIZE = 16384
+DEFAULT_LEVEL_ROW_GROUP_SIZE = 1048576
+
+
+class ParquetResultWriter:
+    """A Parquet file of the results of checks, written a row group at a time as results are added.
+
+    The file is completed on leaving the context of the writer.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        per_level: bool = False,
+        row_group_size: Optional[int] = None,
+        compression: str = "zstd",
+    ) -> None:
+        """Open the file to be written.
+
+        Args:
+            path: The Parquet file to be written.
+            per_level: Whether each row is a level of a profile, rather than a profile.
+            row_group_size: Optional number of rows of each row group. Defaults to
+                :data:`DEFAULT_LEVEL_ROW_GROUP_SIZE` rows of levels, or :data:`DEFAULT_PROFILE_ROW_GROUP_SIZE` rows
+                of profiles.
+            compression: The compression of the columns, see :class:`pyarrow.parquet.ParquetWriter`.
+        """
+        _, parquet = _import_pyarrow()
+        if row_group_size is None:
+            row_group_size = DEFAULT_LEVEL_ROW_GROUP_SIZE if per_level else DEFAULT_PROFILE_ROW_GROUP_SIZE
+
+        self._per_level = per_level
+        self._row_group_size = row_group_size
+        self._writer = parquet.ParquetWriter(path, result_schema(per_level), compression=compression)
+        self._results: List["ProfileResult"] = []
+        self._number_of_buffered_rows = 0
+        self._number_of_rows = 0
+
+    @property
+    def number_of_rows(self) -> int:
+        """Return the number of rows written, or to be written, to the file."""
+        return self._number_of_rows + self._number_of_buffered_rows
+
+    def write(self, result: "ProfileResult") -> None:
+        """Add the result of a profile, writing a row group once there are enough rows for one."""
+        self._results.append(result)
+        self._number_of_buffered_rows += _count_rows(result) if self._per_level else 1
+        if self._number_of_buffered_rows >= self._row_group_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write the results added since the last row group as a row group."""
+        if not self._results:
+            return
+
+        pyarrow, _ = _import_pyarrow()
+        batch = record_batch(self._results, per_level=self._per_level)
+        self._writer.write_table(pyarrow.Table.from_batches([batch]), row_group_size=batch.num_rows)
+        self._number_of_rows += batch.num_rows
+        self._results = []
+        self._number_of_buffered_rows = 0
+
+    def close(self) -> None:
+        """Write any remaining results and complete the file."""
+        try:
+            self.flush()
+        finally:
+            self._writer.close()
+
+    def __enter__(self) -> "ParquetResultWriter":
+        """Use the writer as a context manager, closing it on exit."""
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        """Close the writer on leaving the context."""
+        self.close()
+
+
+def write_parquet(
+    results: Iterable["ProfileResult"],
+    path: str,
+    per_level: bool = False,
+    row_group_size: Optional[int] = None,
+    compression: str = "zstd",
+) -> int:
+    """Write results of checks, e.g. as streamed by :func:`argortqcpy.archive.process_archive`, to a Parquet file.
+
+    Args:
+        results: The result of each profile.
+        path: The Parquet file to be written.
+        per_level: Whether each row is a level of a profile, rather than a profile.
+        row_group_size: Optional number of rows of each row group, see :class:`ParquetResultWriter`.
+        compression: The compression of the columns, see :class:`pyarrow.parquet.ParquetWriter`.
+
+    Return: the number of rows written.
+    """
+    with ParquetResultWriter(
+        path,
+        per_level=per_level,
+        row_group_size=row_group_size,
+        compression=compression,
+    ) as writer:
+        for result in results:
+            writer.write(result)
+
+    return writer.number_of_rows
+
+
+def result_schema(per_level: bool = False) -> "pyarrow.Schema":
+    """Return the schema of the results of checks, with a row for each profile, or for each level of a profile.
+
+    Each row has the path and profile index of the profile, the ``argo_binary_id`` bitmasks of the tests performed
+    and failed, and any error processing the file, then the flags of each property (``<PARAM>_QC``). With a row for
+    each profile the flags of the levels are lists of strings, as lists of dictionary arrays cannot be read from
+    more than one row group, and with a row for each level the row has the level index and the flags of the profile
+    are repeated on each level. Flags the checks did not set are null.
+    """
+    pyarrow, _ = _import_pyarrow()
+    flag_type = pyarrow.dictionary(pyarrow.int8(), pyarrow.string())
+    level_flag_type = flag_type if per_level else pyarrow.list_(pyarrow.string())
+
+    fields = [
+        pyarrow.field("path", pyarrow.dictionary(pyarrow.int32(), pyarrow.string()), nullable=False),
+        pyarrow.field("profile_index", pyarrow.int32()),
+    ]
+    if per_level:
+        fields.append(pyarrow.field("level", pyarrow.int32()))
+    fields.extend(
+        [
+            pyarrow.field("tests_performed", pyarrow.int64(), nullable=False),
+            pyarrow.field("tests_failed", pyarrow.int64(), nullable=False),
+            pyarrow.field("error", pyarrow.string()),
+        ]
+    )
+    fields.extend(pyarrow.field(f"{property_name}_QC", level_flag_type) for property_name in LEVEL_PROPERTIES)
+    fields.extend(pyarrow.field(f"{property_name}_QC", flag_type) for property_name in PROFILE_PROPERTIES)
+
+    return pyarrow.schema(fields)
+
+
+def record_batch(results: Sequence["ProfileResult"], per_level: bool = False) -> "pyarrow.RecordBatch":
+    """Return a record batch of results of checks, see :func:`result_schema`.
+
+    Args:
+        results: The result of each profile.
+        per_level: Whether each row is a level of a profile, rather than a profile.
+    """
+    pyarrow, _ = _import_pyarrow()
+    schema = result_schema(per_level)
+
+    # each result is a row, or a row for each of its levels, a result without levels having a row of no level
+    rows = np.array([_count_rows(result) if per_level else 1 for result in results], dtype=np.intp)
+    result_rows = np.repeat(np.arange(len(results)), rows)
+
+    paths = sorted({result.path for result in results})
+    path_indices = np.searchsorted(paths, [result.path for result in results]).astype(np.int32)
+    profile_indices = np.array([-1 if result.profile_index is None else result.profile_index for result in results])
+
+    columns = [
+        pyarrow.DictionaryArray.from_arrays(path_indices[result_rows], pyarrow.array(paths, type=pyarrow.string())),
+        pyarrow.array(profile_indices[result_rows], type=pyarrow.int32(), mask=profile_indices[result_rows] < 0),
+    ]
+    if per_level:
+        levels = np.arange(result_rows.size) - np.repeat(np.cumsum(rows) - rows, rows)
+        no_level = np.repeat([_count_levels(result) == 0 for result in results], rows)
+        columns.append(pyarrow.array(levels, type=pyarrow.int32(), mask=no_level))
+    columns.extend(
+        [
+            pyarrow.array(np.array([result.tests_performed for result in results], dtype=np.int64)[result_rows]),
+            pyarrow.array(np.array([result.tests_failed for result in results], dtype=np.int64)[result_rows]),
+            pyarrow.array([result.error for result in results], type=pyarrow.string()).take(result_rows),
+        ]
+    )
+
+    for property_name in LEVEL_PROPERTIES:
+        codes, valid = _level_codes(results, property_name, rows if per_level else None)
+        flags = _flag_array(pyarrow, codes, valid)
+        if not per_level:
+            flags = _flag_lists(pyarrow, results, property_name, flags)
+        columns.append(flags)
+
+    for property_name in PROFILE_PROPERTIES:
+        codes, valid = _profile_codes(results, property_name)
+        columns.append(_flag_array(pyarrow, codes[result_rows], valid[result_rows]))
+
+    return pyarrow.RecordBatch.from_arrays(columns, schema=schema)
+
+
+def _count_levels(result: "ProfileResult") -> int:
+    """Return the number of levels of a result, the greatest number of flags of a property with levels."""
+    return max((np.size(result.flags[name]) for name in LEVEL_PROPERTIES if name in result.flags), default=0)
+
+
+def _count_rows(result: "ProfileResult") -> int:
+    """Return the number of rows of a result with a row for each level, a result without levels having one."""
+    return max(_count_levels(result), 1)
+
+
+def _level_codes(
+    results: Sequence["ProfileResult"],
+    property_name: str,
+    rows: Optional[np.ndarray],
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Return the flag codes of a property with levels, and whether each was set, of every result in turn.
+
+    With the number of rows of each result, its flags are padded to its rows, and otherwise only the flags of the
+    results with flags for the property are given. Flags of missing values, such as padding levels, are not set.
+    """
+    codes = []
+    valid = []
+    for index, result in enumerate(results):
+        result_flags = ma.ravel(result.flags[property_name]) if property_name in result.flags else ma.zeros(0)
+        number_of_rows = result_flags.size if rows is None else rows[index]
+        codes.append(np.resize(ma.getdata(result_flags).astype(np.int8), number_of_rows))
+        result_valid = np.zeros(number_of_rows, dtype=bool)
+        result_valid[: result_flags.size] = ~ma.getmaskarray(result_flags)
+        valid.append(result_valid)
+
+    return np.concatenate(codes or [np.zeros(0, dtype=np.int8)]), np.concatenate(valid or [np.zeros(0, dtype=bool)])
+
+
+def _profile_codes(results: Sequence["ProfileResult"], property_name: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Return the flag code of a property with a single value for each profile, and whether it was set.
+
+    The flag of a missing value is not set.
+    """
+    codes = np.zeros(len(results), dtype=np.int8)
+    valid = np.zeros(len(results), dtype=bool)
+    for index, result in enumerate(results):
+        if property_name in result.flags and np.size(result.flags[property_name]) == 1:
+            codes[index] = ma.getdata(result.flags[property_name]).ravel()[0]
+            valid[index] = not ma.getmaskarray(result.flags[property_name]).ravel()[0]
+
+    return codes, valid
+
+
+def _flag_array(pyarrow: ModuleType, codes: np.ndarray, valid: np.ndarray) -> "pyarrow.DictionaryArray":
+    """Return flag codes as an array of Argo flags, encoded by their codes, null where they were not set."""
+    return pyarrow.DictionaryArray.from_arrays(
+        pyarrow.array(codes, type=pyarrow.int8(), mask=~valid),
+        pyarrow.array([flag.decode() for flag in FLAG_BYTES], type=pyarrow.string()),
+    )
+
+
+def _flag_lists(
+    pyarrow: ModuleType,
+    results: Sequence["ProfileResult"],
+    property_name: str,
+    flags: "pyarrow.DictionaryArray",
+) -> "pyarrow.ListArray":
+    """Return the flags of the levels of each result as a list, null for results without flags for the property."""
+    has_flags = np.array([property_name in result.flags for result in results], dtype=bool)
+    sizes = np.array([np.size(result.flags.get(property_name, ())) for result in results], dtype=np.int32)
+    offsets = np.concatenate([[0], np.cumsum(sizes)]).astype(np.int32)
+
+    return pyarrow.ListArray.from_arrays(
+        pyarrow.array(offsets, type=pyarrow.int32(), mask=np.append(~has_flags, False)),
+        flags.dictionary_decode(),
+    )
+
+
+def _import_pyarrow() -> Tuple[ModuleType, ModuleType]:
+    """Import pyarrow, and its Parquet module, which are optional."""
+    try:
+        import pyarrow  # pylint: disable=import-outside-toplevel,redefined-outer-name
+        import pyarrow.parquet  # pylint: disable=import-outside-toplevel
+    except ImportError as error:
+        raise ImportError(
+            "argortqcpy.export: exporting needs pyarrow, installed with pip install argortqcpy[parquet]."
+        ) from error
+
+    return pyarrow, pyarrow.parquet
@@ -0,0 +1,152 @@
+"""Look up the Argo grey list of floats whose sensors are suspect.
+
+The grey list (``ar_greylist.txt`` on the GDAC) is a CSV file of platforms, parameters, date ranges, and the flag
+to be given to data in them. It is parsed once into an index keyed by platform number, with the date ranges of
+each platform and parameter held as arrays sorted by their start, so a lookup is a hash and a binary search. The
+file is parsed again if it changes.
+
+The grey list used by the checks is given by the ``ARGORTQCPY_GREYLIST`` environment variable.
+"""
+
+import csv
+import datetime
+import functools
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from numpy import ma
+
+# the environment variable giving the path of the grey list used by the checks
+GREYLIST_PATH_VARIABLE = "ARGORTQCPY_GREYLIST"
+
+# the reference date of Argo JULD dates, in days since it
+JULD_REFERENCE = datetime.date(1950, 1, 1)
+
+# the date ranges of a platform and parameter: sorted starts, ends (exclusive), and flag codes
+GreyListRanges = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+def date_to_juld(date: str) -> float:
+    """Return the JULD (days since 1950-01-01) of the start of a ``YYYYMMDD`` date."""
+    return float((datetime.datetime.strptime(date, "%Y%m%d").date() - JULD_REFERENCE).days)
+
+
+def parse_greylist(path: str) -> Dict[str, Dict[str, GreyListRanges]]:
+    """Parse a grey list file into date ranges for each platform and parameter.
+
+    Return: for each platform number, for each parameter, the arrays of starts and (exclusive) ends, as JULD, and
+    flag codes of its ranges, sorted by their start. Ranges with no end date have no end.
+    """
+    entries: Dict[str, Dict[str, List[Tuple[float, float, int]]]] = {}
+    with open(path, newline="") as file:
+        for row in csv.DictReader(file):
+            end_date = (row["END_DATE"] or "").strip()
+            platform_entries = entries.setdefault(row["PLATFORM_CODE"].strip(), {})
+            platform_entries.setdefault(row["PARAMETER_NAME"].strip(), []).append(
+                (
+                    date_to_juld(row["START_DATE"].strip()),
+                    # the end date is the last day of the range
+                    date_to_juld(end_date) + 1.0 if end_date else np.inf,
+                    int(row["QUALITY_CODE"]),
+                )
+            )
+
+    index: Dict[str, Dict[str, GreyListRanges]] = {}
+    for platform_number, parameters in entries.items():
+        index[platform_number] = {}
+        for parameter, ranges in parameters.items():
+            starts, ends, flags = zip(*sorted(ranges))
+            index[platform_number][parameter] = (np.array(starts), np.array(ends), np.array(flags, dtype=np.uint8))
+
+    return index
+
+
+class GreyList:
+    """An index of a grey list file, parsed again whenever the file is modified."""
+
+    def __init__(self, path: str) -> None:
+        """Parse the grey list file."""
+        self._path = path
+        self._modified: Optional[int] = None
+        self._index: Dict[str, Dict[str, GreyListRanges]] = {}
+        self.reload_if_modified()
+
+    @property
+    def path(self) -> str:
+        """Return the path of the grey list file."""
+        return self._path
+
+    def reload_if_modified(self) -> None:
+        """Parse the file again if it has been modified since it was last parsed."""
+        modified = os.stat(self._path).st_mtime_ns
+        if modified != self._modified:
+            self._index = parse_greylist(self._path)
+            self._modified = modified
+
+    def lookup(self, platform_numbers: np.ndarray, parameter: str, julds: np.ndarray) -> ma.MaskedArray:
+        """Return the grey list flag of each profile for a parameter, masked for profiles which are not listed.
+
+        Where ranges overlap, the largest flag code of the ranges is given.
+
+        Args:
+            platform_numbers: Array of the platform number of each profile, as strings or byte strings.
+            parameter: The parameter, e.g. ``"TEMP"``.
+            julds: Array of the date of each profile (JULD), broadcasting against the platform numbers. Profiles
+                with missing dates are not listed.
+        """
+        platform_numbers = np.asarray(ma.filled(platform_numbers, ""))
+        # platform numbers read from netCDF files, or stacked into batches, may be padded byte strings
+        if platform_numbers.dtype.kind == "S":
+            platform_numbers = np.char.decode(platform_numbers, "ascii", "replace")
+        platform_numbers, julds = np.broadcast_arrays(
+            np.char.strip(platform_numbers.astype(str)),
+            np.asarray(ma.filled(ma.asarray(julds, dtype=float), np.nan)),
+        )
+        shape = platform_numbers.shape
+        platform_numbers = platform_numbers.ravel()
+        julds = julds.ravel()
+        flags = np.zeros(platform_numbers.shape, dtype=np.uint8)
+        listed = np.zeros(platform_numbers.shape, dtype=bool)
+
+        # profiles of a batch are mostly from a few platforms, each looked up once
+        for platform_number in np.unique(platform_numbers):
+            ranges = self._index.get(str(platform_number), {}).get(parameter)
+            if ranges is None:
+                continue
+
+            starts, ends, range_flags = ranges
+            profiles = np.flatnonzero(platform_numbers == platform_number)
+            dates = julds[profiles, np.newaxis]
+
+            # only the ranges starting on or before a date can contain it
+            number_started = np.searchsorted(starts, dates, side="right")
+            in_range = (np.arange(starts.size) < number_started) & (ends > dates)
+            flags[profiles] = np.max(np.where(in_range, range_flags, 0), axis=-1)
+            listed[profiles] = np.any(in_range, axis=-1)
+
+        return ma.masked_array(flags.reshape(shape), mask=~listed.reshape(shape))
+
+
+def get_greylist(path: Optional[str] = None) -> Optional[GreyList]:
+    """Return the grey list shared by the checks of this process, or ``None`` if there is none.
+
+    The file is parsed again if it has been modified since it was last parsed.
+
+    Args:
+        path: Optional path of the grey list. Defaults to the path given by the ``ARGORTQCPY_GREYLIST`` environment
+            variable.
+    """
+    path = path or os.environ.get(GREYLIST_PATH_VARIABLE)
+    if not path:
+        return None
+
+    greylist = _open_greylist(os.path.abspath(path))
+    greylist.reload_if_modified()
+    return greylist
+
+
+@functools.lru_cache(maxsize=None)
+def _open_greylist(path: str) -> GreyList:
+    """Parse each grey list file once per process."""
+    return GreyList(path)
@@ -0,0 +1,154 @@
+"""Collect timings and counters of checks and profile reads.
+
+Instrumentation is opt-in: while an :class:`Instrumentation` is active, every run of a check and every read of
+profile property data is recorded in it. When none is active, the only cost is a single check of whether any is.
+"""
+
+import threading
+from typing import Dict, List, Optional, Tuple
+
+_active: List["Instrumentation"] = []
+
+
+def is_enabled() -> bool:
+    """Return whether any instrumentation is active."""
+    return bool(_active)
+
+
+def record_check(  # pylint: disable=too-many-arguments
+    name: str,
+    argo_id: Optional[int],
+    argo_name: Optional[str],
+    seconds: float,
+    levels: int,
+    flag_counts: Dict[str, int],
+) -> None:
+    """Record a run of a check in all active instrumentation."""
+    for instrumentation in list(_active):
+        instrumentation.add_check_run(name, argo_id, argo_name, seconds, levels, flag_counts)
+
+
+def record_property_read(property_name: str, seconds: float) -> None:
+    """Record a read of property data in all active instrumentation."""
+    for instrumentation in list(_active):
+        instrumentation.add_property_read(property_name, seconds)
+
+
+class Instrumentation:
+    """Aggregated statistics of the checks run and property data read while the instrumentation is active.
+
+    Use as a context manager::
+
+        with Instrumentation() as instrumentation:
+            pipeline.run(profile)
+
+        print(instrumentation.to_prometheus())
+    """
+
+    def __init__(self) -> None:
+        """Initialise empty statistics."""
+        self._lock = threading.Lock()
+        self._checks: Dict[str, Dict[str, object]] = {}
+        self._property_reads: Dict[str, Dict[str, float]] = {}
+
+    def __enter__(self) -> "Instrumentation":
+        """Start recording."""
+        _active.append(self)
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        """Stop recording."""
+        _active.remove(self)
+
+    def add_check_run(  # pylint: disable=too-many-arguments
+        self,
+        name: str,
+        argo_id: Optional[int],
+        argo_name: Optional[str],
+        seconds: float,
+        levels: int,
+        flag_counts: Dict[str, int],
+    ) -> None:
+        """Add a run of a check to the statistics."""
+        with self._lock:
+            stats = self._checks.setdefault(
+                name,
+                {"argo_id": argo_id, "argo_name": argo_name, "calls": 0, "seconds": 0.0, "levels": 0, "flags": {}},
+            )
+            stats["calls"] += 1  # type: ignore
+            stats["seconds"] += seconds  # type: ignore
+            stats["levels"] += levels  # type: ignore
+            flags: Dict[str, int] = stats["flags"]  # type: ignore
+            for flag_name, count in flag_counts.items():
+                flags[flag_name] = flags.get(flag_name, 0) + count
+
+    def add_property_read(self, property_name: str, seconds: float) -> None:
+        """Add a read of property data to the statistics."""
+        with self._lock:
+            stats = self._property_reads.setdefault(property_name, {"calls": 0, "seconds": 0.0})
+            stats["calls"] += 1
+            stats["seconds"] += seconds
+
+    def as_dict(self) -> Dict[str, Dict[str, Dict[str, object]]]:
+        """Return the statistics, for each check by class name and for each property read by property name."""
+        with self._lock:
+            checks: Dict[str, Dict[str, object]] = {}
+            for name, stats in self._checks.items():
+                checks[name] = dict(stats, flags=dict(stats["flags"]))  # type: ignore
+            property_reads = {name: dict(stats) for name, stats in self._property_reads.items()}
+
+        return {"checks": checks, "property_reads": property_reads}  # type: ignore
+
+    def to_prometheus(self) -> str:
+        """Return the statistics in the Prometheus text exposition format."""
+        stats = self.as_dict()
+        lines: List[str] = []
+
+        def add_metric(name: str, description: str, samples: List[Tuple[Dict[str, object], object]]) -> None:
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} counter")
+            for labels, value in samples:
+                label_text = ",".join(f'{label}="{_escape(str(label_value))}"' for label, label_value in labels.items())
+                lines.append(f"{name}{{{label_text}}} {value}")
+
+        check_labels = {
+            name: {"check": name, "argo_id": check["argo_id"], "argo_name": check["argo_name"]}
+            for name, check in stats["checks"].items()
+        }
+        for metric, key, description in (
+            ("argortqcpy_check_runs_total", "calls", "Number of runs of each check."),
+            ("argortqcpy_check_seconds_total", "seconds", "Wall time spent running each check."),
+            ("argortqcpy_check_levels_total", "levels", "Number of levels processed by each check."),
+        ):
+            add_metric(
+                metric,
+                description,
+                [(check_labels[name], check[key]) for name, check in stats["checks"].items()],
+            )
+
+        add_metric(
+            "argortqcpy_check_flags_total",
+            "Number of values each flag has been set on by each check.",
+            [
+                (dict(check_labels[name], flag=flag_name), count)
+                for name, check in stats["checks"].items()
+                for flag_name, count in check["flags"].items()  # type: ignore
+            ],
+        )
+
+        for metric, key, description in (
+            ("argortqcpy_property_reads_total", "calls", "Number of reads of each property from profiles."),
+            ("argortqcpy_property_read_seconds_total", "seconds", "Wall time spent reading each property."),
+        ):
+            add_metric(
+                metric,
+                description,
+                [({"property": name}, read[key]) for name, read in stats["property_reads"].items()],
+            )
+
+        return "\n".join(lines) + "\n"
+
+
+def _escape(label_value: str) -> str:
+    """Escape a Prometheus label value."""
+    return label_value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
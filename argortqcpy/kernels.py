@@ -0,0 +1,327 @@
+"""Kernels of the inner loops of the checks, with a NumPy backend and an optional numba backend.
+
+The NumPy backend evaluates each kernel as a sequence of whole-array operations, each allocating its result. The
+numba backend compiles each kernel to a single loop over the values, allocating only the results, and needs numba
+to be installed. Both backends give identical results.
+
+The backend is selected on first use by the ``ARGORTQCPY_KERNELS`` environment variable, ``numpy`` (the default),
+``numba``, or ``auto`` for numba where it is installed, and can be changed at any time with :func:`set_backend`.
+numba is only imported when its backend is selected.
+"""
+
+import importlib.util
+import os
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+
+# the environment variable selecting the kernel backend
+KERNELS_VARIABLE = "ARGORTQCPY_KERNELS"
+
+# the backend used unless another is selected
+DEFAULT_BACKEND = "numpy"
+
+
+class KernelBackend(NamedTuple):
+    """The implementation of each kernel of a backend, see the NumPy implementations for their arguments."""
+
+    name: str
+    pressure_not_increasing: Callable[
+        [np.ndarray, np.ndarray, Union[float, np.ndarray], Union[float, np.ndarray]],
+        Tuple[np.ndarray, np.ndarray, np.ndarray],
+    ]
+    three_point_stencil: Callable[[np.ndarray, np.ndarray], Tuple[np.ndarray, np.ndarray, np.ndarray]]
+    merge_codes: Callable[[np.ndarray, Union[int, np.ndarray], Optional[np.ndarray], np.ndarray, int], np.ndarray]
+
+
+_selected: List[KernelBackend] = []
+
+
+def get_backend() -> KernelBackend:
+    """Return the selected kernel backend, selecting it from the ``ARGORTQCPY_KERNELS`` variable on first use."""
+    if not _selected:
+        set_backend(os.environ.get(KERNELS_VARIABLE) or DEFAULT_BACKEND)
+
+    return _selected[0]
+
+
+def set_backend(name: str) -> KernelBackend:
+    """Select the kernel backend used by the checks.
+
+    Args:
+        name: ``numpy``, ``numba``, or ``auto`` for numba where it is installed and NumPy otherwise.
+
+    Return: the backend selected.
+    """
+    if name == "auto":
+        name = "numba" if importlib.util.find_spec("numba") is not None else "numpy"
+    if name not in _BACKENDS:
+        raise ValueError(f"set_backend: unknown kernel backend {name!r}, expected one of {sorted(_BACKENDS)}.")
+
+    _selected[:] = [_BACKENDS[name]()]
+    return _selected[0]
+
+
+def neighbour_indices(valid: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Return the indices of the previous and next valid neighbours of each level along the last axis.
+
+    Args:
+        valid: Boolean array, ``True`` where values may be used.
+
+    Return: the indices of the previous neighbours, -1 where there is none, and of the next neighbours, the number
+        of levels where there is none.
+    """
+    number_of_levels = valid.shape[-1]
+    index = np.arange(number_of_levels)
+
+    # the index of the last valid value at or before each level, and of the first valid value at or after
+    last_valid = np.maximum.accumulate(np.where(valid, index, -1), axis=-1)
+    first_valid = np.flip(np.minimum.accumulate(np.flip(np.where(valid, index, number_of_levels), -1), axis=-1), -1)
+
+    previous_index = np.concatenate([np.full(last_valid.shape[:-1] + (1,), -1), last_valid[..., :-1]], axis=-1)
+    next_index = np.concatenate(
+        [first_valid[..., 1:], np.full(first_valid.shape[:-1] + (1,), number_of_levels)],
+        axis=-1,
+    )
+    return previous_index, next_index
+
+
+def take_neighbours(values: np.ndarray, neighbour_index: np.ndarray) -> np.ndarray:
+    """Return the values at the given neighbour indices, which are undefined where there is no neighbour."""
+    return np.take_along_axis(values, np.clip(neighbour_index, 0, max(values.shape[-1] - 1, 0)), axis=-1)
+
+
+def pressure_not_increasing(
+    pressure: np.ndarray,
+    valid: np.ndarray,
+    previous_pressure: Union[float, np.ndarray],
+    previous_maximum: Union[float, np.ndarray],
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Find the valid pressures which are not greater than the one before, or than every one before.
+
+    Args:
+        pressure: Array of pressures with levels along the last axis, ``-inf`` where missing.
+        valid: Boolean array, ``True`` where pressures are not missing.
+        previous_pressure: The last pressure before the levels, broadcasting against the first level.
+        previous_maximum: The greatest pressure before the levels, broadcasting against the first level.
+
+    Return: a boolean array which is ``True`` where pressures are not increasing, and the last pressure and the
+        greatest pressure, up to and including the last level, with a single level along the last axis.
+    """
+    with np.errstate(invalid="ignore"):
+        # with no previous levels, this ensures the first measurement always passes
+        diff = np.diff(pressure, prepend=previous_pressure)
+        not_increasing = (diff <= 0.0) & valid
+
+        # a constant running maximum means a pressure below the last greatest one
+        running_maximum = np.maximum(np.maximum.accumulate(pressure, axis=-1), previous_maximum)
+        not_increasing |= (np.diff(running_maximum, prepend=previous_maximum) == 0.0) & valid
+
+    return not_increasing, pressure[..., -1:], running_maximum[..., -1:]
+
+
+def three_point_stencil(values: np.ndarray, valid: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return the previous and next valid neighbours of each value along the last axis, skipping invalid values.
+
+    Args:
+        values: Array of values with levels along the last axis.
+        valid: Boolean array, ``True`` where values may be used.
+
+    Return: the previous neighbours, next neighbours, and a boolean array which is ``True`` where a value is valid
+        and has valid neighbours on both sides. Where there is no neighbour, the first or last value is given.
+    """
+    previous_index, next_index = neighbour_indices(valid)
+    has_neighbours = valid & (previous_index >= 0) & (next_index < values.shape[-1])
+
+    return take_neighbours(values, previous_index), take_neighbours(values, next_index), has_neighbours
+
+
+def merge_codes(
+    codes: np.ndarray,
+    new: Union[int, np.ndarray],
+    where: Optional[np.ndarray],
+    table: np.ndarray,
+    number_of_profiles: int = 1,
+) -> np.ndarray:
+    """Merge new flag codes over existing ones in place, accounting for precedence.
+
+    Args:
+        codes: Array of existing flag codes, changed in place.
+        new: A single flag code, or an array of flag codes broadcasting against the existing codes.
+        where: Optional boolean array, broadcasting against the existing codes, restricting the codes merged.
+        table: The code resulting from each new (row) and existing (column) code.
+        number_of_profiles: The number of profiles along the first axis of the codes, such as those of a batch, or
+            1 for the codes of a single profile.
+
+    Return: the number of values of each profile each code was merged on, indexed by profile and code.
+    """
+    new = np.broadcast_to(np.asarray(new, dtype=np.uint8), codes.shape)
+    where = np.ones(codes.shape, dtype=bool) if where is None else np.broadcast_to(where, codes.shape)
+    selected = new[where]
+    codes[where] = table[selected, codes[where]]
+    if number_of_profiles == 1:
+        return np.bincount(selected, minlength=table.shape[0])[np.newaxis]
+
+    profiles = np.arange(number_of_profiles).reshape((-1,) + (1,) * (codes.ndim - 1))
+    numbers_merged = np.bincount(
+        np.broadcast_to(profiles, codes.shape)[where] * table.shape[0] + selected,
+        minlength=number_of_profiles * table.shape[0],
+    )
+    return numbers_merged.reshape(number_of_profiles, table.shape[0])
+
+
+def _numpy_backend() -> KernelBackend:
+    """Return the NumPy backend."""
+    return KernelBackend("numpy", pressure_not_increasing, three_point_stencil, merge_codes)
+
+
+def _pressure_not_increasing_loop(  # pragma: no cover
+    pressure: np.ndarray,
+    valid: np.ndarray,
+    previous_pressure: np.ndarray,
+    previous_maximum: np.ndarray,
+    not_increasing: np.ndarray,
+    last_maximum: np.ndarray,
+) -> None:
+    """Find the pressures not increasing along each row, as a single loop, see :func:`pressure_not_increasing`."""
+    for row in range(pressure.shape[0]):
+        last_pressure = previous_pressure[row]
+        maximum = previous_maximum[row]
+        for level in range(pressure.shape[1]):
+            value = pressure[row, level]
+            # the running maximum is NaN from the first NaN, as with np.maximum
+            if np.isnan(value) or np.isnan(maximum):
+                next_maximum = np.nan
+            else:
+                next_maximum = max(value, maximum)
+            not_increasing[row, level] = valid[row, level] and (
+                value - last_pressure <= 0.0 or next_maximum - maximum == 0.0
+            )
+            last_pressure = value
+            maximum = next_maximum
+        last_maximum[row] = maximum
+
+
+def _three_point_stencil_loop(  # pragma: no cover
+    values: np.ndarray,
+    valid: np.ndarray,
+    previous_values: np.ndarray,
+    next_values: np.ndarray,
+    has_neighbours: np.ndarray,
+) -> None:
+    """Find the valid neighbours of each value along each row, as a single loop, see :func:`three_point_stencil`."""
+    number_of_levels = values.shape[1]
+    for row in range(values.shape[0]):
+        previous_index = -1
+        for level in range(number_of_levels):
+            previous_values[row, level] = values[row, max(previous_index, 0)]
+            has_neighbours[row, level] = valid[row, level] and previous_index >= 0
+            if valid[row, level]:
+                previous_index = level
+
+        next_index = number_of_levels
+        for level in range(number_of_levels - 1, -1, -1):
+            next_values[row, level] = values[row, min(next_index, number_of_levels - 1)]
+            has_neighbours[row, level] = has_neighbours[row, level] and next_index < number_of_levels
+            if valid[row, level]:
+                next_index = level
+
+
+def _merge_codes_loop(  # pragma: no cover
+    codes: np.ndarray,
+    new: np.ndarray,
+    where: np.ndarray,
+    table: np.ndarray,
+    numbers_merged: np.ndarray,
+) -> None:
+    """Merge new flag codes over the existing codes of each profile, as a single loop, see :func:`merge_codes`."""
+    for row in range(codes.shape[0]):
+        for level in range(codes.shape[1]):
+            if where[row, level]:
+                code = new[row, level]
+                numbers_merged[row, code] += 1
+                codes[row, level] = table[code, codes[row, level]]
+
+
+def _as_rows(values: np.ndarray, shape: Tuple[int, ...], number_of_rows: Optional[int] = None) -> np.ndarray:
+    """Return values broadcast to a shape, as 2-D rows, without copying where possible.
+
+    The rows are of the levels along the last axis, or are the given number of rows along the first axis.
+    """
+    if values.shape != shape:
+        values = np.broadcast_to(values, shape)
+    if number_of_rows is None:
+        number_of_rows = int(np.prod(shape[:-1], dtype=np.intp))
+    size = int(np.prod(shape, dtype=np.intp))
+    return values.reshape(number_of_rows, size // number_of_rows if number_of_rows else 0)
+
+
+def _numba_backend() -> KernelBackend:
+    """Return the numba backend, compiling its kernels, or loading them from numba's cache."""
+    import numba  # pylint: disable=import-outside-toplevel
+
+    pressure_loop = numba.njit(cache=True, nogil=True)(_pressure_not_increasing_loop)
+    stencil_loop = numba.njit(cache=True, nogil=True)(_three_point_stencil_loop)
+    merge_loop = numba.njit(cache=True, nogil=True)(_merge_codes_loop)
+
+    def numba_pressure_not_increasing(
+        pressure: np.ndarray,
+        valid: np.ndarray,
+        previous_pressure: Union[float, np.ndarray],
+        previous_maximum: Union[float, np.ndarray],
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        pressure = np.asarray(pressure, dtype=float)
+        shape = pressure.shape
+        rows_shape = shape[:-1] + (1,)
+        not_increasing = np.empty(shape, dtype=bool)
+        last_maximum = np.empty(rows_shape)
+        pressure_loop(
+            _as_rows(pressure, shape),
+            _as_rows(valid, shape),
+            _as_rows(np.asarray(previous_pressure, dtype=float), rows_shape)[:, 0],
+            _as_rows(np.asarray(previous_maximum, dtype=float), rows_shape)[:, 0],
+            _as_rows(not_increasing, shape),
+            _as_rows(last_maximum, rows_shape)[:, 0],
+        )
+        return not_increasing, pressure[..., -1:], last_maximum
+
+    def numba_three_point_stencil(values: np.ndarray, valid: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        shape = values.shape
+        previous_values = np.empty(shape, dtype=values.dtype)
+        next_values = np.empty(shape, dtype=values.dtype)
+        has_neighbours = np.empty(shape, dtype=bool)
+        stencil_loop(
+            _as_rows(values, shape),
+            _as_rows(valid, shape),
+            _as_rows(previous_values, shape),
+            _as_rows(next_values, shape),
+            _as_rows(has_neighbours, shape),
+        )
+        return previous_values, next_values, has_neighbours
+
+    def numba_merge_codes(
+        codes: np.ndarray,
+        new: Union[int, np.ndarray],
+        where: Optional[np.ndarray],
+        table: np.ndarray,
+        number_of_profiles: int = 1,
+    ) -> np.ndarray:
+        # codes which cannot be viewed as rows without copying them are merged by NumPy
+        if not codes.flags.c_contiguous:
+            return merge_codes(codes, new, where, table, number_of_profiles)
+
+        shape = codes.shape
+        numbers_merged = np.zeros((number_of_profiles, table.shape[0]), dtype=np.intp)
+        merge_loop(
+            _as_rows(codes, shape, number_of_profiles),
+            _as_rows(np.asarray(new, dtype=np.uint8), shape, number_of_profiles),
+            _as_rows(np.asarray(True if where is None else where, dtype=bool), shape, number_of_profiles),
+            table,
+            numbers_merged,
+        )
+        return numbers_merged
+
+    return KernelBackend("numba", numba_pressure_not_increasing, numba_three_point_stencil, numba_merge_codes)
+
+
+_BACKENDS: Dict[str, Callable[[], KernelBackend]] = {"numpy": _numpy_backend, "numba": _numba_backend}
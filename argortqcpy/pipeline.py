@@ -0,0 +1,238 @@
+"""Run sequences of Argo checks on profiles."""
+
+from typing import List, NamedTuple, Optional, Sequence, Type
+
+import numpy as np
+
+from argortqcpy.cache import ResultCache
+from argortqcpy.checks import (
+    FLAG_CODES,
+    ArgoQcFlag,
+    CheckBase,
+    CheckOutput,
+    CompactFlags,
+    DeepestPressureCheck,
+    DensityInversionCheck,
+    FrozenProfileCheck,
+    GlobalRangeCheck,
+    GradientCheck,
+    GreyListCheck,
+    ImpossibleDateCheck,
+    ImpossibleLocationCheck,
+    ImpossibleSpeedCheck,
+    PositionOnLandCheck,
+    PressureIncreasingCheck,
+    RegionalRangeCheck,
+    SpikeCheck,
+    StuckValueCheck,
+)
+from argortqcpy.profile import ProfileBase, ProfileBatch
+from argortqcpy.trajectory import TRAJECTORY_PROPERTIES
+
+# the checks run by default, in the order of the Argo real time QC tests
+DEFAULT_CHECKS: Sequence[Type[CheckBase]] = (
+    ImpossibleDateCheck,
+    ImpossibleLocationCheck,
+    PositionOnLandCheck,
+    ImpossibleSpeedCheck,
+    GlobalRangeCheck,
+    RegionalRangeCheck,
+    PressureIncreasingCheck,
+    SpikeCheck,
+    GradientCheck,
+    StuckValueCheck,
+    DensityInversionCheck,
+    GreyListCheck,
+    FrozenProfileCheck,
+    DeepestPressureCheck,
+)
+
+# the checks of the trajectories of floats, which can be run on every cycle of a float at once
+TRAJECTORY_CHECKS: Sequence[Type[CheckBase]] = (ImpossibleDateCheck, ImpossibleLocationCheck, ImpossibleSpeedCheck)
+
+# flags which mean a check has failed for the values they are set on
+FAILURE_FLAGS = (ArgoQcFlag.PROBABLY_BAD, ArgoQcFlag.BAD)
+
+
+class PipelineResult(NamedTuple):
+    """The output of a pipeline run on a single profile."""
+
+    output: CheckOutput
+    tests_performed: int
+    tests_failed: int
+
+
+class BatchResult(NamedTuple):
+    """The output of a pipeline run on a batch of profiles, with the tests of each profile."""
+
+    output: CheckOutput
+    tests_performed: np.ndarray
+    tests_failed: np.ndarray
+
+
+class CheckPipeline:
+    """An ordered sequence of checks run on a profile, sharing a single output.
+
+    Every check sets its flags in the same CheckOutput, so each flag array is allocated once and flag precedence is
+    applied in place as the checks run. With a result cache, profiles whose results are cached are not checked again.
+    """
+
+    def __init__(self, checks: Sequence[Type[CheckBase]], cache: Optional[ResultCache] = None) -> None:
+        """Initialise the pipeline with the checks to be run, in order.
+
+        Args:
+            checks: The check classes to be run on each profile.
+            cache: Optional cache of results, from which unchanged profiles' results are returned.
+        """
+        self._checks: List[Type[CheckBase]] = list(checks)
+        self._cache = cache
+
+    @property
+    def checks(self) -> List[Type[CheckBase]]:
+        """Return the check classes run by the pipeline, in order."""
+        return list(self._checks)
+
+    def run(self, profile: ProfileBase, profile_previous: Optional[ProfileBase] = None) -> PipelineResult:
+        """Run each required check on the profile.
+
+        Args:
+            profile: The profile of interest to be checked.
+            profile_previous: The profile prior to the profile of interest.
+                ``None`` if the profile of interest is the first.
+
+        Return: the shared output, with the ``argo_binary_id`` bitmasks of the tests performed and failed. A test
+            has failed if it set a failure flag on any value, whether or not the value already had one.
+        """
+        key = None
+        if self._cache is not None:
+            key = self._cache.make_key(self._checks, profile, profile_previous)
+            cached = self._cache.get(key, profile)
+            if cached is not None:
+                return PipelineResult(*cached)
+
+        result = self._run_checks(profile, profile_previous)
+
+        if key is not None:
+            self._cache.put(key, *result)  # type: ignore
+
+        return result
+
+    def _run_checks(self, profile: ProfileBase, profile_previous: Optional[ProfileBase]) -> PipelineResult:
+        """Run each required check on the profile in turn, see :meth:`run`."""
+        output = CheckOutput(profile=profile)
+        tests_performed = 0
+        tests_failed = 0
+
+        for check_class in self._checks:
+            check = check_class(profile, profile_previous, output=output)
+            if not check.is_required():
+                continue
+
+            failures_before = _count_failures(output)
+            check.run()
+            tests_performed |= check.argo_binary_id
+            if _count_failures(output) > failures_before:
+                tests_failed |= check.argo_binary_id
+
+        return PipelineResult(output=output, tests_performed=tests_performed, tests_failed=tests_failed)
+
+    def run_batch(
+        self,
+        batch: ProfileBatch,
+        batch_previous: Optional[ProfileBatch] = None,
+        output: Optional[CheckOutput] = None,
+    ) -> BatchResult:
+        """Run each required check once on a batch of profiles.
+
+        Results are not cached, as the cache holds the results of single profiles.
+
+        Args:
+            batch: The batch of profiles to be checked.
+            batch_previous: Optional batch of the profiles prior to each profile of the batch.
+            output: Optional output, e.g. with flag arrays the checks should set in place, for the batch. Defaults
+                to a new output.
+
+        Return: the output, with the ``argo_binary_id`` bitmasks of the tests performed and failed for each profile.
+            A test has failed for a profile if it set a failure flag on any value of the profile, as for :meth:`run`.
+        """
+        output = CheckOutput(profile=batch) if output is None else output
+        tests_performed = np.zeros(batch.number_of_profiles, dtype=np.int64)
+        tests_failed = np.zeros(batch.number_of_profiles, dtype=np.int64)
+
+        for check_class in self._checks:
+            check = check_class(batch, batch_previous, output=output)
+            if not check.is_required():
+                continue
+
+            failures_before = _count_profile_failures(output)
+            check.run()
+            tests_performed |= check.argo_binary_id
+            tests_failed[_count_profile_failures(output) > failures_before] |= check.argo_binary_id
+
+        return BatchResult(output=output, tests_performed=tests_performed, tests_failed=tests_failed)
+
+
+def run_trajectory_checks(
+    profiles: Sequence[ProfileBase],
+    batch: Optional[ProfileBatch] = None,
+    checks: Sequence[Type[CheckBase]] = TRAJECTORY_CHECKS,
+) -> List[PipelineResult]:
+    """Run checks of the trajectories of floats on every cycle at once, returning the result for each profile.
+
+    The checks are run once on a batch of the dates and positions of all of the profiles, and the flags of each
+    profile of the batch are given to the output of the profile.
+
+    Args:
+        profiles: The profile of each cycle, e.g. each profile of a float's ``*_prof.nc`` file.
+        batch: Optional batch of the trajectory properties of the profiles, in the same order, e.g. read at once with
+            ``ProfileBatch.from_dataset(dataset, TRAJECTORY_PROPERTIES)``. Defaults to stacking the trajectory
+            properties of the profiles.
+        checks: The check classes to be run, setting flags only on properties with a value for each profile.
+
+    Return: the output of each profile, with the ``argo_binary_id`` bitmasks of the tests performed and failed. A test
+        has failed for a profile if it set a failure flag on any value of the profile, as for :meth:`CheckPipeline.run`.
+    """
+    if batch is None:
+        batch = ProfileBatch.from_profiles(
+            profiles,
+            [
+                property_name
+                for property_name in TRAJECTORY_PROPERTIES
+                if all(profile.has_property(property_name) for profile in profiles)
+            ],
+        )
+    if batch.number_of_profiles != len(profiles):
+        raise ValueError("run_trajectory_checks: the batch must have one row for each profile.")
+
+    batch_result = CheckPipeline(checks).run_batch(batch)
+
+    results = []
+    for index, profile in enumerate(profiles):
+        profile_output = CheckOutput(profile=profile)
+        for property_name in batch_result.output.get_output_property_names():
+            flags = batch_result.output.get_output_compact_flags_for_property(property_name)
+            missing = flags.missing
+            profile_output.set_output_compact_flags_for_property(
+                property_name,
+                CompactFlags(flags.codes[index], missing=None if missing is None else missing[index]),
+            )
+
+        results.append(
+            PipelineResult(
+                profile_output,
+                int(batch_result.tests_performed[index]),
+                int(batch_result.tests_failed[index]),
+            )
+        )
+
+    return results
+
+
+def _count_profile_failures(output: CheckOutput) -> np.ndarray:
+    """Return the number of times a failure flag has been set on values of each profile, as counted by the output."""
+    return output.get_profile_flag_counts()[:, [FLAG_CODES[flag] for flag in FAILURE_FLAGS]].sum(axis=-1)
+
+
+def _count_failures(output: CheckOutput) -> int:
+    """Return the number of times a failure flag has been set on values of every profile of the output."""
+    return int(_count_profile_failures(output).sum())
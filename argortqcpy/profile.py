@@ -1,20 +1,48 @@
 """Implement classes for holding profile data."""
 
+import functools
+import time
 from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Mapping, Optional, Sequence, Tuple, TypeVar, Union
 
+import numpy as np
 from numpy import ma
-from netCDF4 import Dataset
+
+from argortqcpy import instrumentation
+
+if TYPE_CHECKING:
+    # netCDF4 is imported where it is used, so profiles of arrays in memory never import it
+    from netCDF4 import Dataset, Variable  # pylint: disable=ungrouped-imports
+
+T = TypeVar("T")
 
 
 class ProfileBase(ABC):
     """Class defining the required properties for a profile."""
 
-    valid_properties = {
+    # properties with a value at each level of a profile
+    level_properties = {
         "PRES",
         "TEMP",
         "PSAL",
     }
 
+    # properties with a single value for each profile
+    profile_properties = {
+        "LATITUDE",
+        "LONGITUDE",
+        "PLATFORM_NUMBER",
+        "JULD",
+    }
+
+    valid_properties = level_properties | profile_properties
+
+    def __init_subclass__(cls, **kwargs: object) -> None:
+        """Instrument the property data access of each profile, see :mod:`argortqcpy.instrumentation`."""
+        super().__init_subclass__(**kwargs)  # type: ignore
+        if "get_property_data" in cls.__dict__:
+            setattr(cls, "get_property_data", _instrument_get_property_data(cls.__dict__["get_property_data"]))
+
     @classmethod
     def raise_if_not_valid_property(cls, property_name: str) -> None:
         """Check that a given property name is valid."""
@@ -25,15 +53,408 @@ class ProfileBase(ABC):
     def get_property_data(self, property_name: str) -> ma.MaskedArray:
         """Return the array of property data from the profile."""
 
+    def has_property(self, property_name: str) -> bool:
+        """Return whether the profile has data for a given property."""
+        try:
+            self.get_property_data(property_name)
+        except KeyError:
+            return False
+
+        return True
+
+    def get_derived_data(self, key: str, compute: Callable[[], T]) -> T:
+        """Return data derived from the profile, computing it on first access and caching it on the profile.
+
+        Args:
+            key: The name of the derived data, shared by every check using it.
+            compute: Function computing the derived data.
+        """
+        derived = self.__dict__.setdefault("_derived_data", {})
+        if key not in derived:
+            derived[key] = compute()
+
+        return derived[key]
+
+    def get_number_of_levels(self) -> int:
+        """Return the number of levels in the profile."""
+        return int(np.shape(self.get_property_data("PRES"))[-1])
+
+    def get_property_chunk(self, property_name: str, levels: slice) -> ma.MaskedArray:
+        """Return the property data for a window of levels of the profile.
+
+        Args:
+            property_name: The property to be returned.
+            levels: The window of levels to be returned, a slice with positive (or no) step.
+        """
+        if property_name in self.profile_properties:
+            return self.get_property_data(property_name)
+
+        return self.get_property_data(property_name)[..., levels]
+
+
+def _instrument_get_property_data(
+    get_property_data: Callable[[ProfileBase, str], ma.MaskedArray],
+) -> Callable[[ProfileBase, str], ma.MaskedArray]:
+    """Wrap property data access to record its timing while instrumentation is enabled."""
+
+    @functools.wraps(get_property_data)
+    def instrumented_get_property_data(profile: ProfileBase, property_name: str) -> ma.MaskedArray:
+        if not instrumentation.is_enabled():
+            return get_property_data(profile, property_name)
+
+        start = time.perf_counter()
+        data = get_property_data(profile, property_name)
+        instrumentation.record_property_read(property_name, time.perf_counter() - start)
+        return data
+
+    return instrumented_get_property_data
+
+
+def read_variable(variable: "Variable", index: Tuple[object, ...]) -> ma.MaskedArray:
+    """Read data from a dataset variable, joining arrays of characters (e.g. PLATFORM_NUMBER) into strings."""
+    data = variable[index]
+    if variable.dtype == np.dtype("S1") and np.ndim(data) > 0:
+        from netCDF4 import chartostring  # pylint: disable=import-outside-toplevel
+
+        return ma.asarray(np.char.strip(chartostring(ma.filled(data, b" "))))
+
+    return ma.asarray(data)
+
 
 class Profile(ProfileBase):
-    """Class defining a profile based on a netCDF dataset."""
+    """Class defining a profile based on a netCDF dataset.
 
-    def __init__(self, dataset: Dataset) -> None:
-        """Initialise a profile based on a dataset."""
+    Each property is read and decoded from the dataset once, on first access, and the same array is then shared by
+    every check run on the profile. The cached arrays should be treated as read-only.
+    """
+
+    def __init__(
+        self,
+        dataset: "Dataset",
+        property_names: Optional[Iterable[str]] = None,
+        levels: Optional[slice] = None,
+        profile_index: Optional[int] = None,
+    ) -> None:
+        """Initialise a profile based on a dataset.
+
+        Args:
+            dataset: The netCDF dataset holding the profile.
+            property_names: Optional properties which may be read from the dataset. Defaults to all valid properties.
+            levels: Optional slice of levels to be read. Defaults to all levels.
+            profile_index: Optional index along the N_PROF dimension of a single profile to be read.
+                Defaults to all profiles in the dataset.
+        """
         self._dataset = dataset
+        self._property_names = None
+        if property_names is not None:
+            for property_name in property_names:
+                self.raise_if_not_valid_property(property_name)
+            self._property_names = frozenset(property_names)
+
+        levels = slice(None) if levels is None else levels
+        self._index = (Ellipsis, levels) if profile_index is None else (profile_index, levels)
+        self._cache: Dict[str, ma.MaskedArray] = {}
+
+    @property
+    def dataset(self) -> "Dataset":
+        """Return the dataset holding the profile."""
+        return self._dataset
+
+    @property
+    def index(self) -> Tuple[object, slice]:
+        """Return the index into the dataset variables of the data read for the profile."""
+        return self._index
+
+    def __enter__(self) -> "Profile":
+        """Use the profile as a context manager, closing the dataset on exit."""
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        """Close the dataset on leaving the context."""
+        self.close()
+
+    def get_property_data(self, property_name: str) -> ma.MaskedArray:
+        """Return the array of property data from the profile, reading it from the dataset on first access."""
+        self.raise_if_not_valid_property(property_name)
+        if property_name not in self._cache:
+            if self._property_names is not None and property_name not in self._property_names:
+                raise KeyError(f"{property_name}: not selected for Profile.")
+            self._cache[property_name] = read_variable(
+                self._dataset[property_name],
+                self._property_index(property_name),
+            )
+
+        return self._cache[property_name]
+
+    def has_property(self, property_name: str) -> bool:
+        """Return whether the profile has data for a given property, without reading the data."""
+        return (
+            property_name in self.valid_properties
+            and property_name in self._dataset.variables
+            and (self._property_names is None or property_name in self._property_names)
+        )
+
+    def _property_index(self, property_name: str) -> Tuple[object, ...]:
+        """Return the index into the dataset variable of the data for a property of the profile."""
+        if property_name in self.profile_properties:
+            return self._index[:1]
+
+        return self._index
+
+    def get_number_of_levels(self) -> int:
+        """Return the number of levels in the profile, without reading the data."""
+        _, levels = self._index
+        return len(range(self._dataset["PRES"].shape[-1])[levels])
+
+    def get_property_chunk(self, property_name: str, levels: slice) -> ma.MaskedArray:
+        """Return the property data for a window of levels, reading only the window from the dataset.
+
+        The data for the window are not cached, unless the whole property is already cached.
+        """
+        self.raise_if_not_valid_property(property_name)
+        if property_name in self.profile_properties:
+            return self.get_property_data(property_name)
+        if property_name in self._cache:
+            return self._cache[property_name][..., levels]
+        if self._property_names is not None and property_name not in self._property_names:
+            raise KeyError(f"{property_name}: not selected for Profile.")
+
+        leading, profile_levels = self._index
+        variable = self._dataset[property_name]
+        chunk = range(variable.shape[-1])[profile_levels][levels]
+        return variable[leading, slice(chunk.start, chunk.stop, chunk.step)]
+
+    def invalidate(self, property_name: Optional[str] = None) -> None:
+        """Drop cached property data so that it is read from the dataset again on next access.
+
+        Args:
+            property_name: Optional property to be invalidated. Defaults to all properties.
+        """
+        if property_name is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(property_name, None)
+
+        # anything derived from the data is out of date too
+        self.__dict__.pop("_derived_data", None)
+
+    def close(self) -> None:
+        """Drop all cached property data and close the underlying dataset."""
+        self.invalidate()
+        if self._dataset.isopen():
+            self._dataset.close()
+
+
+class InMemoryProfile(Profile):
+    """Class defining a profile read from a netCDF file held in memory, such as one received from a message queue.
+
+    The file is opened directly from its bytes, without being written to disk, and is read-only.
+    """
+
+    def __init__(
+        self,
+        buffer: Union[bytes, bytearray, memoryview],
+        property_names: Optional[Iterable[str]] = None,
+        levels: Optional[slice] = None,
+        profile_index: Optional[int] = None,
+    ) -> None:
+        """Initialise a profile from the bytes of a netCDF file.
+
+        Args:
+            buffer: The contents of the netCDF file.
+            property_names: Optional properties which may be read from the dataset. Defaults to all valid properties.
+            levels: Optional slice of levels to be read. Defaults to all levels.
+            profile_index: Optional index along the N_PROF dimension of a single profile to be read.
+                Defaults to all profiles in the dataset.
+        """
+        from netCDF4 import Dataset  # pylint: disable=import-outside-toplevel
+
+        super().__init__(
+            Dataset("inmemory.nc", mode="r", memory=buffer),
+            property_names=property_names,
+            levels=levels,
+            profile_index=profile_index,
+        )
+        self._buffer = buffer
+
+    @property
+    def buffer(self) -> Union[bytes, bytearray, memoryview]:
+        """Return the contents of the netCDF file."""
+        return self._buffer
+
+
+class ArrayProfile(ProfileBase):
+    """Class defining a profile wrapping existing arrays of property data.
+
+    The arrays are used as they are, without copying, so they should not be changed while checks are run.
+    """
+
+    def __init__(self, data: Mapping[str, Union[np.ndarray, ma.MaskedArray]]) -> None:
+        """Initialise a profile from arrays of property data.
+
+        Args:
+            data: A mapping of property name to array, or masked array with missing values masked.
+        """
+        for property_name in data:
+            self.raise_if_not_valid_property(property_name)
+
+        # wrapping an array as a masked array shares its data
+        self._data = {property_name: ma.asarray(values) for property_name, values in data.items()}
 
     def get_property_data(self, property_name: str) -> ma.MaskedArray:
         """Return the array of property data from the profile."""
         self.raise_if_not_valid_property(property_name)
-        return self._dataset[property_name][:]
+        if property_name not in self._data:
+            raise KeyError(f"{property_name}: no data for ArrayProfile.")
+
+        return self._data[property_name]
+
+    def has_property(self, property_name: str) -> bool:
+        """Return whether the profile has data for a given property."""
+        return property_name in self._data
+
+
+class ProfileBatch(ProfileBase):
+    """Class defining a batch of profiles stacked as padded, masked (N_PROF, N_LEVELS) arrays.
+
+    Checks operate along the last axis of the property data, so running a check on a batch evaluates every
+    profile in the batch at once, and the output flags are (N_PROF, N_LEVELS) arrays. Properties with a single
+    value for each profile, such as positions, are (N_PROF,) arrays.
+    """
+
+    def __init__(self, data: Dict[str, ma.MaskedArray]) -> None:
+        """Initialise a batch from 2-D property data, with padding values masked.
+
+        Args:
+            data: A mapping of property name to (N_PROF, N_LEVELS) arrays, or (N_PROF,) arrays for properties with
+                a single value for each profile.
+        """
+        for property_name in data:
+            self.raise_if_not_valid_property(property_name)
+
+        self._data = {property_name: ma.asarray(values) for property_name, values in data.items()}
+
+        shapes = {
+            values.shape if property_name in self.level_properties else values.shape + (None,)
+            for property_name, values in self._data.items()
+        }
+        if len({shape[0] for shape in shapes}) > 1 or any(len(shape) != 2 for shape in shapes):
+            raise ValueError("ProfileBatch: property data must be 2-D arrays with the same number of profiles.")
+        if len({shape for shape in shapes if shape[-1] is not None}) > 1:
+            raise ValueError("ProfileBatch: property data must have the same number of levels.")
+
+    @classmethod
+    def from_profiles(
+        cls,
+        profiles: Sequence[ProfileBase],
+        property_names: Optional[Iterable[str]] = None,
+    ) -> "ProfileBatch":
+        """Stack a collection of profiles into a batch, padding shorter profiles with masked values.
+
+        Args:
+            profiles: The profiles to be stacked. Profiles with 2-D data contribute one row per profile.
+            property_names: Optional properties to be stacked. Defaults to all valid properties which every
+                profile has.
+        """
+        if property_names is None:
+            property_names = [
+                property_name
+                for property_name in cls.valid_properties
+                if all(profile.has_property(property_name) for profile in profiles)
+            ]
+
+        data = {}
+        for property_name in sorted(property_names):
+            if property_name in cls.profile_properties:
+                data[property_name] = ma.concatenate(
+                    [ma.atleast_1d(profile.get_property_data(property_name)) for profile in profiles]
+                )
+                continue
+
+            rows = [ma.atleast_2d(profile.get_property_data(property_name)) for profile in profiles]
+            number_of_levels = max((row.shape[-1] for row in rows), default=0)
+            stacked = ma.masked_all(
+                (sum(row.shape[0] for row in rows), number_of_levels),
+                dtype=np.result_type(*(row.dtype for row in rows)) if rows else float,
+            )
+
+            start = 0
+            for row in rows:
+                end = start + row.shape[0]
+                stacked[start:end, : row.shape[-1]] = row
+                start = end
+
+            data[property_name] = stacked
+
+        return cls(data)
+
+    @classmethod
+    def from_dataset(cls, dataset: "Dataset", property_names: Optional[Iterable[str]] = None) -> "ProfileBatch":
+        """Create a batch from a multi-profile dataset with (N_PROF, N_LEVELS) variables.
+
+        Args:
+            dataset: The multi-profile dataset, e.g. an Argo ``*_prof.nc`` file.
+            property_names: Optional properties to be read. Defaults to all valid properties in the dataset.
+        """
+        if property_names is None:
+            property_names = cls.valid_properties & set(dataset.variables)
+
+        return cls(
+            {
+                property_name: (
+                    ma.atleast_1d(read_variable(dataset[property_name], (Ellipsis,)))
+                    if property_name in cls.profile_properties
+                    else ma.atleast_2d(dataset[property_name][:])
+                )
+                for property_name in sorted(property_names)
+            }
+        )
+
+    @property
+    def number_of_profiles(self) -> int:
+        """Return the number of profiles in the batch."""
+        return next(iter(self._data.values())).shape[0] if self._data else 0
+
+    def get_property_data(self, property_name: str) -> ma.MaskedArray:
+        """Return the (N_PROF, N_LEVELS), or (N_PROF,), array of property data from the batch."""
+        self.raise_if_not_valid_property(property_name)
+        return self._data[property_name]
+
+    def get_number_of_levels(self) -> int:
+        """Return the number of levels in the batch, including padding."""
+        return int(self.get_property_data("PRES").shape[-1])
+
+    def get_property_padding(self, property_name: str) -> np.ndarray:
+        """Return a boolean array which is ``True`` where the property data is padding or missing."""
+        return ma.getmaskarray(self.get_property_data(property_name))
+
+
+class ProfileChunk(ProfileBase):
+    """Class defining a window of levels of another profile, for checking very long profiles in chunks."""
+
+    def __init__(self, profile: ProfileBase, levels: slice) -> None:
+        """Initialise the chunk from the profile and the window of levels.
+
+        Args:
+            profile: The profile of which the chunk is a part.
+            levels: The window of levels of the chunk, a slice with positive (or no) step.
+        """
+        self._profile = profile
+        self._levels = levels
+        self._cache: Dict[str, ma.MaskedArray] = {}
+
+    @property
+    def levels(self) -> slice:
+        """Return the window of levels of the profile in the chunk."""
+        return self._levels
+
+    def get_property_data(self, property_name: str) -> ma.MaskedArray:
+        """Return the array of property data for the chunk, reading it from the profile on first access."""
+        if property_name not in self._cache:
+            self._cache[property_name] = self._profile.get_property_chunk(property_name, self._levels)
+
+        return self._cache[property_name]
+
+    def has_property(self, property_name: str) -> bool:
+        """Return whether the profile of which the chunk is a part has data for a given property."""
+        return self._profile.has_property(property_name)
@@ -0,0 +1,107 @@
+"""Regions of the regional range test, with a spatial index locating many positions at once."""
+
+import functools
+from typing import Dict, NamedTuple, Sequence, Tuple
+
+import numpy as np
+
+
+class Region(NamedTuple):
+    """A named polygon of (latitude, longitude) vertices, with the range limits of properties within it."""
+
+    name: str
+    vertices: Sequence[Tuple[float, float]]
+    limits: Dict[str, Tuple[float, float]]
+
+
+# the regions of the regional range test, see the Argo quality control manual for CTD and trajectory data
+REGIONS = (
+    Region(
+        "Red Sea",
+        ((25.0, 30.0), (30.0, 35.0), (15.0, 45.0), (10.0, 40.0)),
+        {"TEMP": (21.0, 40.0), "PSAL": (2.0, 41.0)},
+    ),
+    Region(
+        "Mediterranean Sea",
+        ((30.0, -6.0), (30.0, 40.0), (40.0, 35.0), (42.0, 20.0), (50.0, 15.0), (40.0, 5.0), (30.0, -6.0)),
+        {"TEMP": (10.0, 40.0), "PSAL": (2.0, 40.0)},
+    ),
+)
+
+
+class RegionIndex:
+    """An index of polygonal regions, locating arrays of positions with a bounding-box prefilter.
+
+    Only the positions within a region's bounding box are tested against its polygon, with a vectorised
+    ray-casting test over all of the polygon's edges. Where regions overlap, a position is in the first of them.
+    """
+
+    def __init__(self, regions: Sequence[Region]) -> None:
+        """Precompute the bounding boxes and edges of the regions."""
+        self._regions = tuple(regions)
+        self._bounding_boxes = []
+        self._edges = []
+        for region in self._regions:
+            vertices = np.asarray(region.vertices, dtype=float)
+            self._bounding_boxes.append((vertices.min(axis=0), vertices.max(axis=0)))
+            # each edge as the (latitude, longitude) of its start and end vertices, closing the polygon
+            self._edges.append((vertices, np.roll(vertices, -1, axis=0)))
+
+    @property
+    def regions(self) -> Tuple[Region, ...]:
+        """Return the regions of the index, in order of precedence."""
+        return self._regions
+
+    def find(self, latitude: np.ndarray, longitude: np.ndarray) -> np.ndarray:
+        """Return the number of the region containing each position, or -1 for positions in none of them.
+
+        Args:
+            latitude: Array of latitudes (degrees north), broadcasting against the longitudes.
+            longitude: Array of longitudes (degrees east, -180 to 180).
+        """
+        latitude, longitude = np.broadcast_arrays(np.asarray(latitude, dtype=float), np.asarray(longitude, dtype=float))
+        shape = latitude.shape
+        latitude = latitude.ravel()
+        longitude = longitude.ravel()
+        region_numbers = np.full(latitude.shape, -1, dtype=np.intp)
+
+        for region_number, ((lower, upper), (start, end)) in enumerate(zip(self._bounding_boxes, self._edges)):
+            # missing (NaN) positions are never within a bounding box
+            with np.errstate(invalid="ignore"):
+                candidates = np.flatnonzero(
+                    (region_numbers < 0)
+                    & (latitude >= lower[0])
+                    & (latitude <= upper[0])
+                    & (longitude >= lower[1])
+                    & (longitude <= upper[1])
+                )
+            if not candidates.size:
+                continue
+
+            inside = _points_in_polygon(latitude[candidates], longitude[candidates], start, end)
+            region_numbers[candidates[inside]] = region_number
+
+        return region_numbers.reshape(shape)
+
+
+def _points_in_polygon(latitude: np.ndarray, longitude: np.ndarray, start: np.ndarray, end: np.ndarray) -> np.ndarray:
+    """Return whether each point is inside a polygon, by counting the edges crossed by a ray of constant latitude."""
+    latitude = latitude[:, np.newaxis]
+    longitude = longitude[:, np.newaxis]
+    start_latitude, start_longitude = start[:, 0], start[:, 1]
+    end_latitude, end_longitude = end[:, 0], end[:, 1]
+
+    straddles = (start_latitude > latitude) != (end_latitude > latitude)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        crossing_longitude = start_longitude + (latitude - start_latitude) * (end_longitude - start_longitude) / (
+            end_latitude - start_latitude
+        )
+    crossings = np.count_nonzero(straddles & (longitude < crossing_longitude), axis=-1)
+
+    return crossings % 2 == 1
+
+
+@functools.lru_cache(maxsize=None)
+def get_region_index() -> RegionIndex:
+    """Return the index of the regions of the regional range test, built once per process."""
+    return RegionIndex(REGIONS)
@@ -0,0 +1,164 @@
+"""Run the checks of a pipeline concurrently in a pool of threads, in the order the tests they depend on need.
+
+Each check declares the tests it depends on (``depends_on``) and the properties whose data it reads (``reads``) and
+whose flags it writes (``writes``). The checks are divided into stages, each check being in a later stage than every
+check before it in the pipeline it depends on, or which writes the flags of a property it reads or writes, and the
+checks of a stage are run at the same time, each with its own output. NumPy releases the GIL for most operations on
+large arrays, so the checks of a high-resolution profile overlap. The output of each check is then merged into the
+output of the profile in the order of the pipeline, accounting for flag precedence, so the flags are the same as running
+the checks in turn.
+
+Checks which do not declare the properties they read and write are run on their own, in a stage of their own.
+"""
+
+import concurrent.futures
+from typing import List, Optional, Sequence, Set, Type
+
+from argortqcpy.cache import ResultCache
+from argortqcpy.checks import CheckBase, CheckOutput
+from argortqcpy.pipeline import CheckPipeline, PipelineResult, _count_failures
+from argortqcpy.profile import ProfileBase
+
+
+def schedule_checks(checks: Sequence[Type[CheckBase]]) -> List[List[Type[CheckBase]]]:
+    """Divide a sequence of checks into stages of checks which can be run at the same time.
+
+    A check is in a later stage than every check before it that it depends on, than every check before it writing
+    the flags of a property it reads or writes, and than every check before it if either does not declare its
+    properties. Tests a check depends on which are not in the sequence are ignored.
+
+    Args:
+        checks: The check classes, in the order they would be run in turn.
+
+    Return: the check classes of each stage, in order, each stage keeping the order of the sequence.
+    """
+    argo_ids = [getattr(check_class, "argo_id", None) for check_class in checks]
+    stages: List[int] = []
+    for index, check_class in enumerate(checks):
+        next_index = index + 1
+        later_ids = set(argo_ids[next_index:]) - set(argo_ids[:index])
+        for argo_id in check_class.depends_on:
+            if argo_id in later_ids:
+                raise ValueError(
+                    f"schedule_checks: {check_class.__name__} depends on test {argo_id}, which is run after it."
+                )
+
+        stage = 0
+        for previous_index, previous_class in enumerate(checks[:index]):
+            if argo_ids[previous_index] in check_class.depends_on or _conflicts(check_class, previous_class):
+                stage = max(stage, stages[previous_index] + 1)
+        stages.append(stage)
+
+    return [
+        [check_class for check_class, check_stage in zip(checks, stages) if check_stage == stage]
+        for stage in range(max(stages, default=-1) + 1)
+    ]
+
+
+class ConcurrentCheckPipeline(CheckPipeline):
+    """A pipeline of checks running independent checks at the same time in a pool of threads.
+
+    Profiles are checked one at a time, the checks of each profile being run concurrently, so the pipeline gives
+    the lowest latency for each profile. Batches of profiles are checked in turn, as by :class:`CheckPipeline`.
+    """
+
+    def __init__(
+        self,
+        checks: Sequence[Type[CheckBase]],
+        cache: Optional[ResultCache] = None,
+        workers: Optional[int] = None,
+    ) -> None:
+        """Initialise the pipeline with the checks to be run, and start the threads.
+
+        Args:
+            checks: The check classes to be run on each profile, in the order they would be run in turn.
+            cache: Optional cache of results, from which unchanged profiles' results are returned.
+            workers: Optional number of threads. Defaults to that of :class:`concurrent.futures.ThreadPoolExecutor`.
+        """
+        super().__init__(checks, cache=cache)
+        self._stages = schedule_checks(self._checks)
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+
+    @property
+    def stages(self) -> List[List[Type[CheckBase]]]:
+        """Return the check classes of each stage, see :func:`schedule_checks`."""
+        return [list(stage) for stage in self._stages]
+
+    def close(self) -> None:
+        """Stop the threads once their checks are done."""
+        self._executor.shutdown()
+
+    def __enter__(self) -> "ConcurrentCheckPipeline":
+        """Use the pipeline as a context manager, closing it on exit."""
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        """Close the pipeline on leaving the context."""
+        self.close()
+
+    def _run_checks(self, profile: ProfileBase, profile_previous: Optional[ProfileBase]) -> PipelineResult:
+        """Run the required checks of each stage at the same time, merging their outputs in order."""
+        output = CheckOutput(profile=profile)
+        tests_performed = 0
+        tests_failed = 0
+
+        for stage in self._stages:
+            # a check on its own is run in this thread with the output of the profile, as in turn
+            alone = len(stage) == 1
+            checks = [check_class(profile, profile_previous, output=output if alone else None) for check_class in stage]
+            checks = [check for check in checks if check.is_required()]
+            if not checks:
+                continue
+
+            if alone:
+                failures_before = _count_failures(output)
+                checks[0].run()
+                failed = [_count_failures(output) > failures_before]
+            else:
+                # the data the checks read are read before they start, so profiles are only read by this thread
+                _read_properties(checks, profile, profile_previous)
+                futures = [self._executor.submit(check.run) for check in checks]
+                check_outputs = [future.result() for future in futures]
+                for check_output in check_outputs:
+                    output.merge_output(check_output)
+                failed = [_count_failures(check_output) > 0 for check_output in check_outputs]
+
+            for check, check_failed in zip(checks, failed):
+                tests_performed |= check.argo_binary_id
+                if check_failed:
+                    tests_failed |= check.argo_binary_id
+
+        return PipelineResult(output=output, tests_performed=tests_performed, tests_failed=tests_failed)
+
+
+def _is_declared(check_class: Type[CheckBase]) -> bool:
+    """Return whether a check declares the properties it reads and writes."""
+    return check_class.reads is not None and check_class.writes is not None
+
+
+def _conflicts(check_class: Type[CheckBase], previous_class: Type[CheckBase]) -> bool:
+    """Return whether a check must run after a previous check, reading or writing a property the previous one writes.
+
+    Checks not declaring their properties conflict with every other check.
+    """
+    if not (_is_declared(check_class) and _is_declared(previous_class)):
+        return True
+
+    return bool(set(check_class.reads + check_class.writes) & set(previous_class.writes))  # type: ignore
+
+
+def _read_properties(
+    checks: Sequence[CheckBase],
+    profile: ProfileBase,
+    profile_previous: Optional[ProfileBase],
+) -> None:
+    """Read the data of every property the checks read or write from the profiles, which cache them."""
+    property_names: Set[str] = set()
+    for check in checks:
+        property_names.update(check.reads or ())
+        property_names.update(check.writes or ())
+
+    for property_name in sorted(property_names):
+        for each_profile in (profile, profile_previous):
+            if each_profile is not None and each_profile.has_property(property_name):
+                each_profile.get_property_data(property_name)
@@ -0,0 +1,145 @@
+"""Vectorised seawater properties from the UNESCO 1983 (EOS-80) equation of state.
+
+Functions take arrays of practical salinity, ITS-90 temperature (degrees C), and sea pressure (dbar), which
+broadcast against each other. Temperatures are converted to IPTS-68 for the EOS-80 polynomials.
+
+Reference: Fofonoff, P. and Millard, R.C. Jr, 1983. Algorithms for computation of fundamental properties of
+seawater. Unesco Technical Papers in Marine Science 44.
+"""
+
+import numpy as np
+
+# conversion factor from ITS-90 to IPTS-68 temperatures
+T68_CONVERSION = 1.00024
+
+
+def _density_at_surface(salinity: np.ndarray, temperature_68: np.ndarray) -> np.ndarray:
+    """Return the density (kg m-3) at zero pressure."""
+    t68 = temperature_68
+    smow = (
+        999.842594
+        + (6.793952e-2 + (-9.095290e-3 + (1.001685e-4 + (-1.120083e-6 + 6.536332e-9 * t68) * t68) * t68) * t68) * t68
+    )
+    b = 8.24493e-1 + (-4.0899e-3 + (7.6438e-5 + (-8.2467e-7 + 5.3875e-9 * t68) * t68) * t68) * t68
+    c = -5.72466e-3 + (1.0227e-4 - 1.6546e-6 * t68) * t68
+    return smow + b * salinity + c * salinity * np.sqrt(salinity) + 4.8314e-4 * salinity**2
+
+
+def _secant_bulk_modulus(salinity: np.ndarray, temperature_68: np.ndarray, pressure_bar: np.ndarray) -> np.ndarray:
+    """Return the secant bulk modulus (bar)."""
+    t68 = temperature_68
+    root_salinity = np.sqrt(salinity)
+
+    # pure water terms
+    a_water = 3.239908 + (1.43713e-3 + (1.16092e-4 - 5.77905e-7 * t68) * t68) * t68
+    b_water = 8.50935e-5 + (-6.12293e-6 + 5.2787e-8 * t68) * t68
+    k_water = 19652.21 + (148.4206 + (-2.327105 + (1.360477e-2 - 5.155288e-5 * t68) * t68) * t68) * t68
+
+    # seawater terms
+    a = a_water + (2.2838e-3 + (-1.0981e-5 - 1.6078e-6 * t68) * t68 + 1.91075e-4 * root_salinity) * salinity
+    b = b_water + (-9.9348e-7 + (2.0816e-8 + 9.1697e-10 * t68) * t68) * salinity
+    k_surface = (
+        k_water
+        + (54.6746 + (-0.603459 + (1.09987e-2 - 6.1670e-5 * t68) * t68) * t68) * salinity
+        + (7.944e-2 + (1.6483e-2 - 5.3009e-4 * t68) * t68) * salinity * root_salinity
+    )
+
+    return k_surface + (a + b * pressure_bar) * pressure_bar
+
+
+def density(salinity: np.ndarray, temperature: np.ndarray, pressure: np.ndarray) -> np.ndarray:
+    """Return the in situ density of seawater (kg m-3) from its salinity, temperature and pressure.
+
+    Args:
+        salinity: Practical salinity.
+        temperature: In situ temperature (ITS-90, degrees C).
+        pressure: Sea pressure (dbar).
+    """
+    temperature_68 = np.asarray(temperature) * T68_CONVERSION
+    pressure_bar = np.asarray(pressure) / 10.0
+    return _density_at_surface(salinity, temperature_68) / (
+        1.0 - pressure_bar / _secant_bulk_modulus(salinity, temperature_68, pressure_bar)
+    )
+
+
+def adiabatic_temperature_gradient(salinity: np.ndarray, temperature: np.ndarray, pressure: np.ndarray) -> np.ndarray:
+    """Return the adiabatic temperature gradient (degrees C dbar-1).
+
+    Args:
+        salinity: Practical salinity.
+        temperature: In situ temperature (ITS-90, degrees C).
+        pressure: Sea pressure (dbar).
+    """
+    t68 = np.asarray(temperature) * T68_CONVERSION
+    salinity_anomaly = np.asarray(salinity) - 35.0
+    return (
+        3.5803e-5
+        + (8.5258e-6 + (-6.836e-8 + 6.6228e-10 * t68) * t68) * t68
+        + (1.8932e-6 - 4.2393e-8 * t68) * salinity_anomaly
+        + (
+            (1.8741e-8 + (-6.7795e-10 + (8.733e-12 - 5.4481e-14 * t68) * t68) * t68)
+            + (-1.1351e-10 + 2.7759e-12 * t68) * salinity_anomaly
+        )
+        * pressure
+        + (-4.6206e-13 + (1.8676e-14 - 2.1687e-16 * t68) * t68) * pressure * pressure
+    )
+
+
+def potential_temperature(
+    salinity: np.ndarray,
+    temperature: np.ndarray,
+    pressure: np.ndarray,
+    reference_pressure: np.ndarray,
+) -> np.ndarray:
+    """Return the potential temperature (ITS-90, degrees C) at a reference pressure.
+
+    The adiabatic temperature gradient is integrated from the in situ to the reference pressure with a fourth order
+    Runge-Kutta step.
+
+    Args:
+        salinity: Practical salinity.
+        temperature: In situ temperature (ITS-90, degrees C).
+        pressure: Sea pressure (dbar).
+        reference_pressure: Reference sea pressure (dbar).
+    """
+    pressure_change = np.asarray(reference_pressure) - np.asarray(pressure)
+    mid_pressure = pressure + 0.5 * pressure_change
+
+    theta_change = pressure_change * adiabatic_temperature_gradient(salinity, temperature, pressure)
+    theta = np.asarray(temperature) * T68_CONVERSION + 0.5 * theta_change
+    q = theta_change
+
+    theta_change = pressure_change * adiabatic_temperature_gradient(salinity, theta / T68_CONVERSION, mid_pressure)
+    theta = theta + (1.0 - 1.0 / np.sqrt(2.0)) * (theta_change - q)
+    q = (2.0 - np.sqrt(2.0)) * theta_change + (-2.0 + 3.0 / np.sqrt(2.0)) * q
+
+    theta_change = pressure_change * adiabatic_temperature_gradient(salinity, theta / T68_CONVERSION, mid_pressure)
+    theta = theta + (1.0 + 1.0 / np.sqrt(2.0)) * (theta_change - q)
+    q = (2.0 + np.sqrt(2.0)) * theta_change + (-2.0 - 3.0 / np.sqrt(2.0)) * q
+
+    theta_change = pressure_change * adiabatic_temperature_gradient(
+        salinity,
+        theta / T68_CONVERSION,
+        pressure + pressure_change,
+    )
+    theta = theta + (theta_change - 2.0 * q) / 6.0
+
+    return theta / T68_CONVERSION
+
+
+def potential_density(
+    salinity: np.ndarray,
+    temperature: np.ndarray,
+    pressure: np.ndarray,
+    reference_pressure: np.ndarray,
+) -> np.ndarray:
+    """Return the potential density (kg m-3) referenced to a reference pressure.
+
+    Args:
+        salinity: Practical salinity.
+        temperature: In situ temperature (ITS-90, degrees C).
+        pressure: Sea pressure (dbar).
+        reference_pressure: Reference sea pressure (dbar).
+    """
+    theta = potential_temperature(salinity, temperature, pressure, reference_pressure)
+    return density(salinity, theta, reference_pressure)
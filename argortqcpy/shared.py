@@ -0,0 +1,324 @@
+"""Run checks on batches of profiles in a pool of worker processes, sharing the data and flags in shared memory.
+
+A batch is copied once into a block of shared memory, together with the flag codes of its output and the tests of
+each profile. Workers attach to the block by name and run the checks on views of rows of the batch, setting the
+flags in place, so only small descriptions of the arrays cross between processes and nothing is pickled or copied
+for each profile.
+
+The trajectory tests of every cycle of each float are evaluated once over the whole batch as it is copied, so the
+tests of a float whose cycles are checked by different workers are the same as if the batch were checked at once.
+There is no previous batch, so checks comparing a profile with the previous one, such as the frozen profile test,
+are not run.
+
+Shared memory needs Python 3.8 or later, and :mod:`multiprocessing.shared_memory` is imported when first used.
+"""
+
+import functools
+import multiprocessing
+import os
+from types import ModuleType
+from typing import TYPE_CHECKING, Dict, Iterator, NamedTuple, Optional, Sequence, Tuple, Type
+
+import numpy as np
+from numpy import ma
+
+from argortqcpy.checks import FLAG_CODES, ArgoQcFlag, CheckBase, CheckOutput, CompactFlags, ImpossibleSpeedCheck
+from argortqcpy.pipeline import DEFAULT_CHECKS, BatchResult, CheckPipeline
+from argortqcpy.profile import ProfileBatch
+from argortqcpy.trajectory import TRAJECTORY_PROPERTIES, TrajectoryTests
+
+if TYPE_CHECKING:
+    from multiprocessing.shared_memory import SharedMemory  # pylint: disable=ungrouped-imports
+
+# the alignment (bytes) of each array in a block
+ALIGNMENT = 64
+
+# the default number of profiles of a batch checked by each task of a worker
+DEFAULT_ROWS_PER_TASK = 256
+
+
+class SharedArray(NamedTuple):
+    """The place of an array in a block of shared memory."""
+
+    offset: int
+    shape: Tuple[int, ...]
+    dtype: str
+
+
+class BatchLayout(NamedTuple):
+    """The arrays of a batch of profiles and of its output in a block of shared memory, sent to the workers.
+
+    Each property has its data and a mask of its missing values, and each property of numbers has the flag codes of
+    its output. The tests performed and failed by each profile are the rows of a (2, N_PROF) array, and the
+    trajectory tests of each profile, where the batch has any trajectory properties, the rows of a (3, N_PROF) array.
+    """
+
+    name: str
+    data: Dict[str, SharedArray]
+    masks: Dict[str, SharedArray]
+    codes: Dict[str, SharedArray]
+    tests: SharedArray
+    trajectory: Optional[SharedArray]
+
+
+class SharedBatch:
+    """A batch of profiles, with its output flags, in a block of shared memory.
+
+    The batch is closed, and its block freed by the process creating it, on leaving its context. Arrays of the
+    batch are views of the block, and must not be used once it is closed.
+    """
+
+    def __init__(self, block: "SharedMemory", layout: BatchLayout, owner: bool) -> None:
+        """Initialise the batch from a block of shared memory, see :meth:`create` and :meth:`attach`."""
+        self._block = block
+        self._layout = layout
+        self._owner = owner
+
+    @classmethod
+    def create(cls, batch: ProfileBatch) -> "SharedBatch":
+        """Copy a batch of profiles into a new block of shared memory, with space for the output of each property.
+
+        Args:
+            batch: The batch of profiles, whose property data must be arrays of numbers, booleans or fixed-size
+                strings.
+        """
+        shared_memory = _import_shared_memory()
+
+        offset = 0
+        arrays: Dict[str, Dict[str, SharedArray]] = {"data": {}, "masks": {}, "codes": {}}
+        for property_name in sorted(batch.valid_properties):
+            if not batch.has_property(property_name):
+                continue
+
+            values = batch.get_property_data(property_name)
+            if values.dtype.hasobject:
+                raise ValueError(f"SharedBatch: {property_name} data cannot be shared, as it holds objects.")
+
+            kinds = [("data", values.dtype), ("masks", np.dtype(bool))]
+            # properties of strings, such as platform numbers, are not flagged
+            if values.dtype.kind not in "SU":
+                kinds.append(("codes", np.dtype(np.uint8)))
+
+            for kind, dtype in kinds:
+                arrays[kind][property_name] = SharedArray(offset, values.shape, dtype.str)
+                offset = _align(offset + values.size * dtype.itemsize)
+
+        tests = SharedArray(offset, (2, batch.number_of_profiles), np.dtype(np.int64).str)
+        offset = _align(offset + tests.shape[0] * tests.shape[1] * np.dtype(tests.dtype).itemsize)
+
+        # the trajectory tests compare the cycles of each float, so are evaluated over the whole batch, rather than
+        # over the rows checked by each task, every trajectory check sharing the same tests
+        trajectory_tests = None
+        trajectory = None
+        if any(batch.has_property(property_name) for property_name in TRAJECTORY_PROPERTIES):
+            trajectory_tests = ImpossibleSpeedCheck(batch, None).get_trajectory_tests()
+            trajectory = SharedArray(offset, (len(trajectory_tests), batch.number_of_profiles), np.dtype(bool).str)
+            offset += trajectory.shape[0] * trajectory.shape[1]
+
+        block = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        layout = BatchLayout(block.name, arrays["data"], arrays["masks"], arrays["codes"], tests, trajectory)
+        shared_batch = cls(block, layout, owner=True)
+        for property_name in layout.data:
+            values = batch.get_property_data(property_name)
+            shared_batch.view(layout.data[property_name])[...] = ma.getdata(values)
+            shared_batch.view(layout.masks[property_name])[...] = ma.getmaskarray(values)
+        shared_batch.view(tests)[...] = 0
+        if trajectory is not None:
+            shared_batch.view(trajectory)[...] = trajectory_tests
+
+        return shared_batch
+
+    @classmethod
+    def attach(cls, layout: BatchLayout) -> "SharedBatch":
+        """Attach to the block of shared memory of a batch created by another process."""
+        return cls(_import_shared_memory().SharedMemory(name=layout.name), layout, owner=False)
+
+    @property
+    def layout(self) -> BatchLayout:
+        """Return the description of the arrays of the batch, to be sent to other processes."""
+        return self._layout
+
+    @property
+    def number_of_profiles(self) -> int:
+        """Return the number of profiles in the batch."""
+        return self._layout.tests.shape[-1]
+
+    def view(self, array: SharedArray) -> np.ndarray:
+        """Return an array of the block, without copying it."""
+        return np.ndarray(array.shape, dtype=array.dtype, buffer=self._block.buf, offset=array.offset)
+
+    def get_batch(self, rows: slice = slice(None)) -> ProfileBatch:
+        """Return a batch of views of rows of the profiles, without copying them.
+
+        The trajectory tests of the rows are those evaluated over the whole batch.
+        """
+        batch = ProfileBatch(
+            {
+                property_name: ma.masked_array(
+                    self.view(self._layout.data[property_name])[rows],
+                    mask=self.view(self._layout.masks[property_name])[rows],
+                    copy=False,
+                )
+                for property_name in self._layout.data
+            }
+        )
+        if self._layout.trajectory is not None:
+            trajectory_tests = TrajectoryTests(*self.view(self._layout.trajectory)[:, rows])
+            batch.get_derived_data("trajectory_tests", lambda: trajectory_tests)
+
+        return batch
+
+    def get_output(self, rows: slice = slice(None)) -> CheckOutput:
+        """Return an output for rows of the batch whose flags are views of the block, set in place by the checks."""
+        output = CheckOutput(profile=self.get_batch(rows))
+        for property_name, codes in self._layout.codes.items():
+            output.set_output_compact_flags_for_property(
+                property_name,
+                CompactFlags(
+                    self.view(codes)[rows],
+                    missing=self.view(self._layout.masks[property_name])[rows],
+                ),
+            )
+
+        return output
+
+    def get_result(self) -> BatchResult:
+        """Return the output of the checks of the batch, with the tests performed and failed by each profile."""
+        tests = self.view(self._layout.tests)
+        return BatchResult(output=self.get_output(), tests_performed=tests[0], tests_failed=tests[1])
+
+    def run_rows(self, pipeline: CheckPipeline, rows: slice) -> None:
+        """Run the checks of a pipeline on rows of the batch, setting their flags and tests in the block."""
+        for codes in self._layout.codes.values():
+            self.view(codes)[rows] = FLAG_CODES[ArgoQcFlag.GOOD]
+
+        result = pipeline.run_batch(self.get_batch(rows), output=self.get_output(rows))
+
+        tests = self.view(self._layout.tests)
+        tests[0, rows] = result.tests_performed
+        tests[1, rows] = result.tests_failed
+
+    def close(self) -> None:
+        """Detach from the block, freeing it if this process created it."""
+        try:
+            self._block.close()
+        except BufferError:
+            # views of the block are still referenced, and the block is unmapped once they are released
+            pass
+
+        if self._owner:
+            self._block.unlink()
+
+    def __enter__(self) -> "SharedBatch":
+        """Use the batch as a context manager, closing it on exit."""
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        """Close the batch on leaving the context."""
+        self.close()
+
+
+class SharedMemoryPool:
+    """A pool of worker processes running checks on batches of profiles held in shared memory.
+
+    Checks comparing a profile with the previous one, such as :class:`argortqcpy.checks.FrozenProfileCheck`, are
+    not run, as there is no previous batch.
+    """
+
+    def __init__(self, checks: Sequence[Type[CheckBase]] = DEFAULT_CHECKS, workers: Optional[int] = None) -> None:
+        """Start the worker processes.
+
+        Args:
+            checks: The check classes to be run, in order, on each profile.
+            workers: Optional number of worker processes. Defaults to the number of CPUs.
+        """
+        _import_shared_memory()
+        # workers share the resource tracker of this process, which frees the blocks it creates once, rather than
+        # each starting their own tracker, freeing the blocks they attached to as they exit
+        if os.name == "posix":
+            from multiprocessing import resource_tracker  # pylint: disable=import-outside-toplevel
+
+            resource_tracker.ensure_running()
+        self._pipeline = CheckPipeline(checks)
+        self._pool = multiprocessing.Pool(processes=workers)
+
+    def run(self, batch: ProfileBatch, rows_per_task: int = DEFAULT_ROWS_PER_TASK) -> SharedBatch:
+        """Run the checks on every profile of a batch, the workers each checking rows of the batch at a time.
+
+        The flags are the same as those of :meth:`argortqcpy.pipeline.CheckPipeline.run_batch` on the whole batch,
+        the trajectory tests of each float being evaluated over every cycle of the batch.
+
+        Args:
+            batch: The batch of profiles to be checked.
+            rows_per_task: The number of profiles checked by each task of a worker.
+
+        Return: the batch in shared memory, whose result (:meth:`SharedBatch.get_result`) holds the flags. The
+            batch should be closed once the result has been used.
+        """
+        shared_batch = SharedBatch.create(batch)
+        try:
+            tasks = [
+                (shared_batch.layout, slice(start, min(start + rows_per_task, shared_batch.number_of_profiles)))
+                for start in range(0, shared_batch.number_of_profiles, rows_per_task)
+            ]
+            for _ in self._pool.imap_unordered(functools.partial(_run_task, self._pipeline), tasks):
+                pass
+        except BaseException:
+            shared_batch.close()
+            raise
+
+        return shared_batch
+
+    def map(self, batches: Sequence[ProfileBatch], rows_per_task: int = DEFAULT_ROWS_PER_TASK) -> Iterator[BatchResult]:
+        """Run the checks on each of a sequence of batches, giving copies of the result of each in turn."""
+        for batch in batches:
+            with self.run(batch, rows_per_task=rows_per_task) as shared_batch:
+                yield _copy_result(shared_batch.get_result(), batch)
+
+    def close(self) -> None:
+        """Stop the worker processes once their tasks are done."""
+        self._pool.close()
+        self._pool.join()
+
+    def __enter__(self) -> "SharedMemoryPool":
+        """Use the pool as a context manager, closing it on exit."""
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        """Close the pool on leaving the context."""
+        self.close()
+
+
+def _align(offset: int) -> int:
+    """Return the first offset at or after the given one which is a multiple of :data:`ALIGNMENT`."""
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def _run_task(pipeline: CheckPipeline, task: Tuple[BatchLayout, slice]) -> None:
+    """Run the checks of a pipeline on rows of a batch in shared memory, in a worker process."""
+    layout, rows = task
+    shared_batch = SharedBatch.attach(layout)
+    try:
+        shared_batch.run_rows(pipeline, rows)
+    finally:
+        shared_batch.close()
+
+
+def _copy_result(result: BatchResult, batch: ProfileBatch) -> BatchResult:
+    """Copy a result out of shared memory, for the original batch."""
+    output = CheckOutput(profile=batch)
+    for property_name in result.output.get_output_property_names():
+        flags = result.output.get_output_compact_flags_for_property(property_name)
+        output.set_output_compact_flags_for_property(property_name, CompactFlags(flags.codes.copy(), flags.missing))
+
+    return BatchResult(output, result.tests_performed.copy(), result.tests_failed.copy())
+
+
+def _import_shared_memory() -> ModuleType:
+    """Import :mod:`multiprocessing.shared_memory`, which needs Python 3.8 or later."""
+    try:
+        from multiprocessing import shared_memory  # pylint: disable=import-outside-toplevel
+    except ImportError as error:
+        raise RuntimeError("argortqcpy.shared: shared memory needs Python 3.8 or later.") from error
+
+    return shared_memory
@@ -0,0 +1,55 @@
+"""Run Argo checks on very long profiles in fixed-size windows of levels.
+
+Each window is read from the profile and checked in turn, with any state a check needs carried over from one window
+to the next, and the flags for each window are returned before the next is read. Peak memory is therefore bounded by
+the window size rather than the length of the profile.
+"""
+
+from typing import Dict, Iterator, Optional, Sequence, Tuple, Type
+
+from argortqcpy.checks import CheckBase, CheckOutput
+from argortqcpy.profile import ProfileBase, ProfileChunk
+
+
+def run_streaming(
+    checks: Sequence[Type[CheckBase]],
+    profile: ProfileBase,
+    chunk_size: int,
+    profile_previous: Optional[ProfileBase] = None,
+) -> Iterator[Tuple[slice, CheckOutput]]:
+    """Run checks on successive windows of levels of a profile.
+
+    Args:
+        checks: The check classes to be run, in order, on each window. They must all be streamable.
+        profile: The profile of interest to be checked.
+        chunk_size: The number of levels in each window.
+        profile_previous: The profile prior to the profile of interest.
+            ``None`` if the profile of interest is the first.
+
+    Return: an iterator of each window of levels and the output of the checks for those levels.
+    """
+    if chunk_size < 1:
+        raise ValueError("run_streaming: chunk_size must be positive.")
+
+    not_streamable = [check_class.__name__ for check_class in checks if not check_class.streamable]
+    if not_streamable:
+        raise ValueError(f"run_streaming: checks cannot be run in windows of levels: {', '.join(not_streamable)}.")
+
+    states: Dict[Type[CheckBase], object] = {}
+    number_of_levels = profile.get_number_of_levels()
+    for start in range(0, number_of_levels, chunk_size):
+        levels = slice(start, min(start + chunk_size, number_of_levels))
+        chunk = ProfileChunk(profile, levels)
+        output = CheckOutput(profile=chunk)
+
+        for check_class in checks:
+            check = check_class(chunk, profile_previous, output=output)
+            if not check.is_required():
+                continue
+
+            if check_class in states:
+                check.set_stream_state(states[check_class])
+            check.run()
+            states[check_class] = check.get_stream_state()
+
+        yield levels, output
@@ -0,0 +1,139 @@
+"""Test the dates and positions of the cycles of floats: the impossible date, location and speed tests.
+
+The dates and positions of every cycle of one or more floats, e.g. all of those in a float's ``*_prof.nc`` file,
+are tested together in a single pass over arrays, so reprocessing the history of a float takes a few array
+operations rather than a check of each cycle.
+"""
+
+import datetime
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from argortqcpy.greylist import JULD_REFERENCE, date_to_juld
+
+# the properties of a profile describing the cycle of its float
+TRAJECTORY_PROPERTIES = ("PLATFORM_NUMBER", "JULD", "LATITUDE", "LONGITUDE")
+
+# the earliest possible date of an Argo profile (JULD)
+EARLIEST_JULD = date_to_juld("19970101")
+
+# the fastest possible drift of a float between cycles (m/s)
+MAX_SPEED = 3.0
+
+# the mean radius of the Earth (m)
+EARTH_RADIUS = 6371000.0
+
+SECONDS_PER_DAY = 86400.0
+
+
+class TrajectoryTests(NamedTuple):
+    """Whether the date, location and speed of each cycle failed the trajectory tests."""
+
+    impossible_date: np.ndarray
+    impossible_location: np.ndarray
+    impossible_speed: np.ndarray
+
+
+def current_juld() -> float:
+    """Return the current date and time (JULD, days since 1950-01-01)."""
+    reference = datetime.datetime.combine(JULD_REFERENCE, datetime.time(), tzinfo=datetime.timezone.utc)
+    return (datetime.datetime.now(datetime.timezone.utc) - reference).total_seconds() / SECONDS_PER_DAY
+
+
+def haversine_distance(
+    latitude_start: np.ndarray,
+    longitude_start: np.ndarray,
+    latitude_end: np.ndarray,
+    longitude_end: np.ndarray,
+) -> np.ndarray:
+    """Return the great-circle distance (m) between positions (degrees), broadcasting the arrays together."""
+    latitude_start, longitude_start, latitude_end, longitude_end = (
+        np.radians(angle) for angle in (latitude_start, longitude_start, latitude_end, longitude_end)
+    )
+    haversine = (
+        np.sin((latitude_end - latitude_start) / 2.0) ** 2
+        + np.cos(latitude_start) * np.cos(latitude_end) * np.sin((longitude_end - longitude_start) / 2.0) ** 2
+    )
+    return 2.0 * EARTH_RADIUS * np.arcsin(np.sqrt(np.clip(haversine, 0.0, 1.0)))
+
+
+def evaluate_trajectory(
+    juld: np.ndarray,
+    latitude: np.ndarray,
+    longitude: np.ndarray,
+    platform_numbers: Optional[np.ndarray] = None,
+    latest_juld: Optional[float] = None,
+) -> TrajectoryTests:
+    """Evaluate the impossible date, location and speed tests on every cycle of one or more floats at once.
+
+    Dates before 1997 or in the future are impossible, as are latitudes beyond 90 and longitudes beyond 180 degrees.
+    The remaining cycles of each float are ordered by date, and the drift speed between each pair of successive
+    cycles is found. A cycle's speed is impossible if the speeds from and to both of its neighbouring cycles are
+    faster than :data:`MAX_SPEED`, isolating the cycle in error. The first or last cycle's speed is impossible if the
+    speed to its neighbour is too fast and its neighbour is not in error, so the only pair of cycles of a float are
+    both impossible. Missing values (NaN) are never flagged.
+
+    Args:
+        juld: Array of the date of each cycle (JULD), NaN if missing.
+        latitude: Array of the latitude of each cycle (degrees north), NaN if missing.
+        longitude: Array of the longitude of each cycle (degrees east), NaN if missing.
+        platform_numbers: Optional array of the platform number of each cycle. Defaults to every cycle being of
+            the same float.
+        latest_juld: Optional latest possible date (JULD). Defaults to the current date.
+    """
+    juld, latitude, longitude = np.broadcast_arrays(
+        np.asarray(juld, dtype=float), np.asarray(latitude, dtype=float), np.asarray(longitude, dtype=float)
+    )
+    shape = juld.shape
+    juld, latitude, longitude = juld.ravel(), latitude.ravel(), longitude.ravel()
+    latest_juld = current_juld() if latest_juld is None else latest_juld
+
+    with np.errstate(invalid="ignore"):
+        impossible_date = (juld < EARLIEST_JULD) | (juld > latest_juld)
+        impossible_location = (np.abs(latitude) > 90.0) | (np.abs(longitude) > 180.0)
+
+    # only the possible dates and locations of a float are used for its speeds
+    usable = np.flatnonzero(
+        np.isfinite(juld) & np.isfinite(latitude) & np.isfinite(longitude) & ~impossible_date & ~impossible_location
+    )
+    floats = np.zeros(juld.size, dtype=np.intp)
+    if platform_numbers is not None:
+        _, floats = np.unique(np.broadcast_to(platform_numbers, shape).ravel(), return_inverse=True)
+    order = usable[np.lexsort((juld[usable], floats[usable]))]
+
+    # the speed between each cycle and the next, for the cycles of each float in order of date
+    start, end = order[:-1], order[1:]
+    same_float = floats[end] == floats[start]
+    seconds = (juld[end] - juld[start]) * SECONDS_PER_DAY
+    distance = haversine_distance(latitude[start], longitude[start], latitude[end], longitude[end])
+    too_fast = same_float & (distance > MAX_SPEED * seconds)
+
+    has_previous = np.zeros(order.size, dtype=bool)
+    has_previous[1:] = same_float
+    has_next = np.zeros(order.size, dtype=bool)
+    has_next[:-1] = same_float
+    too_fast_from_previous = np.zeros(order.size, dtype=bool)
+    too_fast_from_previous[1:] = too_fast
+    too_fast_to_next = np.zeros(order.size, dtype=bool)
+    too_fast_to_next[:-1] = too_fast
+
+    # a cycle between two others is isolated as being in error if it is too far from both of them
+    isolated = has_previous & has_next & too_fast_from_previous & too_fast_to_next
+    next_isolated = np.zeros(order.size, dtype=bool)
+    next_isolated[:-1] = isolated[1:]
+    previous_isolated = np.zeros(order.size, dtype=bool)
+    previous_isolated[1:] = isolated[:-1]
+
+    # the first or last cycle is in error if it is too far from its neighbour, unless its neighbour is in error
+    first = ~has_previous & too_fast_to_next & ~next_isolated
+    last = ~has_next & too_fast_from_previous & ~previous_isolated
+
+    impossible_speed = np.zeros(juld.size, dtype=bool)
+    impossible_speed[order] = isolated | first | last
+
+    return TrajectoryTests(
+        impossible_date=impossible_date.reshape(shape),
+        impossible_location=impossible_location.reshape(shape),
+        impossible_speed=impossible_speed.reshape(shape),
+    )
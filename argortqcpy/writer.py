@@ -0,0 +1,187 @@
+"""Write check output flags to Argo netCDF files."""
+
+import shutil
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from numpy import ma
+from netCDF4 import Dataset, Variable
+
+from argortqcpy.checks import FLAG_BYTES, CheckOutput, CompactFlags, merge_flag_codes
+from argortqcpy.profile import InMemoryProfile, Profile
+
+# the fill value of Argo QC variables
+QC_FILL_VALUE = b" "
+
+# QC variables of properties with a value for each profile, the flags of properties sharing a variable being merged
+# by precedence
+QC_VARIABLE_NAMES = {"JULD": "JULD_QC", "LATITUDE": "POSITION_QC", "LONGITUDE": "POSITION_QC"}
+
+# QC flags counted as good data when grading a profile, see the Argo user manual for PROFILE_<PARAM>_QC
+PROFILE_QC_GOOD_FLAGS = (b"1", b"2", b"5", b"8")
+
+# QC flags not used when grading a profile
+PROFILE_QC_UNUSED_FLAGS = (QC_FILL_VALUE, b"9")
+
+# the lowest percentage of good data for each profile grade better than "E", grades of "E" having any good data
+PROFILE_QC_GRADES = ((25.0, b"D"), (50.0, b"C"), (75.0, b"B"), (100.0, b"A"))
+
+
+def grade_profiles(qc_flags: np.ndarray) -> np.ndarray:
+    """Return the PROFILE_<PARAM>_QC grade for each profile of QC flags.
+
+    Args:
+        qc_flags: Array of ``S1`` QC flags with levels along the last axis.
+
+    Return: array of ``S1`` grades, with one fewer dimension than the flags.
+    """
+    number_used = np.count_nonzero(~np.isin(qc_flags, PROFILE_QC_UNUSED_FLAGS), axis=-1)
+    number_good = np.count_nonzero(np.isin(qc_flags, PROFILE_QC_GOOD_FLAGS), axis=-1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        percentage_good = 100.0 * number_good / number_used
+
+    grades = np.full(number_used.shape, b"F", dtype="S1")
+    grades[percentage_good > 0.0] = b"E"
+    for lower_bound, grade in PROFILE_QC_GRADES:
+        grades[percentage_good >= lower_bound] = grade
+    grades[number_used == 0] = QC_FILL_VALUE
+
+    return grades
+
+
+def write_check_output(output: CheckOutput, copy_to: Optional[str] = None) -> Dict[str, int]:
+    """Write the flags of a check output to the ``<PARAM>_QC`` variables of the profile's dataset.
+
+    The flags are merged over those already in the dataset accounting for flag precedence, so flags set by an earlier
+    run or an operator are only replaced by flags taking precedence over them. Only flags which differ from those
+    already in the dataset are written, with a single write per variable covering the changed values. Flags are not
+    written for missing values. The ``PROFILE_<PARAM>_QC`` grades of the affected profiles are updated, where the
+    dataset has them. Flags of the position are written to ``POSITION_QC``, and of the date to ``JULD_QC``.
+
+    Args:
+        output: The output of checks run on a :class:`argortqcpy.profile.Profile`. Unless writing to a copy, the
+            profile's dataset must be open for writing.
+        copy_to: Optional path to which the dataset is copied before writing, leaving the original unchanged. The
+            flags of an :class:`argortqcpy.profile.InMemoryProfile`, which is read-only, can only be written to a copy
+            of its file.
+
+    Return: the number of flags changed for each property.
+    """
+    profile = output.profile
+    if not isinstance(profile, Profile):
+        raise TypeError("write_check_output: the output must be for a netCDF Profile.")
+
+    if copy_to is None:
+        if isinstance(profile, InMemoryProfile):
+            raise ValueError("write_check_output: an in-memory profile is read-only, so must be written to a copy.")
+        return _write_flags(output, profile, profile.dataset)
+
+    if isinstance(profile, InMemoryProfile):
+        with open(copy_to, "wb") as file:
+            file.write(profile.buffer)
+    else:
+        shutil.copyfile(profile.dataset.filepath(), copy_to)
+    with Dataset(copy_to, mode="a") as dataset:
+        return _write_flags(output, profile, dataset)
+
+
+def _write_flags(output: CheckOutput, profile: Profile, dataset: Dataset) -> Dict[str, int]:
+    """Write the flags of each property of the output to the dataset."""
+    changes = {}
+    for property_name in output.get_output_property_names():
+        if property_name in QC_VARIABLE_NAMES:
+            continue
+
+        valid = ~ma.getmaskarray(profile.get_property_data(property_name))
+
+        variable = dataset[f"{property_name}_QC"]
+        existing = ma.filled(variable[profile.index], QC_FILL_VALUE)
+        flags = _merge_existing_flags(existing, output.get_output_codes_for_property(property_name))
+        changed = valid & (existing != flags)
+        changes[property_name] = int(np.count_nonzero(changed))
+        if not changes[property_name]:
+            continue
+
+        box = _bounding_box(changed)
+        variable[_dataset_index(variable, profile.index, box)] = np.where(changed, flags, existing)[box]
+
+        profile_qc_name = f"PROFILE_{property_name}_QC"
+        if profile_qc_name in dataset.variables:
+            _write_profile_grades(dataset[profile_qc_name], variable, profile.index[0])
+
+    for qc_variable_name in sorted(set(QC_VARIABLE_NAMES.values())):
+        property_names = [
+            property_name
+            for property_name in output.get_output_property_names()
+            if QC_VARIABLE_NAMES.get(property_name) == qc_variable_name
+        ]
+        if property_names:
+            number_changed = _write_profile_flags(output, profile, dataset[qc_variable_name], property_names)
+            changes.update(dict.fromkeys(property_names, number_changed))
+
+    return changes
+
+
+def _write_profile_flags(
+    output: CheckOutput,
+    profile: Profile,
+    variable: Variable,
+    property_names: List[str],
+) -> int:
+    """Write the merged flags of properties with a value for each profile, returning the number changed."""
+    codes = output.get_output_codes_for_property(property_names[0])
+    valid = ~ma.getmaskarray(profile.get_property_data(property_names[0]))
+    for property_name in property_names[1:]:
+        codes = merge_flag_codes(codes, output.get_output_codes_for_property(property_name))
+        valid = valid & ~ma.getmaskarray(profile.get_property_data(property_name))
+
+    index = profile.index[:1]
+    existing = ma.filled(variable[index], QC_FILL_VALUE)
+    flags = _merge_existing_flags(existing, codes)
+    changed = valid & (existing != flags)
+    if np.any(changed):
+        variable[index] = np.where(changed, flags, existing)
+
+    return int(np.count_nonzero(changed))
+
+
+def _merge_existing_flags(existing: np.ndarray, codes: np.ndarray) -> np.ndarray:
+    """Return the QC flags resulting from merging flag codes over existing QC flags, accounting for precedence.
+
+    Existing values which are not flags, such as fill values, are replaced by the new flags.
+    """
+    existing_flags = CompactFlags.from_argo(existing)
+    merged = merge_flag_codes(existing_flags.codes, codes)
+    missing = existing_flags.missing
+    if missing is not None:
+        merged = np.where(missing, codes, merged)
+
+    return FLAG_BYTES[merged].astype("S1")
+
+
+def _write_profile_grades(profile_variable: Variable, qc_variable: Variable, profile_index: object) -> None:
+    """Update the profile grades from the QC flags of the given profiles (all if an ellipsis)."""
+    profile_variable[profile_index] = grade_profiles(ma.filled(qc_variable[profile_index, :], QC_FILL_VALUE))
+
+
+def _bounding_box(changed: np.ndarray) -> Tuple[slice, ...]:
+    """Return the smallest block of slices containing every changed value."""
+    box = []
+    for axis in range(changed.ndim):
+        indices = np.flatnonzero(changed.any(axis=tuple(other for other in range(changed.ndim) if other != axis)))
+        box.append(slice(indices[0], indices[-1] + 1))
+
+    return tuple(box)
+
+
+def _dataset_index(variable: Variable, index: Tuple[object, slice], box: Tuple[slice, ...]) -> Tuple[object, ...]:
+    """Map a block of a profile's data to an index into the dataset variable."""
+    leading, levels = index
+    level_indices = np.arange(variable.shape[-1])[levels]
+    box_levels = level_indices[box[-1]]
+    dataset_levels = slice(box_levels[0], box_levels[-1] + 1, levels.step)
+
+    if leading is Ellipsis:
+        return box[:-1] + (dataset_levels,)
+
+    return (leading, dataset_levels)
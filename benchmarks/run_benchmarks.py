@@ -0,0 +1,264 @@
+"""Benchmark the checks, flag merging, profile loading and import of argortqcpy.
+
+Each benchmark is run on synthetic profiles of realistic size, and its best time, throughput (levels per second),
+and peak memory are reported. Results can be written as JSON and compared against those of an earlier run::
+
+    python benchmarks/run_benchmarks.py --output results.json
+    python benchmarks/run_benchmarks.py --compare results.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import timeit
+import tracemalloc
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+from numpy import ma
+from netCDF4 import Dataset
+from pkg_resources import DistributionNotFound, get_distribution
+
+from argortqcpy.checks import ArgoQcFlag, CheckOutput, GlobalRangeCheck, PressureIncreasingCheck
+from argortqcpy.profile import Profile, ProfileBase, ProfileBatch
+
+
+class Size(NamedTuple):
+    """The size of synthetic data for a benchmark."""
+
+    name: str
+    number_of_profiles: int
+    number_of_levels: int
+
+
+# a typical core Argo profile, a high resolution CTD profile, and a batch of typical profiles
+SIZES = (
+    Size("profile", 1, 100),
+    Size("high-resolution", 1, 1000),
+    Size("batch", 10000, 100),
+)
+
+QUICK_SIZES = (
+    Size("profile", 1, 100),
+    Size("high-resolution", 1, 1000),
+    Size("batch", 100, 100),
+)
+
+
+class SyntheticProfile(ProfileBase):
+    """A profile holding synthetic data in memory."""
+
+    def __init__(self, data: Dict[str, ma.MaskedArray]) -> None:
+        """Initialise the profile with its property data."""
+        self._data = data
+
+    def get_property_data(self, property_name: str) -> ma.MaskedArray:
+        """Return the array of property data from the profile."""
+        return self._data[property_name]
+
+
+def synthetic_data(size: Size, seed: int = 0) -> Dict[str, ma.MaskedArray]:
+    """Return realistic (N_PROF, N_LEVELS) data, with occasional bad values and some padding."""
+    rng = np.random.default_rng(seed)
+    shape = (size.number_of_profiles, size.number_of_levels)
+
+    pressure = np.cumsum(rng.uniform(0.5, 20.0, shape), axis=-1) - 3.0
+    temperature = 25.0 * np.exp(-pressure / 800.0) + rng.normal(0.0, 0.05, shape)
+    salinity = 35.0 + 0.5 * np.tanh(pressure / 500.0) + rng.normal(0.0, 0.01, shape)
+
+    # a small fraction of the values are bad
+    bad = rng.random(shape) < 0.01
+    pressure[bad] -= 50.0
+    temperature[bad] += 30.0
+
+    # profiles of a batch have different lengths
+    lengths = rng.integers(size.number_of_levels // 2, size.number_of_levels + 1, size.number_of_profiles)
+    padding = np.arange(size.number_of_levels) >= lengths[:, np.newaxis] if size.number_of_profiles > 1 else False
+
+    return {
+        property_name: ma.masked_array(values, mask=padding)
+        for property_name, values in (("PRES", pressure), ("TEMP", temperature), ("PSAL", salinity))
+    }
+
+
+def synthetic_profile(size: Size) -> ProfileBase:
+    """Return a single profile, or a batch of profiles, of synthetic data."""
+    data = synthetic_data(size)
+    if size.number_of_profiles == 1:
+        return SyntheticProfile({property_name: values[0] for property_name, values in data.items()})
+
+    return ProfileBatch(data)
+
+
+def write_synthetic_file(size: Size, path: str) -> None:
+    """Write synthetic data to an Argo-like netCDF file."""
+    with Dataset(path, mode="w") as dataset:
+        dataset.createDimension("N_PROF", size.number_of_profiles)
+        dataset.createDimension("N_LEVELS", size.number_of_levels)
+        for property_name, values in synthetic_data(size).items():
+            dataset.createVariable(property_name, "f4", ("N_PROF", "N_LEVELS"), fill_value=99999.0)
+            dataset[property_name][:] = values
+
+
+class Benchmark(NamedTuple):
+    """A named function to be timed, processing a number of levels per call."""
+
+    name: str
+    size: Size
+    function: Callable[[], object]
+
+
+def check_benchmarks(sizes: Sequence[Size]) -> List[Benchmark]:
+    """Return benchmarks of running the checks."""
+    benchmarks = []
+    for size in sizes:
+        profile = synthetic_profile(size)
+        benchmarks.append(Benchmark("PressureIncreasingCheck.run", size, PressureIncreasingCheck(profile, None).run))
+        benchmarks.append(Benchmark("GlobalRangeCheck.run", size, GlobalRangeCheck(profile, None).run))
+
+    return benchmarks
+
+
+def flag_benchmarks(sizes: Sequence[Size]) -> List[Benchmark]:
+    """Return benchmarks of setting flags with precedence."""
+    benchmarks = []
+    for size in sizes:
+        profile = synthetic_profile(size)
+        where = np.random.default_rng(1).random(np.shape(profile.get_property_data("TEMP"))) < 0.1
+
+        def set_flags(profile: ProfileBase = profile, where: np.ndarray = where) -> None:
+            output = CheckOutput(profile=profile)
+            output.set_output_flag_for_property("TEMP", ArgoQcFlag.PROBABLY_BAD, where=where)
+            output.set_output_flag_for_property("TEMP", ArgoQcFlag.BAD, where=~where)
+            output.set_output_flag_for_property("TEMP", ArgoQcFlag.PROBABLY_GOOD)
+
+        benchmarks.append(Benchmark("CheckOutput.set_output_flag_for_property", size, set_flags))
+
+    return benchmarks
+
+
+def loading_benchmarks(sizes: Sequence[Size], directory: str) -> List[Benchmark]:
+    """Return benchmarks of loading property data from netCDF files."""
+    benchmarks = []
+    for size in sizes:
+        path = os.path.join(directory, f"{size.name}.nc")
+        write_synthetic_file(size, path)
+
+        def load(path: str = path) -> None:
+            with Profile(Dataset(path)) as profile:
+                for property_name in ("PRES", "TEMP", "PSAL"):
+                    profile.get_property_data(property_name)
+
+        benchmarks.append(Benchmark("Profile.get_property_data", size, load))
+
+    return benchmarks
+
+
+def import_benchmarks() -> List[Benchmark]:
+    """Return benchmarks of importing the package for the checks in a new interpreter, e.g. a new worker."""
+    size = Size("interpreter", 1, 1)
+
+    def import_package() -> None:
+        subprocess.run([sys.executable, "-c", "import argortqcpy.pipeline"], check=True)
+
+    def start_interpreter() -> None:
+        subprocess.run([sys.executable, "-c", "import numpy"], check=True)
+
+    # the time to import argortqcpy is the difference between the two
+    return [
+        Benchmark("import numpy", size, start_interpreter),
+        Benchmark("import argortqcpy.pipeline", size, import_package),
+    ]
+
+
+def run_benchmark(benchmark: Benchmark, repeat: int) -> Dict[str, object]:
+    """Time a benchmark, returning its best time, throughput and peak memory."""
+    # calibrate the number of calls so that each timing takes a measurable time
+    timer = timeit.Timer(benchmark.function)
+    number, _ = timer.autorange()
+    best = min(timer.repeat(repeat=repeat, number=number)) / number
+
+    tracemalloc.start()
+    benchmark.function()
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    number_of_levels = benchmark.size.number_of_profiles * benchmark.size.number_of_levels
+    return {
+        "name": benchmark.name,
+        "size": benchmark.size.name,
+        "number_of_profiles": benchmark.size.number_of_profiles,
+        "number_of_levels": benchmark.size.number_of_levels,
+        "seconds": best,
+        "levels_per_second": number_of_levels / best,
+        "peak_memory_bytes": peak_memory,
+    }
+
+
+def compare(results: List[Dict[str, object]], baseline: List[Dict[str, object]]) -> None:
+    """Print the speed-up of each result relative to the same benchmark in a baseline."""
+    baseline_seconds = {(result["name"], result["size"]): result["seconds"] for result in baseline}
+    for result in results:
+        key = (result["name"], result["size"])
+        if key in baseline_seconds:
+            speed_up = float(baseline_seconds[key]) / float(result["seconds"])  # type: ignore
+            print(f"{result['name']:45} {result['size']:16} {speed_up:6.2f}x")
+
+
+def package_version() -> str:
+    """Return the installed version of argortqcpy."""
+    try:
+        return get_distribution("argortqcpy").version
+    except DistributionNotFound:
+        return "unknown"
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Run the benchmarks."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--compare", help="compare the results against those in this JSON file")
+    parser.add_argument("--repeat", type=int, default=5, help="number of timings of which the best is reported")
+    parser.add_argument("--quick", action="store_true", help="use smaller batches, for a quick check")
+    args = parser.parse_args(argv)
+
+    sizes = QUICK_SIZES if args.quick else SIZES
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        benchmarks = check_benchmarks(sizes) + flag_benchmarks(sizes) + loading_benchmarks(sizes, directory)
+        benchmarks += import_benchmarks()
+        for benchmark in benchmarks:
+            result = run_benchmark(benchmark, args.repeat)
+            results.append(result)
+            print(
+                f"{result['name']:45} {result['size']:16} {result['seconds'] * 1e3:10.3f} ms "
+                f"{result['levels_per_second']:14.0f} levels/s {result['peak_memory_bytes'] / 1e6:10.2f} MB"
+            )
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(
+                {
+                    "argortqcpy": package_version(),
+                    "python": sys.version,
+                    "numpy": np.__version__,
+                    "platform": platform.platform(),
+                    "results": results,
+                },
+                file,
+                indent=2,
+            )
+
+    if args.compare:
+        with open(args.compare) as file:
+            compare(results, json.load(file)["results"])
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
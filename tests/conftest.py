@@ -1,5 +1,6 @@
 """Common fixtures for testing."""
 
+import numpy as np
 import pytest
 from numpy import ma
 from netCDF4 import Dataset
@@ -11,9 +12,10 @@ from argortqcpy.profile import ProfileBase, Profile
 class FakeProfile(ProfileBase):
     """A fake profile class created for testing."""
 
-    def __init__(self):
-        """Initialise some empty data for access."""
-        self._data = {property_name: ma.MaskedArray() for property_name in self.valid_properties}
+    def __init__(self, **data):
+        """Initialise some empty data for access, optionally overridden by the given property data."""
+        self._data = {property_name: ma.MaskedArray() for property_name in self.level_properties}
+        self._data.update({property_name: ma.masked_array(values) for property_name, values in data.items()})
 
     def get_property_data(self, property_name) -> ma.MaskedArray:
         """Retrieve the data from the internal dict."""
@@ -44,6 +46,78 @@ def fixture_empty_dataset(tmp_path):
     return dataset
 
 
+def write_argo_file(  # pylint: disable=too-many-arguments
+    filepath,
+    pressure,
+    temperature=None,
+    salinity=None,
+    position=None,
+    juld=None,
+    platform_number=None,
+):
+    """Write an Argo-like netCDF file of (N_PROF, N_LEVELS) data, with missing levels masked.
+
+    Positions are written if given, as (latitude, longitude) of each profile, as are dates and platform numbers.
+    """
+    pressure = ma.masked_invalid(np.atleast_2d(pressure))
+    temperature = pressure * 0 + 10.0 if temperature is None else ma.masked_invalid(np.atleast_2d(temperature))
+    salinity = pressure * 0 + 35.0 if salinity is None else ma.masked_invalid(np.atleast_2d(salinity))
+
+    with Dataset(filepath, mode="w") as dataset:
+        dataset.createDimension("N_PROF", pressure.shape[0])
+        dataset.createDimension("N_LEVELS", pressure.shape[1])
+
+        for property_name, values in (("PRES", pressure), ("TEMP", temperature), ("PSAL", salinity)):
+            dataset.createVariable(property_name, "f4", ("N_PROF", "N_LEVELS"), fill_value=99999.0)
+            dataset[property_name][:] = values
+            dataset.createVariable(f"{property_name}_QC", "S1", ("N_PROF", "N_LEVELS"), fill_value=b" ")
+            dataset[f"{property_name}_QC"][:] = np.where(ma.getmaskarray(values), b" ", b"0")
+            dataset.createVariable(f"PROFILE_{property_name}_QC", "S1", ("N_PROF",), fill_value=b" ")
+
+        if position is not None:
+            latitude, longitude = np.atleast_1d(*position)
+            dataset.createVariable("LATITUDE", "f8", ("N_PROF",), fill_value=99999.0)
+            dataset["LATITUDE"][:] = latitude
+            dataset.createVariable("LONGITUDE", "f8", ("N_PROF",), fill_value=99999.0)
+            dataset["LONGITUDE"][:] = longitude
+            dataset.createVariable("POSITION_QC", "S1", ("N_PROF",), fill_value=b" ")
+            dataset["POSITION_QC"][:] = np.full(np.shape(latitude), b"0")
+
+        if juld is not None:
+            dataset.createVariable("JULD", "f8", ("N_PROF",), fill_value=999999.0)
+            dataset["JULD"][:] = juld
+            dataset.createVariable("JULD_QC", "S1", ("N_PROF",), fill_value=b" ")
+            dataset["JULD_QC"][:] = np.full(pressure.shape[0], b"0")
+
+        if platform_number is not None:
+            dataset.createDimension("STRING8", 8)
+            dataset.createVariable("PLATFORM_NUMBER", "S1", ("N_PROF", "STRING8"))
+            dataset["PLATFORM_NUMBER"][:] = np.array([list(f"{platform_number:<8}")] * pressure.shape[0], dtype="S1")
+
+    return filepath
+
+
+@pytest.fixture(name="argo_file")
+def fixture_argo_file():
+    """Return a function writing an Argo-like netCDF file."""
+    return write_argo_file
+
+
+@pytest.fixture(name="bathymetry_path")
+def fixture_bathymetry_path(tmp_path, monkeypatch):
+    """Write a global bathymetry grid of 10 degree cells, used by the checks.
+
+    The sea floor is at 4000 m, with land between 0N-20N and 0E-20E.
+    """
+    grid = np.full((18, 36), -4000, dtype="i2")
+    grid[9:11, 18:20] = 100
+    path = tmp_path / "bathymetry.npy"
+    np.save(path, grid)
+    monkeypatch.setenv("ARGORTQCPY_BATHYMETRY", str(path))
+
+    return path
+
+
 @pytest.fixture
 def profile_from_dataset(empty_dataset):
     """Create a profile based on the empty dataset."""
@@ -56,6 +130,12 @@ def fake_profile():
     return FakeProfile()
 
 
+@pytest.fixture
+def make_fake_profile():
+    """Return a factory for minimal profiles holding the given property data."""
+    return FakeProfile
+
+
 @pytest.fixture
 def fake_check(mocker):
     """Return an instance of the FakeCheck class."""
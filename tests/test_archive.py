@@ -0,0 +1,140 @@
+"""Tests for processing archives of netCDF files."""
+
+import os
+
+import numpy as np
+import pytest
+
+from argortqcpy.archive import find_profile_files, pair_with_predecessors, process_archive, process_file
+from argortqcpy.checks import FLAG_CODES, ArgoQcFlag, GlobalRangeCheck, PressureIncreasingCheck
+from argortqcpy.cli import main
+from argortqcpy.pipeline import CheckPipeline
+
+
+@pytest.fixture(name="archive")
+def fixture_archive(tmp_path, argo_file):
+    """Create a directory of profile files, with a bad pressure in the second cycle."""
+    salinity = [[35.0, 35.1, 35.2]]
+    argo_file(tmp_path / "R6900001_001.nc", [[0.0, 10.0, 20.0]], [[20.0, 15.0, 10.0]], salinity)
+    argo_file(tmp_path / "R6900001_002.nc", [[0.0, 10.0, 5.0]], [[21.0, 16.0, 11.0]], salinity)
+    os.mkdir(tmp_path / "sub")
+    argo_file(
+        tmp_path / "sub" / "6900002_prof.nc",
+        [[0.0, 10.0, np.nan], [-10.0, 10.0, 20.0]],
+        [[20.0, 15.0, np.nan], [25.0, 20.0, 15.0]],
+        salinity * 2,
+    )
+    (tmp_path / "notes.txt").write_text("not a profile")
+
+    return tmp_path
+
+
+def test_find_profile_files(archive):
+    """Test that only profile files are found when walking a directory."""
+    files = find_profile_files([str(archive)])
+
+    assert [os.path.basename(path) for path in files] == ["R6900001_001.nc", "R6900001_002.nc", "6900002_prof.nc"]
+
+
+def test_pair_with_predecessors():
+    """Test that single-profile files are paired with the previous cycle of the same float."""
+    paths = [
+        "a/R6900001_001.nc",
+        "a/R6900001_002D.nc",
+        "a/R6900001_002.nc",
+        "a/R6900002_001.nc",
+        "a/6900003_prof.nc",
+    ]
+
+    pairs = pair_with_predecessors(paths)
+
+    assert pairs == [
+        ("a/R6900001_001.nc", None),
+        ("a/R6900001_002D.nc", "a/R6900001_001.nc"),
+        ("a/R6900001_002.nc", "a/R6900001_002D.nc"),
+        ("a/R6900002_001.nc", None),
+        ("a/6900003_prof.nc", None),
+    ]
+
+
+def test_process_file_pairs_profiles(mocker, archive):
+    """Test that each profile is run with its predecessor."""
+    pipeline = CheckPipeline([GlobalRangeCheck])
+    run = mocker.spy(pipeline, "run")
+
+    process_file(pipeline, str(archive / "R6900001_002.nc"), str(archive / "R6900001_001.nc"))
+    process_file(pipeline, str(archive / "sub" / "6900002_prof.nc"))
+
+    profiles = [call[0][0] for call in run.call_args_list]
+    previous = [call[0][1] for call in run.call_args_list]
+    assert previous[0] is not None
+    assert previous[1] is None
+    assert previous[2] is profiles[1]
+
+
+def test_process_file_unreadable(tmp_path):
+    """Test that an unreadable file gives a result describing the error."""
+    path = tmp_path / "R6900001_001.nc"
+    path.write_bytes(b"not netCDF")
+
+    results = process_file(CheckPipeline([GlobalRangeCheck]), str(path))
+
+    assert len(results) == 1
+    assert results[0].error is not None
+    assert results[0].flags == {}
+
+
+def test_process_file_check_error(mocker, archive):
+    """Test that an error raised by a check is not reported as an unreadable file."""
+    mocker.patch.object(GlobalRangeCheck, "run", side_effect=ValueError("bug in a check"))
+
+    with pytest.raises(ValueError, match="bug in a check"):
+        process_file(CheckPipeline([GlobalRangeCheck]), str(archive / "R6900001_001.nc"))
+
+
+@pytest.mark.parametrize("workers", (1, 2))
+def test_process_archive(archive, workers):
+    """Test running the checks over an archive, in file order."""
+    results = list(process_archive([str(archive)], workers=workers))
+
+    assert [(os.path.basename(result.path), result.profile_index) for result in results] == [
+        ("R6900001_001.nc", 0),
+        ("R6900001_002.nc", 0),
+        ("6900002_prof.nc", 0),
+        ("6900002_prof.nc", 1),
+    ]
+    assert [result.tests_failed for result in results] == [
+        0,
+        PressureIncreasingCheck.argo_binary_id,
+        0,
+        GlobalRangeCheck.argo_binary_id,
+    ]
+    assert results[1].flags["TEMP"][-1] == FLAG_CODES[ArgoQcFlag.BAD]
+
+
+def test_cli_process(capsys, archive, tmp_path):
+    """Test the command line interface reports each profile and any errors."""
+    bad_path = tmp_path / "R6900003_001.nc"
+    bad_path.write_bytes(b"not netCDF")
+
+    status = main(["process", str(archive), "--workers", "1"])
+    captured = capsys.readouterr()
+
+    assert status == 1
+    assert len(captured.out.splitlines()) == 4
+    assert str(bad_path) in captured.err
+
+
+def test_cli_process_parquet(capsys, archive, tmp_path):
+    """Test the command line interface exports the flags and tests of each profile to a Parquet file."""
+    parquet = pytest.importorskip("pyarrow.parquet")
+    path = tmp_path / "results.parquet"
+
+    status = main(["process", str(archive), "--workers", "1", "--parquet", str(path), "--parquet-levels"])
+    capsys.readouterr()
+
+    table = parquet.read_table(path)
+    assert status == 0
+    assert table.num_rows == 12
+    assert table.column("PRES_QC").to_pylist()[3:6] == ["1", "1", "4"]
+    assert table.column("tests_failed").to_pylist()[3] == PressureIncreasingCheck.argo_binary_id
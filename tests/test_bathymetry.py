@@ -0,0 +1,66 @@
+"""Tests for the bathymetry grid."""
+
+import numpy as np
+import pytest
+from netCDF4 import Dataset
+
+from argortqcpy.bathymetry import BathymetryGrid, convert_grid, get_bathymetry
+
+
+def test_bathymetry_grid_cell_centres(bathymetry_path):
+    """Test that positions at cell centres give the values of their cells."""
+    grid = BathymetryGrid(str(bathymetry_path))
+
+    np.testing.assert_allclose(grid.elevation([5.0, 15.0, -45.0], [5.0, 15.0, 5.0]), [100.0, 100.0, -4000.0])
+
+
+def test_bathymetry_grid_bilinear(bathymetry_path):
+    """Test bilinear interpolation between cell centres, at corners of the land, with missing positions."""
+    grid = BathymetryGrid(str(bathymetry_path))
+
+    elevation = grid.elevation([10.0, 0.0, 0.0, np.nan], [-5.0, 0.0, 20.0, 0.0])
+
+    np.testing.assert_allclose(elevation, [-4000.0, -2975.0, -2975.0, np.nan])
+
+
+def test_bathymetry_grid_wraps_longitude(tmp_path):
+    """Test that longitudes wrap around the globe, and latitudes beyond the outermost cells are clamped."""
+    path = tmp_path / "grid.npy"
+    np.save(path, np.array([[0.0, 10.0, 20.0, 30.0], [0.0, 10.0, 20.0, 30.0]]))
+    grid = BathymetryGrid(str(path))
+
+    np.testing.assert_allclose(grid.elevation([0.0, 0.0, 90.0], [180.0, -180.0, 225.0]), [15.0, 15.0, 0.0])
+
+
+def test_bathymetry_grid_is_memory_mapped(bathymetry_path):
+    """Test that the grid is mapped rather than read."""
+    assert isinstance(BathymetryGrid(str(bathymetry_path))._grid, np.memmap)  # pylint: disable=protected-access
+
+
+def test_get_bathymetry(bathymetry_path, monkeypatch):
+    """Test that the grid given by the environment is opened once, and there is none if not given."""
+    assert get_bathymetry() is get_bathymetry(str(bathymetry_path))
+    assert get_bathymetry().path == str(bathymetry_path)
+
+    monkeypatch.delenv("ARGORTQCPY_BATHYMETRY")
+    assert get_bathymetry() is None
+
+
+@pytest.mark.parametrize("descending", (False, True))
+def test_convert_grid(tmp_path, descending):
+    """Test converting a netCDF grid, with rows oriented north."""
+    elevation = np.arange(12, dtype="i2").reshape(3, 4)
+    latitude = np.array([-60.0, 0.0, 60.0])
+    netcdf_path = tmp_path / "grid.nc"
+    with Dataset(netcdf_path, mode="w") as dataset:
+        dataset.createDimension("lat", 3)
+        dataset.createDimension("lon", 4)
+        dataset.createVariable("lat", "f8", ("lat",))
+        dataset.createVariable("elevation", "i2", ("lat", "lon"))
+        dataset["lat"][:] = latitude[::-1] if descending else latitude
+        dataset["elevation"][:] = elevation[::-1] if descending else elevation
+
+    path = tmp_path / "grid.npy"
+    convert_grid(str(netcdf_path), str(path), rows_per_read=2)
+
+    np.testing.assert_equal(np.load(path), elevation)
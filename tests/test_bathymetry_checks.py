@@ -0,0 +1,112 @@
+"""Tests for the position on land and deepest pressure checks."""
+
+import numpy as np
+from numpy import ma
+from netCDF4 import Dataset
+
+from argortqcpy.checks import ArgoQcFlag, DeepestPressureCheck, PositionOnLandCheck
+from argortqcpy.profile import Profile, ProfileBatch
+from argortqcpy.writer import write_check_output
+
+GOOD = ArgoQcFlag.GOOD.value
+BAD = ArgoQcFlag.BAD.value
+
+
+def test_checks_not_required_without_grid(make_fake_profile, monkeypatch):
+    """Test that the checks are only required with a grid and a position."""
+    monkeypatch.delenv("ARGORTQCPY_BATHYMETRY", raising=False)
+    profile = make_fake_profile(PRES=[0.0], LATITUDE=0.0, LONGITUDE=0.0)
+
+    assert not PositionOnLandCheck(profile, None).is_required()
+    assert not DeepestPressureCheck(profile, None).is_required()
+
+
+def test_checks_not_required_without_position(bathymetry_path, make_fake_profile):
+    """Test that the checks are not required for a profile without a position."""
+    assert not PositionOnLandCheck(make_fake_profile(PRES=[0.0]), None).is_required()
+    assert PositionOnLandCheck(make_fake_profile(PRES=[0.0], LATITUDE=0.0, LONGITUDE=0.0), None).is_required()
+
+
+def test_position_on_land_check(bathymetry_path, make_fake_profile):
+    """Test that a position on land is flagged, and one at sea is not."""
+    on_land = PositionOnLandCheck(make_fake_profile(PRES=[0.0], LATITUDE=10.0, LONGITUDE=10.0), None).run()
+    at_sea = PositionOnLandCheck(make_fake_profile(PRES=[0.0], LATITUDE=-40.0, LONGITUDE=10.0), None).run()
+
+    assert on_land.get_output_flags_for_property("LATITUDE") == BAD
+    assert on_land.get_output_flags_for_property("LONGITUDE") == BAD
+    assert at_sea.get_output_flags_for_property("LATITUDE") == GOOD
+
+
+def test_deepest_pressure_check(bathymetry_path, make_fake_profile):
+    """Test that pressures deeper than the sea floor, with a margin, are flagged."""
+    profile = make_fake_profile(
+        PRES=[0.0, 4300.0, 4500.0],
+        TEMP=[10.0, 2.0, 2.0],
+        PSAL=[35.0] * 3,
+        LATITUDE=-40.0,
+        LONGITUDE=10.0,
+    )
+
+    output = DeepestPressureCheck(profile, None).run()
+
+    for property_name in ("PRES", "TEMP", "PSAL"):
+        np.testing.assert_equal(output.get_output_flags_for_property(property_name), [GOOD, GOOD, BAD])
+
+
+def test_checks_share_elevation_lookup(bathymetry_path, make_fake_profile, mocker):
+    """Test that the elevation is looked up once per profile."""
+    profile = make_fake_profile(PRES=[0.0], TEMP=[10.0], PSAL=[35.0], LATITUDE=-40.0, LONGITUDE=10.0)
+    compute = mocker.spy(PositionOnLandCheck, "_compute_elevation")
+
+    PositionOnLandCheck(profile, None).run()
+    DeepestPressureCheck(profile, None).run()
+
+    assert compute.call_count == 1
+
+
+def test_checks_batch(bathymetry_path, make_fake_profile):
+    """Test the checks on a batch, with pressures of positions on land or missing never flagged."""
+    profiles = [
+        make_fake_profile(PRES=[0.0, 5000.0], TEMP=[10.0] * 2, PSAL=[35.0] * 2, LATITUDE=-40.0, LONGITUDE=10.0),
+        make_fake_profile(PRES=[0.0, 10.0, 50.0], TEMP=[10.0] * 3, PSAL=[35.0] * 3, LATITUDE=10.0, LONGITUDE=10.0),
+        make_fake_profile(
+            PRES=[0.0, 5000.0],
+            TEMP=[10.0] * 2,
+            PSAL=[35.0] * 2,
+            LATITUDE=ma.masked_array(0.0, mask=True),
+            LONGITUDE=10.0,
+        ),
+    ]
+
+    on_land = PositionOnLandCheck.run_batch(profiles)
+    deepest_pressure = DeepestPressureCheck.run_batch(profiles)
+
+    np.testing.assert_equal(on_land.get_output_flags_for_property("LATITUDE").data, [GOOD, BAD, GOOD])
+    np.testing.assert_equal(
+        deepest_pressure.get_output_flags_for_property("PRES").filled(b" "),
+        [[GOOD, BAD, b" "], [GOOD, GOOD, GOOD], [GOOD, GOOD, b" "]],
+    )
+
+
+def test_write_position_flags(bathymetry_path, argo_file, tmp_path):
+    """Test that position flags are written to POSITION_QC."""
+    path = argo_file(tmp_path / "test_prof.nc", [[0.0, 10.0], [0.0, 10.0]], position=([-40.0, 10.0], [10.0, 10.0]))
+
+    with Dataset(path, mode="a") as dataset:
+        output = PositionOnLandCheck(Profile(dataset), None).run()
+        changes = write_check_output(output)
+
+    assert changes == {"LATITUDE": 2, "LONGITUDE": 2}
+    with Dataset(path) as dataset:
+        np.testing.assert_equal(dataset["POSITION_QC"][:], [GOOD, BAD])
+
+
+def test_write_position_flags_single_profile(bathymetry_path, argo_file, tmp_path):
+    """Test that position flags of a single profile of a file are written to its POSITION_QC."""
+    path = argo_file(tmp_path / "test_prof.nc", [[0.0, 10.0], [0.0, 10.0]], position=([-40.0, 10.0], [10.0, 10.0]))
+
+    with Dataset(path, mode="a") as dataset:
+        write_check_output(PositionOnLandCheck(Profile(dataset, profile_index=1), None).run())
+
+    with Dataset(path) as dataset:
+        np.testing.assert_equal(ma.filled(dataset["POSITION_QC"][:], b" "), [b"0", BAD])
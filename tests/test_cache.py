@@ -0,0 +1,191 @@
+"""Tests for the cache of check results."""
+
+import os
+
+import numpy as np
+import pytest
+from numpy import ma
+
+from argortqcpy.archive import (
+    _initialise_worker,
+    _process_task,
+    find_profile_files,
+    pair_with_predecessors,
+    process_archive,
+)
+from argortqcpy.cache import DEFAULT_MAX_BYTES, ResultCache
+from argortqcpy.checks import GlobalRangeCheck, PressureIncreasingCheck
+from argortqcpy.cli import main
+from argortqcpy.pipeline import CheckPipeline
+from argortqcpy.profile import ArrayProfile, ProfileBatch
+
+
+def make_profile(pressure):
+    """Return a profile of the given pressures."""
+    return ArrayProfile(
+        {"PRES": np.array(pressure), "TEMP": np.full(len(pressure), 10.0), "PSAL": np.full(len(pressure), 35.0)}
+    )
+
+
+def test_pipeline_returns_cached_result(mocker, tmp_path):
+    """Test that a profile is checked once, and its cached result is returned after."""
+    pipeline = CheckPipeline([GlobalRangeCheck, PressureIncreasingCheck], cache=ResultCache(str(tmp_path)))
+    run = mocker.spy(PressureIncreasingCheck, "run")
+
+    result = pipeline.run(make_profile([0.0, 10.0, 5.0]))
+    cached = pipeline.run(make_profile([0.0, 10.0, 5.0]))
+
+    assert run.call_count == 1
+    assert (cached.tests_performed, cached.tests_failed) == (result.tests_performed, result.tests_failed)
+    for property_name in ("PRES", "TEMP", "PSAL"):
+        np.testing.assert_equal(
+            cached.output.get_output_flags_for_property(property_name),
+            result.output.get_output_flags_for_property(property_name),
+        )
+
+
+def test_cached_result_keeps_padding(tmp_path):
+    """Test that the missing values of a batch are kept in cached results."""
+    batch = ProfileBatch.from_profiles([make_profile([0.0, 10.0, 5.0]), make_profile([0.0])])
+    pipeline = CheckPipeline([PressureIncreasingCheck], cache=ResultCache(str(tmp_path)))
+
+    result = pipeline.run(batch)
+    cached = pipeline.run(batch)
+
+    np.testing.assert_equal(
+        ma.getmaskarray(cached.output.get_output_flags_for_property("PRES")),
+        ma.getmaskarray(result.output.get_output_flags_for_property("PRES")),
+    )
+
+
+@pytest.mark.parametrize("content", (b"", b"PK\x03\x04truncated", "tests"))
+def test_unreadable_result_is_a_miss(mocker, tmp_path, content):
+    """Test that an empty, truncated or incomplete cached result is checked again, rather than being an error."""
+    cache = ResultCache(str(tmp_path))
+    profile = make_profile([0.0, 10.0])
+    path = cache._path(cache.make_key([GlobalRangeCheck], profile, None))  # pylint: disable=protected-access
+    os.makedirs(os.path.dirname(path))
+    if content == "tests":
+        np.savez_compressed(path, **{"PRES.codes": np.zeros(2, dtype=np.uint8)})
+    else:
+        with open(path, "wb") as file:
+            file.write(content)
+    run = mocker.spy(GlobalRangeCheck, "run")
+
+    assert cache.get(cache.make_key([GlobalRangeCheck], profile, None), profile) is None
+    CheckPipeline([GlobalRangeCheck], cache=cache).run(profile)
+
+    assert run.call_count == 1
+    assert cache.get(cache.make_key([GlobalRangeCheck], profile, None), profile) is not None
+
+
+def test_cache_put_removes_partial_result(mocker, tmp_path):
+    """Test that a result which fails to be written does not leave a partial file in the cache."""
+    cache = ResultCache(str(tmp_path))
+    profile = make_profile([0.0, 10.0])
+    output = CheckPipeline([GlobalRangeCheck]).run(profile).output
+    mocker.patch("argortqcpy.cache.os.replace", side_effect=OSError("disk full"))
+
+    with pytest.raises(OSError, match="disk full"):
+        cache.put(cache.make_key([GlobalRangeCheck], profile, None), output, 0, 0)
+
+    assert [file_names for _, _, file_names in os.walk(tmp_path) if file_names] == []
+
+
+def test_cache_key(tmp_path, monkeypatch):
+    """Test that the key depends on the data, its predecessor, the checks, and the grey list."""
+    cache = ResultCache(str(tmp_path))
+    checks = [GlobalRangeCheck]
+
+    key = cache.make_key(checks, make_profile([0.0, 10.0]), None)
+
+    assert cache.make_key(checks, make_profile([0.0, 10.0]), None) == key
+    assert cache.make_key(checks, make_profile([0.0, 11.0]), None) != key
+    assert cache.make_key(checks, make_profile([0.0, 10.0]), make_profile([0.0])) != key
+    assert cache.make_key([PressureIncreasingCheck], make_profile([0.0, 10.0]), None) != key
+
+    greylist_path = tmp_path / "ar_greylist.txt"
+    greylist_path.write_text("PLATFORM_CODE,PARAMETER_NAME,START_DATE,END_DATE,QUALITY_CODE,COMMENT,DAC\n")
+    monkeypatch.setenv("ARGORTQCPY_GREYLIST", str(greylist_path))
+    assert cache.make_key(checks, make_profile([0.0, 10.0]), None) != key
+
+
+def test_cache_key_missing_external_file(tmp_path, monkeypatch):
+    """Test that a missing grey list or bathymetry file is part of the key, rather than an error."""
+    cache = ResultCache(str(tmp_path))
+    greylist_path = tmp_path / "ar_greylist.txt"
+    monkeypatch.setenv("ARGORTQCPY_GREYLIST", str(greylist_path))
+
+    key = cache.make_key([GlobalRangeCheck], make_profile([0.0, 10.0]), None)
+    greylist_path.write_text("PLATFORM_CODE,PARAMETER_NAME,START_DATE,END_DATE,QUALITY_CODE,COMMENT,DAC\n")
+
+    assert cache.make_key([GlobalRangeCheck], make_profile([0.0, 10.0]), None) != key
+
+
+def test_cache_key_source(tmp_path, mocker):
+    """Test that the key depends on the source code of argortqcpy, so changing the checks invalidates results."""
+    cache = ResultCache(str(tmp_path))
+    key = cache.make_key([GlobalRangeCheck], make_profile([0.0, 10.0]), None)
+
+    mocker.patch("argortqcpy.cache._hash_package_source", return_value="changed")
+
+    assert cache.make_key([GlobalRangeCheck], make_profile([0.0, 10.0]), None) != key
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    """Test that the least recently used results are removed once the cache is too large."""
+    cache = ResultCache(str(tmp_path))
+    pipeline = CheckPipeline([GlobalRangeCheck], cache=cache)
+    paths = []
+    for index in range(4):
+        profile = make_profile([float(index)])
+        pipeline.run(profile)
+        paths.append(cache._path(cache.make_key([GlobalRangeCheck], profile, None)))  # pylint: disable=protected-access
+        os.utime(paths[-1], (index + 1, index + 1))
+
+    # room for three and a half results, evicting down to ninety percent of that
+    max_bytes = int(3.5 * os.path.getsize(paths[0]))
+    CheckPipeline([GlobalRangeCheck], cache=ResultCache(str(tmp_path), max_bytes=max_bytes)).run(make_profile([10.0]))
+
+    assert [os.path.exists(path) for path in paths] == [False, False, True, True]
+
+
+def test_cache_clear(tmp_path, capsys):
+    """Test that clearing the cache from the command line removes every result."""
+    pipeline = CheckPipeline([GlobalRangeCheck], cache=ResultCache(str(tmp_path)))
+    pipeline.run(make_profile([0.0]))
+    pipeline.run(make_profile([1.0]))
+
+    status = main(["cache", "clear", str(tmp_path)])
+
+    assert status == 0
+    assert "removed 2" in capsys.readouterr().out
+    assert not any(files for _, _, files in os.walk(tmp_path))
+
+
+def test_process_archive_with_cache(mocker, tmp_path, argo_file):
+    """Test that rerunning over an archive gives the same results, from the cache."""
+    argo_file(tmp_path / "R6900001_001.nc", [[0.0, 10.0, 20.0]], [[20.0, 15.0, 10.0]], [[35.0, 35.1, 35.2]])
+    argo_file(tmp_path / "R6900001_002.nc", [[0.0, 10.0, 5.0]], [[21.0, 16.0, 11.0]], [[35.0, 35.1, 35.2]])
+    cache_directory = str(tmp_path / "cache")
+
+    results = list(process_archive([str(tmp_path)], workers=1, cache_directory=cache_directory))
+    run = mocker.spy(PressureIncreasingCheck, "run")
+    cached_results = list(process_archive([str(tmp_path)], workers=1, cache_directory=cache_directory))
+
+    assert run.call_count == 0
+    assert [result.tests_failed for result in cached_results] == [result.tests_failed for result in results]
+    np.testing.assert_equal(cached_results[1].flags["PRES"], results[1].flags["PRES"])
+
+
+def test_process_archive_worker_counts_cache_once(mocker, tmp_path, argo_file):
+    """Test that a worker process builds its cache once, so the cached results are only counted once."""
+    for cycle in range(1, 4):
+        argo_file(tmp_path / f"R6900001_00{cycle}.nc", [[0.0, 10.0, float(cycle)]])
+    result_paths = mocker.spy(ResultCache, "_result_paths")
+
+    _initialise_worker([GlobalRangeCheck], str(tmp_path / "cache"), DEFAULT_MAX_BYTES)
+    for task in pair_with_predecessors(find_profile_files([str(tmp_path)])):
+        _process_task(task)
+
+    assert result_paths.call_count == 1
@@ -5,7 +5,17 @@ from numpy import ma
 import pytest
 
 import argortqcpy.profile
-from argortqcpy.checks import ArgoQcFlag, CheckOutput, PressureIncreasingCheck
+from argortqcpy.checks import (
+    FLAG_CODES,
+    FLAG_PRECEDENCE,
+    ArgoQcFlag,
+    CheckOutput,
+    CompactFlags,
+    GlobalRangeCheck,
+    PressureIncreasingCheck,
+    merge_flag_codes,
+)
+from argortqcpy.profile import ProfileBatch
 
 
 def test_check_is_required(fake_check):
@@ -96,6 +106,133 @@ def test_output_set_output_flag_for_property_with_precendence(profile_from_datas
     assert np.all(flags[2:] == ArgoQcFlag.GOOD.value)
 
 
+@pytest.mark.parametrize("new", list(FLAG_PRECEDENCE))
+@pytest.mark.parametrize("existing", list(FLAG_PRECEDENCE))
+def test_merge_flag_codes_matches_precedence(existing, new):
+    """Test that the precedence table agrees with the flag precedence definition."""
+    expected = new if existing in FLAG_PRECEDENCE[new] else existing
+
+    merged = merge_flag_codes(np.array([FLAG_CODES[existing]], dtype=np.uint8), FLAG_CODES[new])
+
+    assert merged.dtype == np.uint8
+    assert merged[0] == FLAG_CODES[expected]
+
+
+def test_merge_flag_codes_elementwise():
+    """Test merging an array of new flag codes over existing ones."""
+    existing = np.array([FLAG_CODES[ArgoQcFlag.GOOD], FLAG_CODES[ArgoQcFlag.BAD]], dtype=np.uint8)
+    new = np.array([FLAG_CODES[ArgoQcFlag.PROBABLY_BAD], FLAG_CODES[ArgoQcFlag.PROBABLY_BAD]], dtype=np.uint8)
+
+    merged = merge_flag_codes(existing, new)
+
+    np.testing.assert_equal(merged, [FLAG_CODES[ArgoQcFlag.PROBABLY_BAD], FLAG_CODES[ArgoQcFlag.BAD]])
+
+
+def test_output_get_output_codes_for_property(profile_from_dataset):
+    """Test that the flag codes agree with the byte-string flags."""
+    output = CheckOutput(profile=profile_from_dataset)
+
+    output.set_output_flag_for_property("PRES", ArgoQcFlag.BAD, where=slice(None, 3))
+    codes = output.get_output_codes_for_property("PRES")
+    flags = output.get_output_flags_for_property("PRES")
+
+    assert codes.dtype == np.uint8
+    assert np.all(codes[:3] == FLAG_CODES[ArgoQcFlag.BAD])
+    assert np.all(codes[3:] == FLAG_CODES[ArgoQcFlag.GOOD])
+    assert np.all(flags[:3] == ArgoQcFlag.BAD.value)
+    assert np.all(flags[3:] == ArgoQcFlag.GOOD.value)
+
+
+def test_output_get_output_flags_for_property_copy(profile_from_dataset):
+    """Test that the byte-string flags are a copy, and setting them does not change the output."""
+    output = CheckOutput(profile=profile_from_dataset)
+    output.ensure_output_for_property("PRES")
+
+    flags = output.get_output_flags_for_property("PRES")
+    flags[:] = ArgoQcFlag.BAD.value
+
+    assert np.all(output.get_output_codes_for_property("PRES") == FLAG_CODES[ArgoQcFlag.GOOD])
+    assert np.all(output.get_output_flags_for_property("PRES") == ArgoQcFlag.GOOD.value)
+
+
+def test_compact_flags_set_flag():
+    """Test setting flags on compact flags."""
+    flags = CompactFlags.full((4,), ArgoQcFlag.GOOD)
+
+    number_set = flags.set_flag(ArgoQcFlag.PROBABLY_BAD, where=slice(None, 2))
+    flags.set_flag(ArgoQcFlag.PROBABLY_GOOD)
+
+    assert number_set == 2
+    assert flags.missing is None
+    assert flags.nbytes == 4
+    np.testing.assert_equal(flags.to_argo(), [b"3", b"3", b"2", b"2"])
+
+
+def test_compact_flags_missing():
+    """Test that missing values are masked in the Argo flags, using a bit per value."""
+    missing = np.zeros(100, dtype=bool)
+    missing[[0, 99]] = True
+
+    flags = CompactFlags.full((100,), ArgoQcFlag.GOOD, missing=missing)
+    argo_flags = flags.to_argo()
+
+    assert flags.nbytes == 100 + 13
+    np.testing.assert_equal(flags.missing, missing)
+    np.testing.assert_equal(argo_flags.mask, missing)
+    assert np.all(argo_flags[1:99] == ArgoQcFlag.GOOD.value)
+
+
+def test_compact_flags_from_argo():
+    """Test reading Argo flags, with fill values and masked values missing."""
+    argo_flags = ma.masked_array([[b"1", b"4", b" "], [b"0", b"9", b"3"]], mask=[[0, 0, 0], [0, 0, 1]], dtype="S1")
+
+    flags = CompactFlags.from_argo(argo_flags)
+
+    np.testing.assert_equal(flags.codes, [[1, 4, 0], [0, 9, 0]])
+    np.testing.assert_equal(flags.missing, [[False, False, True], [False, False, True]])
+    np.testing.assert_equal(flags.to_argo()[0, :2], [b"1", b"4"])
+
+
+def test_output_get_output_compact_flags_for_property(profile_from_dataset):
+    """Test that the output flags are held compactly."""
+    output = CheckOutput(profile=profile_from_dataset)
+
+    output.set_output_flag_for_property("TEMP", ArgoQcFlag.BAD, where=slice(None, 1))
+    flags = output.get_output_compact_flags_for_property("TEMP")
+
+    assert isinstance(flags, CompactFlags)
+    assert flags.codes is output.get_output_codes_for_property("TEMP")
+
+
+def test_output_merge_output(make_fake_profile):
+    """Test that merging outputs keeps the flag of highest precedence, and adds the flag counts."""
+    profile = make_fake_profile(TEMP=[10.0, 9.0, 8.0, 7.0], PSAL=[35.0, 35.0, 35.0, 35.0])
+    output = CheckOutput(profile=profile)
+    output.set_output_flag_for_property("TEMP", ArgoQcFlag.PROBABLY_BAD, where=np.array([True, True, False, False]))
+    other = CheckOutput(profile=profile)
+    other.set_output_flag_for_property("TEMP", ArgoQcFlag.BAD, where=np.array([False, True, True, False]))
+    other.ensure_output_for_property("PSAL")
+
+    output.merge_output(other)
+
+    np.testing.assert_equal(output.get_output_flags_for_property("TEMP"), [b"3", b"4", b"4", b"1"])
+    np.testing.assert_equal(output.get_output_flags_for_property("PSAL"), [b"1", b"1", b"1", b"1"])
+    assert output.get_flag_counts() == {ArgoQcFlag.PROBABLY_BAD: 2, ArgoQcFlag.BAD: 2}
+
+
+def test_output_profile_flag_counts():
+    """Test that the flags set on each profile of a batch are counted, whether or not they change the flags."""
+    output = CheckOutput(profile=ProfileBatch({"TEMP": np.array([[10.0, 9.0, 8.0], [10.0, 9.0, 8.0]])}))
+    bad = FLAG_CODES[ArgoQcFlag.BAD]
+
+    output.set_output_flag_for_property("TEMP", ArgoQcFlag.BAD, where=np.array([[True, False, False], [False] * 3]))
+    output.set_output_flag_for_property("TEMP", ArgoQcFlag.BAD, where=(slice(None), slice(None, 1)))
+    output.merge_output_codes_for_property("TEMP", np.full((2, 3), bad, dtype=np.uint8), where=np.array([0, 0, 1]) > 0)
+
+    np.testing.assert_equal(output.get_profile_flag_counts()[:, bad], [3, 2])
+    assert output.get_flag_counts()[ArgoQcFlag.BAD] == 5
+
+
 @pytest.mark.parametrize(
     "pressure_values",
     (
@@ -195,3 +332,51 @@ def test_pressure_increasing_check_some_decreasing(mocker, pressure_values, expe
     output = pic.run()
 
     assert np.all(output.get_output_flags_for_property("PRES").data == expected)
+
+
+def test_pressure_increasing_check_ignores_masked(make_fake_profile):
+    """Test that masked pressures are not flagged and do not affect later values."""
+    profile = make_fake_profile(
+        PRES=ma.masked_array([0, 1, 5, 2, 3], mask=[False, False, True, False, False]),
+        TEMP=[5, 4, 3, 2, 1],
+        PSAL=[35, 35, 35, 35, 35],
+    )
+
+    output = PressureIncreasingCheck(profile, None).run()
+
+    assert np.all(output.get_output_flags_for_property("PRES").data == ArgoQcFlag.GOOD.value)
+
+
+def test_run_batch_pressure_increasing(make_fake_profile):
+    """Test running the pressure increasing check on a batch of profiles of different lengths."""
+    profiles = [
+        make_fake_profile(PRES=[0, 1, 2, 3], TEMP=[4, 3, 2, 1], PSAL=[35, 35, 35, 35]),
+        make_fake_profile(PRES=[0, 1, 0], TEMP=[4, 3, 2], PSAL=[35, 35, 35]),
+    ]
+
+    output = PressureIncreasingCheck.run_batch(profiles)
+    flags = output.get_output_flags_for_property("TEMP")
+
+    assert flags.shape == (2, 4)
+    assert np.all(flags[0] == ArgoQcFlag.GOOD.value)
+    assert list(flags[1, :3]) == [ArgoQcFlag.GOOD.value, ArgoQcFlag.GOOD.value, ArgoQcFlag.BAD.value]
+    assert flags.mask[1, 3]
+
+
+def test_run_batch_global_range(make_fake_profile):
+    """Test running the global range check on a batch of profiles gives the same as each profile alone."""
+    profiles = [
+        make_fake_profile(PRES=[-3.0, 1, 2], TEMP=[4, 50, 2], PSAL=[35, 35, 1]),
+        make_fake_profile(PRES=[-6.0, 1], TEMP=[4, 3], PSAL=[35, 42]),
+    ]
+
+    output = GlobalRangeCheck.run_batch(profiles)
+
+    for index, profile in enumerate(profiles):
+        single = GlobalRangeCheck(profile, None).run()
+        for property_name in ("PRES", "TEMP", "PSAL"):
+            expected = single.get_output_flags_for_property(property_name)
+            np.testing.assert_equal(
+                output.get_output_flags_for_property(property_name)[index, : len(expected)].data,
+                expected.data,
+            )
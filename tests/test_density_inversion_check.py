@@ -0,0 +1,67 @@
+"""Tests for the density inversion check."""
+
+import numpy as np
+from numpy import ma
+
+from argortqcpy.checks import ArgoQcFlag, DensityInversionCheck
+from argortqcpy.profile import ProfileBatch
+
+GOOD = ArgoQcFlag.GOOD.value
+BAD = ArgoQcFlag.BAD.value
+
+
+def test_density_inversion_check_stable(make_fake_profile):
+    """Test that a stable profile is not flagged."""
+    profile = make_fake_profile(PRES=[0, 100, 500, 1000], TEMP=[20.0, 15.0, 8.0, 4.0], PSAL=[35.0] * 4)
+
+    output = DensityInversionCheck(profile, None).run()
+
+    assert np.all(output.get_output_flags_for_property("TEMP") == GOOD)
+    assert np.all(output.get_output_flags_for_property("PSAL") == GOOD)
+
+
+def test_density_inversion_check_flags_both_levels(make_fake_profile):
+    """Test that both levels of an inverted pair are flagged, in temperature and salinity only."""
+    profile = make_fake_profile(PRES=[0, 100, 200, 300], TEMP=[20.0, 15.0, 14.0, 13.0], PSAL=[35.0, 35.0, 34.5, 35.0])
+
+    output = DensityInversionCheck(profile, None).run()
+
+    np.testing.assert_equal(output.get_output_flags_for_property("TEMP"), [GOOD, BAD, BAD, GOOD])
+    np.testing.assert_equal(output.get_output_flags_for_property("PSAL"), [GOOD, BAD, BAD, GOOD])
+    assert "PRES" not in output.get_output_property_names()
+
+
+def test_density_inversion_check_skips_missing(make_fake_profile):
+    """Test that levels with missing values are skipped, pairing their neighbours instead."""
+    salinity = ma.masked_array([35.0, 30.0, 34.8, 35.0], mask=[False, True, False, False])
+    profile = make_fake_profile(PRES=[0, 100, 200, 300], TEMP=[15.0, 15.0, 15.0, 15.0], PSAL=salinity)
+
+    output = DensityInversionCheck(profile, None).run()
+
+    np.testing.assert_equal(output.get_output_flags_for_property("PSAL").data, [BAD, GOOD, BAD, GOOD])
+
+
+def test_density_inversion_check_caches_density(mocker, make_fake_profile):
+    """Test that the densities are computed once per profile."""
+    profile = make_fake_profile(PRES=[0, 100, 200], TEMP=[20.0, 15.0, 14.0], PSAL=[35.0] * 3)
+    compute = mocker.spy(DensityInversionCheck, "_compute_potential_density_decrease")
+
+    DensityInversionCheck(profile, None).run()
+    DensityInversionCheck(profile, None).run()
+
+    assert compute.call_count == 1
+
+
+def test_density_inversion_check_batch(make_fake_profile):
+    """Test that a batch gives the same flags as each profile alone."""
+    profiles = [
+        make_fake_profile(PRES=[0, 100, 200, 300], TEMP=[20.0, 15.0, 14.0, 13.0], PSAL=[35.0, 35.0, 34.5, 35.0]),
+        make_fake_profile(PRES=[0, 100], TEMP=[10.0, 12.0], PSAL=[35.0, 35.0]),
+    ]
+
+    output = DensityInversionCheck.run_batch(ProfileBatch.from_profiles(profiles))
+
+    for index, profile in enumerate(profiles):
+        expected = DensityInversionCheck(profile, None).run().get_output_flags_for_property("TEMP")
+        flags = output.get_output_flags_for_property("TEMP")[index]
+        np.testing.assert_equal(flags[~flags.mask], expected)
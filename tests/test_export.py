@@ -0,0 +1,116 @@
+"""Tests for exporting the results of checks to Parquet files."""
+
+import numpy as np
+import pytest
+
+from argortqcpy.archive import ProfileResult, process_archive
+from argortqcpy.checks import FLAG_CODES, ArgoQcFlag, GlobalRangeCheck
+from argortqcpy.export import ParquetResultWriter, record_batch, result_schema, write_parquet
+
+pyarrow = pytest.importorskip("pyarrow")
+parquet = pytest.importorskip("pyarrow.parquet")
+
+GOOD = FLAG_CODES[ArgoQcFlag.GOOD]
+BAD = FLAG_CODES[ArgoQcFlag.BAD]
+
+
+@pytest.fixture(name="results")
+def fixture_results():
+    """Return the results of two profiles of a file, and of a file which could not be read."""
+    return [
+        ProfileResult(
+            "R6900001_001.nc",
+            0,
+            {
+                "PRES": np.array([GOOD, BAD, GOOD], dtype=np.uint8),
+                "TEMP": np.array([GOOD, GOOD, BAD], dtype=np.uint8),
+                "JULD": np.array(GOOD, dtype=np.uint8),
+            },
+            256,
+            256,
+        ),
+        ProfileResult("R6900002_001.nc", None, {}, 0, 0, error="OSError: not netCDF"),
+        ProfileResult("R6900001_001.nc", 1, {"PRES": np.array([GOOD, GOOD], dtype=np.uint8)}, 4, 0),
+    ]
+
+
+def test_record_batch_per_profile(results):
+    """Test that each profile is a row, with the flags of its levels as lists."""
+    batch = record_batch(results)
+
+    assert batch.schema == result_schema()
+    assert batch.column("path").to_pylist() == ["R6900001_001.nc", "R6900002_001.nc", "R6900001_001.nc"]
+    assert batch.column("profile_index").to_pylist() == [0, None, 1]
+    assert batch.column("tests_failed").to_pylist() == [256, 0, 0]
+    assert batch.column("error").to_pylist() == [None, "OSError: not netCDF", None]
+    assert batch.column("PRES_QC").to_pylist() == [["1", "4", "1"], None, ["1", "1"]]
+    assert batch.column("TEMP_QC").to_pylist() == [["1", "1", "4"], None, None]
+    assert batch.column("PSAL_QC").to_pylist() == [None, None, None]
+    assert batch.column("JULD_QC").to_pylist() == ["1", None, None]
+
+
+def test_record_batch_per_level(results):
+    """Test that each level is a row, repeating the flags and tests of its profile."""
+    batch = record_batch(results, per_level=True)
+
+    assert batch.schema == result_schema(per_level=True)
+    assert batch.column("profile_index").to_pylist() == [0, 0, 0, None, 1, 1]
+    assert batch.column("level").to_pylist() == [0, 1, 2, None, 0, 1]
+    assert batch.column("tests_performed").to_pylist() == [256, 256, 256, 0, 4, 4]
+    assert batch.column("PRES_QC").to_pylist() == ["1", "4", "1", None, "1", "1"]
+    assert batch.column("TEMP_QC").to_pylist() == ["1", "1", "4", None, None, None]
+    assert batch.column("JULD_QC").to_pylist() == ["1", "1", "1", None, None, None]
+
+
+def test_flags_dictionary_encoded(results):
+    """Test that flags are encoded by their codes."""
+    flags = record_batch(results, per_level=True).column("PRES_QC")
+
+    assert pyarrow.types.is_dictionary(flags.type)
+    assert flags.indices.to_pylist() == [GOOD, BAD, GOOD, None, GOOD, GOOD]
+
+
+@pytest.mark.parametrize("per_level", (False, True))
+def test_write_parquet(results, tmp_path, per_level):
+    """Test that results are written in row groups, and read back as they were written."""
+    path = tmp_path / "results.parquet"
+
+    number_of_rows = write_parquet(results * 4, str(path), per_level=per_level, row_group_size=5)
+
+    parquet_file = parquet.ParquetFile(path)
+    expected = pyarrow.Table.from_batches([record_batch(results * 4, per_level=per_level)])
+    assert number_of_rows == expected.num_rows
+    assert parquet_file.metadata.num_row_groups == (4 if per_level else 3)
+    assert parquet_file.read().to_pylist() == expected.to_pylist()
+    for name in ("PRES_QC", "JULD_QC"):
+        column = parquet_file.metadata.row_group(0).column(parquet_file.schema_arrow.get_field_index(name))
+        assert "RLE_DICTIONARY" in column.encodings
+
+
+def test_writer_flushes_row_groups(results, tmp_path):
+    """Test that a row group is written once there are enough rows, and the rest when the writer is closed."""
+    path = tmp_path / "results.parquet"
+
+    with ParquetResultWriter(str(path), row_group_size=2) as writer:
+        for result in results:
+            writer.write(result)
+        assert writer.number_of_rows == 3
+
+    row_groups = parquet.ParquetFile(path).metadata
+    assert [row_groups.row_group(index).num_rows for index in range(row_groups.num_row_groups)] == [2, 1]
+
+
+@pytest.mark.parametrize("per_level", (False, True))
+def test_write_parquet_padded_profile(argo_file, tmp_path, per_level):
+    """Test that the flags of the padding levels of a multi-profile file are null."""
+    nan = np.nan
+    data_path = argo_file(tmp_path / "6900001_prof.nc", [[0.0, 10.0, 20.0, nan, nan], [0.0, 5.0, 10.0, 15.0, 20.0]])
+    path = tmp_path / "results.parquet"
+
+    write_parquet(process_archive([str(data_path)], [GlobalRangeCheck], workers=1), str(path), per_level=per_level)
+
+    flags = parquet.read_table(path).column("PRES_QC").to_pylist()
+    if per_level:
+        assert flags == ["1", "1", "1", None, None, "1", "1", "1", "1", "1"]
+    else:
+        assert flags == [["1", "1", "1", None, None], ["1"] * 5]
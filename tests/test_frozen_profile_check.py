@@ -0,0 +1,109 @@
+"""Tests for the stuck value and frozen profile checks."""
+
+import numpy as np
+from numpy import ma
+
+from argortqcpy.checks import ArgoQcFlag, FrozenProfileCheck, StuckValueCheck, bin_means
+
+GOOD = ArgoQcFlag.GOOD.value
+BAD = ArgoQcFlag.BAD.value
+
+PRESSURE = [5.0, 30.0, 60.0, 90.0, 120.0, 160.0]
+TEMPERATURE = [20.0, 19.0, 15.0, 12.0, 10.0, 8.0]
+SALINITY = [35.0, 35.1, 35.2, 35.2, 35.1, 35.0]
+
+
+def test_stuck_value_check(make_fake_profile):
+    """Test that a property with the same value at every level is flagged, ignoring missing values."""
+    temperature = ma.masked_array([10.0, 10.0, 99.0, 10.0], mask=[False, False, True, False])
+    profile = make_fake_profile(PRES=[0.0, 10.0, 20.0, 30.0], TEMP=temperature, PSAL=[35.0, 35.1, 35.1, 35.1])
+
+    output = StuckValueCheck(profile, None).run()
+
+    np.testing.assert_equal(output.get_output_flags_for_property("TEMP").data, [BAD, BAD, GOOD, BAD])
+    np.testing.assert_equal(output.get_output_flags_for_property("PSAL"), [GOOD] * 4)
+
+
+def test_stuck_value_check_single_value(make_fake_profile):
+    """Test that a profile with a single value is not stuck."""
+    output = StuckValueCheck(make_fake_profile(PRES=[0.0], TEMP=[10.0], PSAL=[35.0]), None).run()
+
+    assert output.get_output_flags_for_property("TEMP") == [GOOD]
+
+
+def test_stuck_value_check_batch(make_fake_profile):
+    """Test that a batch flags only the stuck profiles."""
+    profiles = [
+        make_fake_profile(PRES=[0.0, 10.0, 20.0], TEMP=[10.0, 10.0, 10.0], PSAL=[35.0] * 3),
+        make_fake_profile(PRES=[0.0, 10.0], TEMP=[10.0, 9.0], PSAL=[35.0, 35.1]),
+    ]
+
+    output = StuckValueCheck.run_batch(profiles)
+
+    np.testing.assert_equal(output.get_output_flags_for_property("TEMP").filled(b" "), [[BAD] * 3, [GOOD, GOOD, b" "]])
+    np.testing.assert_equal(output.get_output_flags_for_property("PSAL").filled(b" "), [[BAD] * 3, [GOOD, GOOD, b" "]])
+
+
+def test_bin_means():
+    """Test averaging in bins of pressure, with shallow values in the first bin and missing values ignored."""
+    pressure = ma.masked_array([[-1.0, 10.0, 60.0, 160.0], [0.0, 20.0, 40.0, 999.0]], mask=[[0, 0, 0, 0], [0, 0, 0, 1]])
+    values = ma.masked_array([[1.0, 3.0, 5.0, 7.0], [2.0, 4.0, 6.0, 8.0]])
+
+    np.testing.assert_equal(bin_means(pressure, values, 50.0), [[2.0, 5.0, np.nan, 7.0], [4.0, np.nan, np.nan, np.nan]])
+
+
+def test_frozen_profile_check(make_fake_profile):
+    """Test that a profile repeating the previous one is flagged."""
+    previous = make_fake_profile(PRES=PRESSURE, TEMP=TEMPERATURE, PSAL=SALINITY)
+    profile = make_fake_profile(PRES=np.add(PRESSURE, 1.0), TEMP=np.add(TEMPERATURE, 0.0005), PSAL=SALINITY)
+
+    output = FrozenProfileCheck(profile, previous).run()
+
+    for property_name in ("PRES", "TEMP", "PSAL"):
+        np.testing.assert_equal(output.get_output_flags_for_property(property_name), [BAD] * len(PRESSURE))
+
+
+def test_frozen_profile_check_different_profile(make_fake_profile):
+    """Test that a profile differing from the previous one is not flagged."""
+    previous = make_fake_profile(PRES=PRESSURE, TEMP=TEMPERATURE, PSAL=SALINITY)
+    profile = make_fake_profile(PRES=PRESSURE, TEMP=np.add(TEMPERATURE, 0.5), PSAL=SALINITY)
+
+    output = FrozenProfileCheck(profile, previous).run()
+
+    np.testing.assert_equal(output.get_output_flags_for_property("TEMP"), [GOOD] * len(PRESSURE))
+
+
+def test_frozen_profile_check_not_required_without_previous(make_fake_profile):
+    """Test that the first profile of a float is not checked."""
+    assert not FrozenProfileCheck(make_fake_profile(PRES=PRESSURE), None).is_required()
+
+
+def test_frozen_profile_check_reuses_previous_bins(mocker, make_fake_profile):
+    """Test that the binned means of a profile are computed once, when current and when previous."""
+    profiles = [make_fake_profile(PRES=PRESSURE, TEMP=np.add(TEMPERATURE, cycle), PSAL=SALINITY) for cycle in range(3)]
+    compute = mocker.spy(FrozenProfileCheck, "_compute_bin_means")
+
+    for previous, profile in zip(profiles, profiles[1:]):
+        FrozenProfileCheck(profile, previous).run()
+
+    # temperature and salinity of each profile
+    assert compute.call_count == 6
+
+
+def test_frozen_profile_check_batch(make_fake_profile):
+    """Test that a batch flags only the frozen profiles."""
+    previous = [
+        make_fake_profile(PRES=PRESSURE, TEMP=TEMPERATURE, PSAL=SALINITY),
+        make_fake_profile(PRES=PRESSURE[:3], TEMP=TEMPERATURE[:3], PSAL=SALINITY[:3]),
+    ]
+    profiles = [
+        make_fake_profile(PRES=PRESSURE[:4], TEMP=TEMPERATURE[:4], PSAL=SALINITY[:4]),
+        make_fake_profile(PRES=PRESSURE, TEMP=np.add(TEMPERATURE, 1.0), PSAL=SALINITY),
+    ]
+
+    output = FrozenProfileCheck.run_batch(profiles, previous)
+
+    np.testing.assert_equal(
+        output.get_output_flags_for_property("PRES").filled(b" "),
+        [[BAD] * 4 + [b" "] * 2, [GOOD] * len(PRESSURE)],
+    )
@@ -0,0 +1,192 @@
+"""Tests for the grey list and grey list check."""
+
+import os
+
+import numpy as np
+import pytest
+from numpy import ma
+from netCDF4 import Dataset
+
+from argortqcpy.checks import ArgoQcFlag, GreyListCheck
+from argortqcpy.greylist import date_to_juld, get_greylist, parse_greylist
+from argortqcpy.profile import Profile, ProfileBatch
+
+GOOD = ArgoQcFlag.GOOD.value
+PROBABLY_BAD = ArgoQcFlag.PROBABLY_BAD.value
+BAD = ArgoQcFlag.BAD.value
+
+GREYLIST = """PLATFORM_CODE,PARAMETER_NAME,START_DATE,END_DATE,QUALITY_CODE,COMMENT,DAC
+6900001,PSAL,20200101,20201231,3,salinity drift,BO
+6900001,PSAL,20210101,,4,salinity sensor failed,BO
+6900002,TEMP,20190601,20190630,4,,IF
+"""
+
+
+@pytest.fixture(name="greylist_path")
+def fixture_greylist_path(tmp_path, monkeypatch):
+    """Write a grey list, used by the checks."""
+    path = tmp_path / "ar_greylist.txt"
+    path.write_text(GREYLIST)
+    monkeypatch.setenv("ARGORTQCPY_GREYLIST", str(path))
+
+    return path
+
+
+def test_date_to_juld():
+    """Test converting dates to days since 1950-01-01."""
+    assert date_to_juld("19500101") == 0.0
+    assert date_to_juld("20000101") == 18262.0
+
+
+def test_parse_greylist(greylist_path):
+    """Test that the ranges of each platform and parameter are indexed, sorted by their start."""
+    index = parse_greylist(str(greylist_path))
+
+    starts, ends, flags = index["6900001"]["PSAL"]
+    np.testing.assert_equal(starts, [date_to_juld("20200101"), date_to_juld("20210101")])
+    np.testing.assert_equal(ends, [date_to_juld("20210101"), np.inf])
+    np.testing.assert_equal(flags, [3, 4])
+    assert list(index["6900002"]) == ["TEMP"]
+
+
+def test_greylist_lookup(greylist_path):
+    """Test looking up the flags of many profiles at once."""
+    julds = [date_to_juld(date) for date in ("20191231", "20201231", "20210101", "20300101", "20200601")]
+    platform_numbers = ["6900001"] * 4 + ["6900003"]
+
+    flags = get_greylist().lookup(np.array(platform_numbers), "PSAL", np.array(julds))
+
+    np.testing.assert_equal(flags.filled(0), [0, 3, 4, 4, 0])
+    np.testing.assert_equal(flags.mask, [True, False, False, False, True])
+
+
+def test_greylist_lookup_missing_date(greylist_path):
+    """Test that profiles without a date are not listed."""
+    flags = get_greylist().lookup(np.array(["6900001"]), "PSAL", ma.masked_array([0.0], mask=[True]))
+
+    assert flags.mask.all()
+
+
+def test_greylist_reloads_when_modified(greylist_path):
+    """Test that the grey list is parsed once, and again when the file is modified."""
+    greylist = get_greylist()
+    assert get_greylist() is greylist
+
+    greylist_path.write_text(GREYLIST + "6900003,PSAL,20200101,,4,,BO\n")
+    modified = os.stat(greylist_path).st_mtime_ns + 1_000_000_000
+    os.utime(greylist_path, ns=(modified, modified))
+
+    flags = get_greylist().lookup(np.array(["6900003"]), "PSAL", np.array([date_to_juld("20200601")]))
+    assert flags[0] == 4
+
+
+def test_greylist_check_not_required_without_greylist(make_fake_profile, monkeypatch):
+    """Test that the check is only required with a grey list."""
+    monkeypatch.delenv("ARGORTQCPY_GREYLIST", raising=False)
+    profile = make_fake_profile(PRES=[0.0], PLATFORM_NUMBER="6900001", JULD=0.0)
+
+    assert not GreyListCheck(profile, None).is_required()
+
+
+def test_greylist_check(greylist_path, make_fake_profile):
+    """Test that the listed parameter of a profile is flagged with the flag in the list."""
+    profile = make_fake_profile(
+        PRES=[0.0, 10.0],
+        TEMP=[10.0, 9.0],
+        PSAL=ma.masked_array([35.0, 35.1], mask=[False, True]),
+        PLATFORM_NUMBER="6900001",
+        JULD=date_to_juld("20200601"),
+    )
+
+    check = GreyListCheck(profile, None)
+    output = check.run()
+
+    assert check.is_required()
+    np.testing.assert_equal(output.get_output_flags_for_property("PSAL").data, [PROBABLY_BAD, GOOD])
+    np.testing.assert_equal(output.get_output_flags_for_property("TEMP"), [GOOD, GOOD])
+
+
+def test_greylist_check_batch(greylist_path, make_fake_profile):
+    """Test that a batch flags each profile with its own flags."""
+    profiles = [
+        make_fake_profile(
+            PRES=[0.0, 10.0],
+            TEMP=[10.0, 9.0],
+            PSAL=[35.0, 35.1],
+            PLATFORM_NUMBER=platform_number,
+            JULD=date_to_juld(date),
+        )
+        for platform_number, date in (("6900001", "20200601"), ("6900001", "20220101"), ("6900002", "20190615"))
+    ]
+
+    output = GreyListCheck.run_batch(profiles)
+
+    np.testing.assert_equal(
+        output.get_output_flags_for_property("PSAL"),
+        [[PROBABLY_BAD] * 2, [BAD] * 2, [GOOD] * 2],
+    )
+    np.testing.assert_equal(output.get_output_flags_for_property("TEMP"), [[GOOD] * 2, [GOOD] * 2, [BAD] * 2])
+
+
+def test_greylist_check_dataset(greylist_path, argo_file, tmp_path):
+    """Test reading the platform number and date of profiles from a dataset."""
+    path = argo_file(tmp_path / "test_prof.nc", [[0.0, 10.0], [0.0, 10.0]])
+    with Dataset(path, mode="a") as dataset:
+        dataset.createDimension("STRING8", 8)
+        dataset.createVariable("PLATFORM_NUMBER", "S1", ("N_PROF", "STRING8"))
+        dataset["PLATFORM_NUMBER"][:] = np.array([list("6900001 "), list("6900002 ")], dtype="S1")
+        dataset.createVariable("JULD", "f8", ("N_PROF",), fill_value=999999.0)
+        dataset["JULD"][:] = [date_to_juld("20220101"), date_to_juld("20220101")]
+
+    with Dataset(path) as dataset:
+        profile = Profile(dataset, profile_index=0)
+        output = GreyListCheck(profile, None).run()
+        batch_output = GreyListCheck(ProfileBatch.from_dataset(dataset), None).run()
+
+        assert profile.get_property_data("PLATFORM_NUMBER") == "6900001"
+
+    np.testing.assert_equal(output.get_output_flags_for_property("PSAL"), [BAD, BAD])
+    np.testing.assert_equal(batch_output.get_output_flags_for_property("PSAL"), [[BAD, BAD], [GOOD, GOOD]])
+
+
+def test_greylist_lookup_bytes(greylist_path):
+    """Test that padded byte-string platform numbers, as read from files or stacked into batches, are looked up."""
+    flags = get_greylist().lookup(np.array([b"6900001 ", b"6900003"]), "PSAL", np.array(date_to_juld("20200601")))
+
+    np.testing.assert_equal(flags.filled(0), [3, 0])
+
+
+def test_greylist_check_ignores_unused_flags(greylist_path, make_fake_profile):
+    """Test that ranges flagged with codes which are not Argo flags are ignored."""
+    greylist_path.write_text(GREYLIST + "6900003,TEMP,20200101,,6,,BO\n6900003,PSAL,20200101,,4,,BO\n")
+    modified = os.stat(greylist_path).st_mtime_ns + 1_000_000_000
+    os.utime(greylist_path, ns=(modified, modified))
+    profile = make_fake_profile(
+        PRES=[0.0],
+        TEMP=[10.0],
+        PSAL=[35.0],
+        PLATFORM_NUMBER="6900003",
+        JULD=date_to_juld("20200601"),
+    )
+
+    output = GreyListCheck(profile, None).run()
+
+    np.testing.assert_equal(output.get_output_flags_for_property("TEMP"), [GOOD])
+    np.testing.assert_equal(output.get_output_flags_for_property("PSAL"), [BAD])
+
+
+def test_greylist_check_array_batch(greylist_path):
+    """Test that a batch of arrays, with byte-string platform numbers, is flagged."""
+    batch = ProfileBatch(
+        {
+            "PRES": np.array([[0.0, 10.0], [0.0, 10.0]]),
+            "TEMP": np.array([[10.0, 9.0], [10.0, 9.0]]),
+            "PSAL": np.array([[35.0, 35.1], [35.0, 35.1]]),
+            "PLATFORM_NUMBER": np.array([b"6900001", b"6900002"]),
+            "JULD": np.array([date_to_juld("20220101"), date_to_juld("20220101")]),
+        }
+    )
+
+    output = GreyListCheck(batch, None).run()
+
+    np.testing.assert_equal(output.get_output_flags_for_property("PSAL"), [[BAD] * 2, [GOOD] * 2])
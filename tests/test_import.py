@@ -0,0 +1,56 @@
+"""Tests for the lazy import of argortqcpy."""
+
+import subprocess
+import sys
+
+import pytest
+
+import argortqcpy
+
+
+def imported_modules(code: str):
+    """Run code in a new interpreter, returning the names of the modules it imported."""
+    result = subprocess.run(
+        [sys.executable, "-c", f"import sys\n{code}\nprint(' '.join(sys.modules))"],
+        check=True,
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+    )
+    return set(result.stdout.split())
+
+
+@pytest.mark.skipif(sys.version_info < (3, 7), reason="submodules are imported eagerly before Python 3.7")
+def test_import_package_imports_no_submodules():
+    """Test that importing the package alone imports none of its submodules, nor netCDF4."""
+    modules = imported_modules("import argortqcpy")
+
+    assert "argortqcpy" in modules
+    assert not {"argortqcpy.checks", "argortqcpy.profile", "numpy", "netCDF4"} & modules
+
+
+def test_checks_of_arrays_do_not_import_netcdf4():
+    """Test that checking profiles of arrays in memory never imports netCDF4, nor the other slow imports."""
+    modules = imported_modules(
+        "import numpy as np\n"
+        "from argortqcpy.pipeline import DEFAULT_CHECKS, CheckPipeline\n"
+        "from argortqcpy.profile import ArrayProfile\n"
+        "profile = ArrayProfile({'PRES': np.arange(10.0), 'TEMP': np.full(10, 10.0), 'PSAL': np.full(10, 35.0)})\n"
+        "CheckPipeline(DEFAULT_CHECKS).run(profile)"
+    )
+
+    assert "argortqcpy.pipeline" in modules
+    assert not {"netCDF4", "pkg_resources", "argortqcpy.writer", "argortqcpy.archive"} & modules
+
+
+def test_submodules_as_attributes():
+    """Test that submodules are imported on access as attributes of the package."""
+    assert argortqcpy.checks.CheckBase
+    assert argortqcpy.profile.ProfileBase
+    assert argortqcpy.pipeline.CheckPipeline
+    assert {"checks", "profile", "pipeline"} <= set(dir(argortqcpy))
+
+
+def test_unknown_attribute():
+    """Test that an unknown attribute of the package raises an AttributeError."""
+    with pytest.raises(AttributeError, match="no_such_module"):
+        argortqcpy.no_such_module  # pylint: disable=pointless-statement
@@ -0,0 +1,87 @@
+"""Tests for instrumentation of checks and profiles."""
+
+from argortqcpy import instrumentation
+from argortqcpy.checks import GlobalRangeCheck, PressureIncreasingCheck
+from argortqcpy.instrumentation import Instrumentation
+from argortqcpy.pipeline import CheckPipeline
+
+
+class ParentCallingCheck(GlobalRangeCheck):
+    """A check whose run calls the run of its parent."""
+
+    def run(self):
+        """Run the parent check."""
+        return super().run()
+
+
+def test_instrumentation_disabled_by_default():
+    """Test that no instrumentation is active unless entered."""
+    assert not instrumentation.is_enabled()
+
+    with Instrumentation():
+        assert instrumentation.is_enabled()
+
+    assert not instrumentation.is_enabled()
+
+
+def test_instrumentation_records_checks(make_fake_profile):
+    """Test that check runs are recorded with their levels and flag counts."""
+    profile = make_fake_profile(PRES=[0, 1, 0.5, 2], TEMP=[10, 50, 9, 8], PSAL=[35, 35, 35, 35])
+
+    with Instrumentation() as stats:
+        CheckPipeline([GlobalRangeCheck, PressureIncreasingCheck]).run(profile)
+
+    checks = stats.as_dict()["checks"]
+    assert checks["GlobalRangeCheck"]["argo_id"] == 6
+    assert checks["GlobalRangeCheck"]["calls"] == 1
+    assert checks["GlobalRangeCheck"]["levels"] == 4
+    assert checks["GlobalRangeCheck"]["flags"] == {"BAD": 1}
+    assert checks["PressureIncreasingCheck"]["flags"] == {"BAD": 3}
+    assert checks["PressureIncreasingCheck"]["seconds"] > 0.0
+
+
+def test_instrumentation_records_property_reads(make_fake_profile):
+    """Test that property data reads are recorded."""
+    profile = make_fake_profile(PRES=[0, 1, 2], TEMP=[10, 9, 8], PSAL=[35, 35, 35])
+
+    with Instrumentation() as stats:
+        profile.get_property_data("PRES")
+        profile.get_property_data("PRES")
+
+    assert stats.as_dict()["property_reads"]["PRES"]["calls"] == 2
+
+
+def test_instrumentation_records_nested_run_once(make_fake_profile):
+    """Test that a run calling its parent's run is recorded once, under the subclass."""
+    profile = make_fake_profile(PRES=[0, 1, 2], TEMP=[10, 9, 8], PSAL=[35, 35, 35])
+
+    with Instrumentation() as stats:
+        ParentCallingCheck(profile, None).run()
+
+    assert list(stats.as_dict()["checks"]) == ["ParentCallingCheck"]
+    assert stats.as_dict()["checks"]["ParentCallingCheck"]["calls"] == 1
+
+
+def test_instrumentation_not_recorded_when_inactive(make_fake_profile):
+    """Test that runs outside the context are not recorded."""
+    profile = make_fake_profile(PRES=[0, 1, 2], TEMP=[10, 9, 8], PSAL=[35, 35, 35])
+
+    with Instrumentation() as stats:
+        pass
+    GlobalRangeCheck(profile, None).run()
+
+    assert stats.as_dict() == {"checks": {}, "property_reads": {}}
+
+
+def test_instrumentation_to_prometheus(make_fake_profile):
+    """Test the Prometheus text export."""
+    profile = make_fake_profile(PRES=[0, 1, 2], TEMP=[10, 50, 8], PSAL=[35, 35, 35])
+
+    with Instrumentation() as stats:
+        GlobalRangeCheck(profile, None).run()
+
+    text = stats.to_prometheus()
+    assert "# TYPE argortqcpy_check_runs_total counter" in text
+    assert 'argortqcpy_check_runs_total{check="GlobalRangeCheck",argo_id="6",argo_name="Global range test"} 1' in text
+    assert 'argortqcpy_check_flags_total{check="GlobalRangeCheck",argo_id="6"' in text
+    assert 'argortqcpy_property_reads_total{property="TEMP"}' in text
@@ -0,0 +1,150 @@
+"""Tests for the kernel backends of the checks."""
+
+import numpy as np
+import pytest
+from numpy import ma
+
+from argortqcpy import kernels
+from argortqcpy.checks import FLAG_PRECEDENCE_TABLE
+from argortqcpy.pipeline import DEFAULT_CHECKS, CheckPipeline
+from argortqcpy.profile import ProfileBatch
+
+
+@pytest.fixture(autouse=True)
+def fixture_restore_backend(monkeypatch):
+    """Restore the selected backend after each test."""
+    monkeypatch.setattr(kernels, "_selected", [])
+
+
+@pytest.fixture(name="numba_backend")
+def fixture_numba_backend():
+    """Return the numba backend, skipping the test if numba is not installed."""
+    pytest.importorskip("numba")
+    return kernels.set_backend("numba")
+
+
+def random_pressure(rng, shape):
+    """Return mostly increasing pressures, with inversions, repeats, NaN and missing values."""
+    pressure = np.cumsum(rng.uniform(-5.0, 20.0, shape), axis=-1)
+    pressure[rng.random(shape) < 0.1] = np.nan
+    repeats = rng.random(shape) < 0.1
+    pressure[..., 1:][repeats[..., 1:]] = pressure[..., :-1][repeats[..., 1:]]
+    return pressure, rng.random(shape) > 0.1
+
+
+def test_default_backend(monkeypatch):
+    """Test that NumPy is used unless another backend is selected."""
+    monkeypatch.delenv(kernels.KERNELS_VARIABLE, raising=False)
+
+    assert kernels.get_backend().name == "numpy"
+
+
+def test_backend_from_environment(monkeypatch):
+    """Test that the backend is selected from the environment on first use."""
+    monkeypatch.setenv(kernels.KERNELS_VARIABLE, "auto")
+    expected = "numpy"
+    try:
+        import numba  # pylint: disable=import-outside-toplevel,unused-import
+    except ImportError:
+        pass
+    else:
+        expected = "numba"
+
+    assert kernels.get_backend().name == expected
+
+
+def test_unknown_backend():
+    """Test that selecting an unknown backend raises an error."""
+    with pytest.raises(ValueError, match="unknown kernel backend"):
+        kernels.set_backend("fortran")
+
+
+@pytest.mark.parametrize("shape", ((0,), (1,), (40,), (7, 25)))
+def test_pressure_not_increasing_parity(numba_backend, shape):
+    """Test that the numba backend finds the same pressures not increasing as NumPy."""
+    rng = np.random.default_rng(1)
+    pressure, valid = random_pressure(rng, shape)
+    pressure[~valid] = -np.inf
+    previous = (-np.inf, -np.inf) if len(shape) == 1 else (rng.uniform(0, 50, shape[:-1] + (1,)),) * 2
+
+    expected = kernels.pressure_not_increasing(pressure, valid, *previous)
+    result = numba_backend.pressure_not_increasing(pressure, valid, *previous)
+
+    np.testing.assert_equal(result[0], expected[0])
+    np.testing.assert_equal(result[1], expected[1])
+    if shape[-1]:
+        np.testing.assert_equal(result[2], expected[2])
+
+
+@pytest.mark.parametrize("shape", ((1,), (40,), (7, 25)))
+def test_three_point_stencil_parity(numba_backend, shape):
+    """Test that the numba backend finds the same neighbours as NumPy."""
+    rng = np.random.default_rng(2)
+    values = rng.normal(size=shape)
+    valid = rng.random(shape) > 0.3
+
+    for result, expected in zip(
+        numba_backend.three_point_stencil(values, valid), kernels.three_point_stencil(values, valid)
+    ):
+        np.testing.assert_equal(result, expected)
+
+
+@pytest.mark.parametrize("number_of_profiles", (1, 6))
+@pytest.mark.parametrize("where_kind", ("none", "array", "broadcast"))
+def test_merge_codes_parity(numba_backend, where_kind, number_of_profiles):
+    """Test that the numba backend merges the same flag codes, and counts, as NumPy."""
+    rng = np.random.default_rng(3)
+    codes = rng.integers(0, FLAG_PRECEDENCE_TABLE.shape[0], (6, 30)).astype(np.uint8)
+    new = rng.integers(0, FLAG_PRECEDENCE_TABLE.shape[0], codes.shape).astype(np.uint8)
+    where = {
+        "none": None,
+        "array": rng.random(codes.shape) > 0.5,
+        "broadcast": rng.random(codes.shape[-1]) > 0.5,
+    }[where_kind]
+
+    expected_codes = codes.copy()
+    expected = kernels.merge_codes(expected_codes, new, where, FLAG_PRECEDENCE_TABLE, number_of_profiles)
+    result = numba_backend.merge_codes(codes, new, where, FLAG_PRECEDENCE_TABLE, number_of_profiles)
+
+    np.testing.assert_equal(codes, expected_codes)
+    np.testing.assert_equal(result, expected)
+    assert result.shape == (number_of_profiles, FLAG_PRECEDENCE_TABLE.shape[0])
+
+
+def test_merge_codes_not_contiguous(numba_backend):
+    """Test that codes which are not contiguous are merged in place."""
+    codes = np.zeros((4, 6), dtype=np.uint8)
+
+    numba_backend.merge_codes(codes[:, ::2], 4, None, FLAG_PRECEDENCE_TABLE)
+
+    np.testing.assert_equal(codes[:, ::2], 4)
+    np.testing.assert_equal(codes[:, 1::2], 0)
+
+
+def test_pipeline_parity(numba_backend):
+    """Test that a pipeline gives identical flags with each backend."""
+    rng = np.random.default_rng(4)
+    shape = (12, 40)
+    pressure, valid = random_pressure(rng, shape)
+    batch = ProfileBatch(
+        {
+            "PRES": ma.masked_array(pressure, mask=~valid),
+            "TEMP": ma.masked_array(20.0 - np.nan_to_num(pressure) / 100.0 + rng.normal(0.0, 2.0, shape), mask=~valid),
+            "PSAL": ma.masked_array(35.0 + rng.normal(0.0, 0.5, shape), mask=~valid),
+            "LATITUDE": rng.uniform(-60.0, 60.0, shape[0]),
+            "LONGITUDE": rng.uniform(-180.0, 180.0, shape[0]),
+        }
+    )
+    pipeline = CheckPipeline(DEFAULT_CHECKS)
+
+    result = pipeline.run_batch(batch)
+    kernels.set_backend("numpy")
+    expected = pipeline.run_batch(batch)
+
+    assert numba_backend.name == "numba"
+    for property_name in expected.output.get_output_property_names():
+        np.testing.assert_equal(
+            result.output.get_output_codes_for_property(property_name),
+            expected.output.get_output_codes_for_property(property_name),
+        )
+    np.testing.assert_equal(result.tests_failed, expected.tests_failed)
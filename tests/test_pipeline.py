@@ -0,0 +1,82 @@
+"""Tests for running pipelines of checks."""
+
+import numpy as np
+
+from argortqcpy.checks import ArgoQcFlag, CheckOutput, GlobalRangeCheck, PressureIncreasingCheck, SpikeCheck
+from argortqcpy.pipeline import CheckPipeline
+from argortqcpy.profile import ProfileBatch
+
+
+class NotRequiredCheck(GlobalRangeCheck):
+    """A check which is never required to run."""
+
+    argo_binary_id = 1024
+
+    def is_required(self):
+        """Never run the check."""
+        return False
+
+
+def test_check_shares_given_output(fake_profile):
+    """Test that a check sets its flags in an output it is given."""
+    output = CheckOutput(profile=fake_profile)
+
+    check = PressureIncreasingCheck(fake_profile, None, output=output)
+
+    assert check.create_output() is output
+
+
+def test_pipeline_shares_output(make_fake_profile):
+    """Test that the checks in a pipeline accumulate flags in a single output."""
+    profile = make_fake_profile(PRES=[0, 1, 0.5, -3], TEMP=[10, 50, 9, 8], PSAL=[35, 35, 35, 35])
+    pipeline = CheckPipeline([PressureIncreasingCheck, GlobalRangeCheck])
+
+    result = pipeline.run(profile)
+    flags = result.output.get_output_flags_for_property("TEMP")
+
+    assert list(flags) == [
+        ArgoQcFlag.GOOD.value,
+        ArgoQcFlag.BAD.value,
+        ArgoQcFlag.BAD.value,
+        ArgoQcFlag.BAD.value,
+    ]
+    assert result.tests_performed == PressureIncreasingCheck.argo_binary_id | GlobalRangeCheck.argo_binary_id
+    assert result.tests_failed == PressureIncreasingCheck.argo_binary_id | GlobalRangeCheck.argo_binary_id
+
+
+def test_pipeline_tests_failed(make_fake_profile):
+    """Test that only checks setting failure flags are recorded as failed."""
+    profile = make_fake_profile(PRES=[0, 1, 2], TEMP=[10, 50, 9], PSAL=[35, 35, 35])
+    pipeline = CheckPipeline([PressureIncreasingCheck, GlobalRangeCheck])
+
+    result = pipeline.run(profile)
+
+    assert result.tests_failed == GlobalRangeCheck.argo_binary_id
+
+
+def test_pipeline_skips_checks_not_required(make_fake_profile):
+    """Test that checks which are not required are not run or recorded."""
+    profile = make_fake_profile(PRES=[0, 1, 2], TEMP=[10, 50, 9], PSAL=[35, 35, 35])
+    pipeline = CheckPipeline([PressureIncreasingCheck, NotRequiredCheck])
+
+    result = pipeline.run(profile)
+
+    assert result.tests_performed == PressureIncreasingCheck.argo_binary_id
+    assert result.tests_failed == 0
+    assert np.all(result.output.get_output_flags_for_property("TEMP") == ArgoQcFlag.GOOD.value)
+
+
+def test_pipeline_run_batch_tests_failed_as_run(make_fake_profile):
+    """Test that a test flagging values already flagged by another has failed, for a batch as for each profile."""
+    profiles = [
+        make_fake_profile(PRES=[0, 10, 20, 30, 40], TEMP=[10, 10, 60, 10, 10], PSAL=[35] * 5),
+        make_fake_profile(PRES=[0, 10, 20, 30, 40], TEMP=[10, 10, 10, 10, 10], PSAL=[35] * 5),
+    ]
+    pipeline = CheckPipeline([GlobalRangeCheck, SpikeCheck])
+
+    results = [pipeline.run(profile) for profile in profiles]
+    batch_result = pipeline.run_batch(ProfileBatch.from_profiles(profiles))
+
+    assert results[0].tests_failed == GlobalRangeCheck.argo_binary_id | SpikeCheck.argo_binary_id
+    assert list(batch_result.tests_failed) == [result.tests_failed for result in results]
+    assert list(batch_result.tests_performed) == [result.tests_performed for result in results]
@@ -1,10 +1,15 @@
 """Tests for profiles class."""
 
+import numpy as np
+from numpy import ma
 import pytest
+from netCDF4 import Dataset
 
 from numpy.testing import assert_equal
 
-from argortqcpy.profile import Profile
+from argortqcpy.checks import PressureIncreasingCheck
+from argortqcpy.pipeline import CheckPipeline
+from argortqcpy.profile import ArrayProfile, InMemoryProfile, Profile, ProfileBatch
 
 
 def test_profile_create(fake_profile):
@@ -19,6 +24,55 @@ def test_profile_create_from_dataset(empty_dataset, profile_from_dataset):
     assert_equal(profile_from_dataset.get_property_data("PSAL"), empty_dataset["PSAL"][:])
 
 
+def test_profile_caches_property_data(mocker):
+    """Test that property data is read from the dataset once and shared."""
+    dataset = mocker.MagicMock()
+    profile = Profile(dataset)
+
+    first = profile.get_property_data("PRES")
+    second = profile.get_property_data("PRES")
+
+    assert first is second
+    dataset.__getitem__.assert_called_once_with("PRES")
+
+
+def test_profile_invalidate(empty_dataset, profile_from_dataset):
+    """Test that invalidating the cache forces the data to be read again."""
+    first = profile_from_dataset.get_property_data("PRES")
+    empty_dataset["PRES"][:] = np.arange(10)
+
+    profile_from_dataset.invalidate("PRES")
+    second = profile_from_dataset.get_property_data("PRES")
+
+    assert first is not second
+    assert_equal(second, np.arange(10))
+
+
+def test_profile_selected_properties(empty_dataset):
+    """Test that only the selected properties can be read."""
+    profile = Profile(empty_dataset, property_names=["PRES"])
+
+    profile.get_property_data("PRES")
+    with pytest.raises(KeyError):
+        profile.get_property_data("TEMP")
+
+
+def test_profile_level_slice(empty_dataset):
+    """Test that only a slice of the levels is read."""
+    empty_dataset["TEMP"][:] = np.arange(10)
+    profile = Profile(empty_dataset, levels=slice(2, 5))
+
+    assert_equal(profile.get_property_data("TEMP"), [2, 3, 4])
+
+
+def test_profile_close(empty_dataset):
+    """Test that closing the profile closes the dataset."""
+    with Profile(empty_dataset) as profile:
+        profile.get_property_data("PRES")
+
+    assert not empty_dataset.isopen()
+
+
 @pytest.mark.parametrize("property_name", ("PRES", "TEMP", "PSAL"))
 def test_property_name_validation_passes(property_name):
     """Test the validation of valid property names."""
@@ -30,3 +84,138 @@ def test_property_name_validation_fails(property_name):
     """Test the validation of invalid property names."""
     with pytest.raises(KeyError):
         Profile.raise_if_not_valid_property(property_name=property_name)
+
+
+def test_profile_batch_from_profiles(make_fake_profile):
+    """Test stacking profiles of different lengths into a padded batch."""
+    profiles = [
+        make_fake_profile(PRES=[1.0, 2.0, 3.0], TEMP=[10.0, 9.0, 8.0], PSAL=[35.0, 35.1, 35.2]),
+        make_fake_profile(PRES=[1.0, 2.0], TEMP=[11.0, 10.0], PSAL=[34.0, 34.1]),
+    ]
+
+    batch = ProfileBatch.from_profiles(profiles)
+    pressure = batch.get_property_data("PRES")
+
+    assert batch.number_of_profiles == 2
+    assert pressure.shape == (2, 3)
+    assert_equal(pressure[1, :2].data, [1.0, 2.0])
+    assert_equal(batch.get_property_padding("PRES"), [[False, False, False], [False, False, True]])
+
+
+def test_profile_batch_from_dataset(empty_dataset):
+    """Test creating a batch from a dataset, giving 2-D data."""
+    batch = ProfileBatch.from_dataset(empty_dataset)
+
+    assert batch.number_of_profiles == 1
+    assert batch.get_property_data("TEMP").shape == (1, 10)
+
+
+def test_profile_batch_requires_same_shape():
+    """Test that a batch cannot be made from mismatched arrays."""
+    with pytest.raises(ValueError):
+        ProfileBatch({"PRES": ma.masked_array(np.zeros((2, 3))), "TEMP": ma.masked_array(np.zeros((2, 4)))})
+
+
+def test_profile_batch_invalid_property():
+    """Test that a batch cannot be made with invalid properties."""
+    with pytest.raises(KeyError):
+        ProfileBatch({"pressure": ma.masked_array(np.zeros((2, 3)))})
+
+
+def test_profile_position(argo_file, tmp_path):
+    """Test that the position of a profile is read once for the profile, whatever its levels."""
+    path = argo_file(
+        tmp_path / "test_prof.nc",
+        [[1.0, 2.0, 3.0], [1.0, 2.0, 3.0]],
+        position=([10.0, 20.0], [30.0, 40.0]),
+    )
+
+    with Profile(Dataset(path), levels=slice(1, 3), profile_index=1) as profile:
+        assert profile.has_property("LATITUDE")
+        assert profile.get_property_data("LATITUDE") == 20.0
+        assert profile.get_property_chunk("LONGITUDE", slice(0, 1)) == 40.0
+
+
+def test_profile_has_property(empty_dataset, make_fake_profile):
+    """Test whether profiles have properties which are not in every dataset."""
+    assert Profile(empty_dataset).has_property("TEMP")
+    assert not Profile(empty_dataset).has_property("LATITUDE")
+    assert not Profile(empty_dataset, property_names=["PRES"]).has_property("TEMP")
+    assert not make_fake_profile().has_property("LATITUDE")
+
+
+def test_profile_batch_position(make_fake_profile):
+    """Test that a batch stacks a position for each profile, only where every profile has one."""
+    profiles = [
+        make_fake_profile(PRES=[1.0, 2.0, 3.0], TEMP=[10.0] * 3, PSAL=[35.0] * 3, LATITUDE=10.0, LONGITUDE=30.0),
+        make_fake_profile(PRES=[1.0, 2.0], TEMP=[10.0] * 2, PSAL=[35.0] * 2, LATITUDE=20.0, LONGITUDE=40.0),
+    ]
+
+    batch = ProfileBatch.from_profiles(profiles)
+
+    assert_equal(batch.get_property_data("LATITUDE"), [10.0, 20.0])
+    assert batch.get_number_of_levels() == 3
+    unpositioned = make_fake_profile(PRES=[1.0], TEMP=[10.0], PSAL=[35.0])
+    assert not ProfileBatch.from_profiles(profiles + [unpositioned]).has_property("LATITUDE")
+
+
+def test_profile_batch_requires_position_per_profile():
+    """Test that a batch cannot be made with a different number of positions and profiles."""
+    with pytest.raises(ValueError):
+        ProfileBatch({"PRES": ma.masked_array(np.zeros((2, 3))), "LATITUDE": ma.masked_array(np.zeros(3))})
+
+
+@pytest.mark.parametrize("as_buffer", (bytes, memoryview))
+def test_in_memory_profile(argo_file, tmp_path, as_buffer):
+    """Test reading a profile from the bytes of a netCDF file, giving the same flags as reading the file."""
+    path = argo_file(tmp_path / "R6900001_001.nc", [[0.0, 10.0, 5.0]], position=([10.0], [20.0]))
+    buffer = as_buffer(path.read_bytes())
+
+    with InMemoryProfile(buffer, profile_index=0) as profile:
+        result = CheckPipeline([PressureIncreasingCheck]).run(profile)
+
+        assert profile.get_property_data("LATITUDE") == 10.0
+
+    with Profile(Dataset(path), profile_index=0) as profile:
+        expected = CheckPipeline([PressureIncreasingCheck]).run(profile)
+
+    assert_equal(
+        result.output.get_output_flags_for_property("PRES"),
+        expected.output.get_output_flags_for_property("PRES"),
+    )
+    assert result.tests_failed == expected.tests_failed
+
+
+def test_array_profile_shares_data():
+    """Test that a profile of arrays uses the arrays without copying them."""
+    pressure = np.array([0.0, 10.0, 20.0])
+    temperature = ma.masked_array([10.0, 9.0, 8.0], mask=[False, True, False])
+
+    profile = ArrayProfile({"PRES": pressure, "TEMP": temperature})
+
+    assert np.shares_memory(profile.get_property_data("PRES"), pressure)
+    assert np.shares_memory(profile.get_property_data("TEMP"), temperature)
+    assert_equal(ma.getmaskarray(profile.get_property_data("TEMP")), [False, True, False])
+    assert profile.has_property("PRES")
+    assert not profile.has_property("PSAL")
+
+
+def test_array_profile_missing_property():
+    """Test that reading a property without data raises a KeyError."""
+    with pytest.raises(KeyError):
+        ArrayProfile({"PRES": np.zeros(3)}).get_property_data("TEMP")
+
+
+def test_array_profile_invalid_property():
+    """Test that a profile cannot be made with invalid properties."""
+    with pytest.raises(KeyError):
+        ArrayProfile({"pressure": np.zeros(3)})
+
+
+def test_array_profile_run_check():
+    """Test running a check on a profile of arrays."""
+    profile = ArrayProfile({"PRES": np.array([0.0, 10.0, 5.0]), "TEMP": np.zeros(3), "PSAL": np.zeros(3)})
+
+    output = PressureIncreasingCheck(profile, None).run()
+
+    assert_equal(output.get_output_flags_for_property("PRES"), [b"1", b"1", b"4"])
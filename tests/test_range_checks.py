@@ -6,7 +6,15 @@ import pytest
 
 import argortqcpy.profile
 import argortqcpy.checks
-from argortqcpy.checks import ArgoQcFlag, GlobalRangeCheck, PropertyRangeCheck
+from argortqcpy.checks import (
+    ArgoQcFlag,
+    CheckOutput,
+    GlobalRangeCheck,
+    PropertyRangeCheck,
+    RangeRule,
+    compile_range_rules,
+)
+from argortqcpy.profile import ArrayProfile
 
 
 class FakePropertyRangeCheck(PropertyRangeCheck):
@@ -52,34 +60,69 @@ def test_property_range_check(mocker, lower, upper, expected):
     np.testing.assert_equal(kwargs["where"], ma.masked_array(expected))
 
 
+def test_global_range_check_rules():
+    """Test the range rules of the global range check."""
+    assert GlobalRangeCheck.range_rules == (
+        RangeRule("PRES", ArgoQcFlag.BAD, lower_limit=-5.0, properties_to_be_flagged=("PRES", "TEMP", "PSAL")),
+        RangeRule("PRES", ArgoQcFlag.PROBABLY_BAD, lower_limit=-2.4, properties_to_be_flagged=("PRES", "TEMP", "PSAL")),
+        RangeRule("TEMP", ArgoQcFlag.BAD, lower_limit=-2.5, upper_limit=40.0),
+        RangeRule("PSAL", ArgoQcFlag.BAD, lower_limit=2.0, upper_limit=41.0),
+    )
+
+
 def test_global_range_check(mocker):
-    """Test that the global range check calls the correct functions."""
-    profile = mocker.patch.object(argortqcpy.profile, "Profile")
-    output_instance = mocker.Mock()
-    mocker.patch.object(argortqcpy.checks, "CheckOutput", return_value=output_instance)
-    grc = GlobalRangeCheck(profile, None)
-    grc.set_output_flags_for_value_outside_range = mocker.Mock()
-
-    grc.run()
-
-    assert grc.set_output_flags_for_value_outside_range.call_count == 4
-    grc.set_output_flags_for_value_outside_range.assert_has_calls(
-        [
-            mocker.call(
-                output_instance,
-                "PRES",
-                ArgoQcFlag.BAD,
-                lower_limit=-5.0,
-                properties_to_be_flagged=["PRES", "TEMP", "PSAL"],
-            ),
-            mocker.call(
-                output_instance,
-                "PRES",
-                ArgoQcFlag.PROBABLY_BAD,
-                lower_limit=-2.4,
-                properties_to_be_flagged=["PRES", "TEMP", "PSAL"],
-            ),
-            mocker.call(output_instance, "TEMP", ArgoQcFlag.BAD, lower_limit=-2.5, upper_limit=40.0),
-            mocker.call(output_instance, "PSAL", ArgoQcFlag.BAD, lower_limit=2.0, upper_limit=41.0),
-        ]
+    """Test that the global range check reads each property once, setting the final flag of each value."""
+    profile = ArrayProfile(
+        {
+            "PRES": np.array([0.0, -3.0, -6.0, 10.0, 20.0]),
+            "TEMP": ma.masked_array([10.0, 10.0, 10.0, 45.0, 50.0], mask=[False, False, False, False, True]),
+            "PSAL": np.array([35.0, 35.0, 35.0, 35.0, 1.0]),
+        }
     )
+    check = GlobalRangeCheck(profile, None)
+    output = CheckOutput(profile)
+    output.ensure_output_for_properties(["PRES", "TEMP", "PSAL"])
+    get_property_data = mocker.spy(profile, "get_property_data")
+
+    check.set_output_flags_for_range_rules(output, check.range_rules)
+
+    assert sorted(call[0][0] for call in get_property_data.call_args_list) == ["PRES", "PSAL", "TEMP"]
+    good, probably_bad, bad = ArgoQcFlag.GOOD.value, ArgoQcFlag.PROBABLY_BAD.value, ArgoQcFlag.BAD.value
+    np.testing.assert_equal(output.get_output_flags_for_property("PRES"), [good, probably_bad, bad, good, good])
+    np.testing.assert_equal(output.get_output_flags_for_property("TEMP"), [good, probably_bad, bad, bad, good])
+    np.testing.assert_equal(output.get_output_flags_for_property("PSAL"), [good, probably_bad, bad, good, bad])
+    assert output.get_flag_counts() == {ArgoQcFlag.PROBABLY_BAD: 3, ArgoQcFlag.BAD: 5}
+
+
+def test_compile_range_rules():
+    """Test that the flag of each combination of broken rules is precomputed with precedence."""
+    rules = (
+        RangeRule("PRES", ArgoQcFlag.PROBABLY_BAD, lower_limit=-2.4, properties_to_be_flagged=("PRES", "TEMP")),
+        RangeRule("TEMP", ArgoQcFlag.BAD, upper_limit=40.0),
+        RangeRule("PRES", ArgoQcFlag.BAD, lower_limit=-5.0),
+    )
+
+    compiled = compile_range_rules(rules)
+
+    assert [property_name for property_name, _, _ in compiled.tested] == ["PRES", "TEMP"]
+    np.testing.assert_equal(compiled.tested[0][1], [-2.4, -5.0])
+    flagged = {property_name: (columns, table) for property_name, columns, table in compiled.flagged}
+    np.testing.assert_equal(flagged["PRES"][0], [0, 1])
+    np.testing.assert_equal(flagged["PRES"][1], [0, 3, 4, 4])
+    np.testing.assert_equal(flagged["TEMP"][0], [0, 2])
+    np.testing.assert_equal(flagged["TEMP"][1], [0, 3, 4, 4])
+    assert compile_range_rules(rules) is compiled
+
+
+def test_range_rules_where(make_fake_profile):
+    """Test that range rules only flag the values selected."""
+    profile = make_fake_profile(PRES=[[0.0, 1.0], [0.0, 1.0]], TEMP=[[50.0, 10.0], [50.0, 10.0]], PSAL=[[35.0] * 2] * 2)
+    output = CheckOutput(profile)
+
+    FakePropertyRangeCheck(profile, None).set_output_flags_for_range_rules(
+        output,
+        [RangeRule("TEMP", ArgoQcFlag.BAD, upper_limit=40.0)],
+        where=np.array([[True], [False]]),
+    )
+
+    np.testing.assert_equal(output.get_output_flags_for_property("TEMP"), [[b"4", b"1"], [b"1", b"1"]])
@@ -0,0 +1,129 @@
+"""Tests for the regional range check."""
+
+import numpy as np
+from numpy import ma
+from netCDF4 import Dataset
+
+from argortqcpy.checks import ArgoQcFlag, RegionalRangeCheck
+from argortqcpy.profile import Profile, ProfileBatch
+from argortqcpy.regions import REGIONS, RegionIndex, get_region_index
+
+GOOD = ArgoQcFlag.GOOD.value
+BAD = ArgoQcFlag.BAD.value
+
+# positions in the Red Sea, the Mediterranean Sea, and the North Atlantic
+RED_SEA = (20.0, 38.0)
+MEDITERRANEAN = (35.0, 18.0)
+ATLANTIC = (35.0, -30.0)
+
+
+def test_region_index_find():
+    """Test locating positions in, and outside, the regions."""
+    latitude, longitude = np.transpose([RED_SEA, MEDITERRANEAN, ATLANTIC, (np.nan, np.nan)])
+
+    np.testing.assert_equal(get_region_index().find(latitude, longitude), [0, 1, -1, -1])
+
+
+def test_region_index_bounding_box_corner():
+    """Test that a position in a region's bounding box, but not in its polygon, is in no region."""
+    region_index = RegionIndex([REGIONS[0]])
+
+    assert region_index.find(29.0, 31.0) == -1
+    assert region_index.find(25.0, 35.0) == 0
+
+
+def test_region_index_built_once():
+    """Test that the region index is shared."""
+    assert get_region_index() is get_region_index()
+
+
+def test_regional_range_check_flags_in_region(make_fake_profile):
+    """Test that values outside the limits of the profile's region are flagged."""
+    profile = make_fake_profile(
+        PRES=[0.0, 10.0, 20.0],
+        TEMP=[25.0, 20.0, 22.0],
+        PSAL=[39.0, 40.5, 41.5],
+        LATITUDE=MEDITERRANEAN[0],
+        LONGITUDE=MEDITERRANEAN[1],
+    )
+
+    output = RegionalRangeCheck(profile, None).run()
+
+    np.testing.assert_equal(output.get_output_flags_for_property("TEMP"), [GOOD, GOOD, GOOD])
+    np.testing.assert_equal(output.get_output_flags_for_property("PSAL"), [GOOD, BAD, BAD])
+
+
+def test_regional_range_check_outside_regions(make_fake_profile):
+    """Test that nothing is flagged for a profile outside the regions."""
+    profile = make_fake_profile(
+        PRES=[0.0, 10.0],
+        TEMP=[5.0, 5.0],
+        PSAL=[40.5, 40.5],
+        LATITUDE=ATLANTIC[0],
+        LONGITUDE=ATLANTIC[1],
+    )
+
+    output = RegionalRangeCheck(profile, None).run()
+
+    np.testing.assert_equal(output.get_output_flags_for_property("TEMP"), [GOOD, GOOD])
+    np.testing.assert_equal(output.get_output_flags_for_property("PSAL"), [GOOD, GOOD])
+
+
+def test_regional_range_check_not_required_without_position(make_fake_profile):
+    """Test that the check is only required for profiles with a position."""
+    assert not RegionalRangeCheck(make_fake_profile(PRES=[0.0]), None).is_required()
+    assert RegionalRangeCheck(make_fake_profile(PRES=[0.0], LATITUDE=0.0, LONGITUDE=0.0), None).is_required()
+
+
+def test_regional_range_check_batch(make_fake_profile):
+    """Test that a batch gives the same flags as each profile alone."""
+    profiles = [
+        make_fake_profile(
+            PRES=[0.0, 10.0, 20.0],
+            TEMP=[25.0, 20.0, 22.0],
+            PSAL=[39.0, 40.5, 41.5],
+            LATITUDE=latitude,
+            LONGITUDE=longitude,
+        )
+        for latitude, longitude in (RED_SEA, MEDITERRANEAN, ATLANTIC)
+    ]
+    profiles.append(
+        make_fake_profile(
+            PRES=[0.0, 10.0],
+            TEMP=[5.0, 30.0],
+            PSAL=[39.0, 39.0],
+            LATITUDE=ma.masked_array(0.0, mask=True),
+            LONGITUDE=0.0,
+        )
+    )
+
+    output = RegionalRangeCheck.run_batch(profiles)
+
+    for index, profile in enumerate(profiles):
+        number_of_levels = np.size(profile.get_property_data("PRES"))
+        single_output = RegionalRangeCheck(profile, None).run()
+        for property_name in ("TEMP", "PSAL"):
+            np.testing.assert_equal(
+                output.get_output_flags_for_property(property_name)[index, :number_of_levels],
+                single_output.get_output_flags_for_property(property_name),
+            )
+
+
+def test_regional_range_check_dataset(argo_file, tmp_path):
+    """Test the check on profiles of a multi-profile dataset."""
+    path = argo_file(
+        tmp_path / "test_prof.nc",
+        [[0.0, 10.0], [0.0, 10.0]],
+        temperature=[[15.0, 5.0], [15.0, 5.0]],
+        position=np.transpose([MEDITERRANEAN, ATLANTIC]),
+    )
+
+    with Dataset(path) as dataset:
+        flags = [
+            RegionalRangeCheck(Profile(dataset, profile_index=index), None).run().get_output_flags_for_property("TEMP")
+            for index in range(2)
+        ]
+        batch_flags = RegionalRangeCheck(ProfileBatch.from_dataset(dataset), None).run()
+
+    np.testing.assert_equal(flags, [[GOOD, BAD], [GOOD, GOOD]])
+    np.testing.assert_equal(batch_flags.get_output_flags_for_property("TEMP"), [[GOOD, BAD], [GOOD, GOOD]])
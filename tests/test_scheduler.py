@@ -0,0 +1,171 @@
+"""Tests for running the checks of a pipeline concurrently."""
+
+import numpy as np
+import pytest
+
+from argortqcpy.checks import (
+    ArgoQcFlag,
+    GlobalRangeCheck,
+    ImpossibleDateCheck,
+    ImpossibleLocationCheck,
+    ImpossibleSpeedCheck,
+    PositionOnLandCheck,
+    PressureIncreasingCheck,
+    SpikeCheck,
+)
+from argortqcpy.pipeline import DEFAULT_CHECKS, CheckPipeline
+from argortqcpy.profile import ArrayProfile
+from argortqcpy.scheduler import ConcurrentCheckPipeline, schedule_checks
+
+
+class UndeclaredCheck(GlobalRangeCheck):
+    """A check which does not declare the properties it reads and writes."""
+
+    argo_id = 100
+    argo_binary_id = 2**30
+    reads = None
+    writes = None
+
+
+class WritingCheck(GlobalRangeCheck):
+    """A check which sets flags of temperature."""
+
+    argo_id = 101
+    argo_binary_id = 2**31
+    reads = ("PRES",)
+    writes = ("TEMP",)
+
+
+class ReadingCheck(GlobalRangeCheck):
+    """A check which reads temperature, without depending on a test setting its flags."""
+
+    argo_id = 102
+    argo_binary_id = 2**32
+    reads = ("TEMP",)
+    writes = ("PSAL",)
+
+
+def make_profile(number_of_levels=2000, spike=True, juld=20000.0, latitude=-30.0):
+    """Return a high-resolution profile, with a spike, a pressure inversion and a temperature out of range."""
+    pressure = np.linspace(0.0, 2000.0, number_of_levels)
+    temperature = 20.0 - pressure / 100.0
+    if spike:
+        temperature[100] += 10.0
+        pressure[500] = pressure[499] - 1.0
+        temperature[1500] = 45.0
+
+    return ArrayProfile(
+        {
+            "PRES": pressure,
+            "TEMP": temperature,
+            "PSAL": np.full(number_of_levels, 35.0),
+            "JULD": np.array(juld),
+            "LATITUDE": np.array(latitude),
+            "LONGITUDE": np.array(-20.0),
+            "PLATFORM_NUMBER": np.array("6900001"),
+        }
+    )
+
+
+def test_schedule_default_checks():
+    """Test that checks run after the tests they depend on and the checks writing the properties they use."""
+    stages = schedule_checks(DEFAULT_CHECKS)
+
+    assert [[check_class.argo_id for check_class in stage] for stage in stages] == [
+        [2, 6],
+        [3],
+        [4],
+        [5],
+        [7],
+        [8],
+        [9],
+        [11],
+        [13],
+        [14],
+        [15],
+        [18],
+        [19],
+    ]
+
+
+def test_schedule_ignores_missing_dependencies():
+    """Test that tests which are not run do not hold back the checks depending on them."""
+    stages = schedule_checks([SpikeCheck, ImpossibleSpeedCheck])
+
+    assert stages == [[SpikeCheck, ImpossibleSpeedCheck]]
+
+
+@pytest.mark.parametrize(
+    "checks, expected",
+    (
+        ([WritingCheck, ReadingCheck], [[WritingCheck], [ReadingCheck]]),
+        ([ReadingCheck, WritingCheck], [[ReadingCheck, WritingCheck]]),
+        ([WritingCheck, WritingCheck], [[WritingCheck], [WritingCheck]]),
+    ),
+)
+def test_schedule_conflicting_properties(checks, expected):
+    """Test that a check reading or writing a property an earlier check writes runs after it, without a dependency."""
+    assert schedule_checks(checks) == expected
+
+
+def test_schedule_undeclared_check_alone():
+    """Test that a check not declaring its properties is run on its own, between those before and after it."""
+    stages = schedule_checks([GlobalRangeCheck, UndeclaredCheck, PressureIncreasingCheck, ImpossibleDateCheck])
+
+    assert stages == [[GlobalRangeCheck], [UndeclaredCheck], [PressureIncreasingCheck, ImpossibleDateCheck]]
+
+
+def test_schedule_dependency_run_later():
+    """Test that a check depending on a test run after it is an error."""
+    with pytest.raises(ValueError, match="depends on test 8"):
+        schedule_checks([SpikeCheck, PressureIncreasingCheck])
+
+
+@pytest.mark.parametrize("check_class", DEFAULT_CHECKS)
+def test_checks_write_declared_properties(check_class, bathymetry_path):
+    """Test that each check only sets flags of the properties it declares it writes."""
+    del bathymetry_path
+    profile = make_profile(latitude=15.0)
+    check = check_class(profile, make_profile(spike=False, juld=19990.0))
+    if not check.is_required():
+        pytest.skip(f"{check_class.__name__} is not required")
+
+    output = check.run()
+
+    assert set(output.get_output_property_names()) <= set(check_class.writes)
+
+
+@pytest.mark.parametrize("latitude", (-30.0, 15.0, 95.0))
+@pytest.mark.parametrize("has_previous", (False, True))
+def test_concurrent_pipeline_matches_pipeline(bathymetry_path, latitude, has_previous):
+    """Test that running the checks concurrently gives the same flags and tests as running them in turn."""
+    del bathymetry_path
+    profile = make_profile(latitude=latitude)
+    profile_previous = make_profile(spike=False, juld=19990.0, latitude=-30.5) if has_previous else None
+
+    expected = CheckPipeline(DEFAULT_CHECKS).run(profile, profile_previous)
+    with ConcurrentCheckPipeline(DEFAULT_CHECKS, workers=4) as pipeline:
+        result = pipeline.run(profile, profile_previous)
+
+    assert sorted(result.output.get_output_property_names()) == sorted(expected.output.get_output_property_names())
+    for property_name in expected.output.get_output_property_names():
+        np.testing.assert_equal(
+            result.output.get_output_codes_for_property(property_name),
+            expected.output.get_output_codes_for_property(property_name),
+        )
+    assert result.output.get_flag_counts() == expected.output.get_flag_counts()
+    assert result.tests_performed == expected.tests_performed
+    assert result.tests_failed == expected.tests_failed
+    assert result.tests_failed
+
+
+def test_concurrent_pipeline_runs_undeclared_check_with_profile_output():
+    """Test that a check on its own sets its flags in the output of the profile."""
+    profile = make_profile()
+
+    with ConcurrentCheckPipeline([ImpossibleLocationCheck, UndeclaredCheck, PositionOnLandCheck]) as pipeline:
+        result = pipeline.run(profile)
+
+    assert result.tests_performed == ImpossibleLocationCheck.argo_binary_id | UndeclaredCheck.argo_binary_id
+    assert result.tests_failed == UndeclaredCheck.argo_binary_id
+    assert result.output.get_flag_counts() == {ArgoQcFlag.BAD: 1}
@@ -0,0 +1,42 @@
+"""Tests for the seawater equation of state."""
+
+import numpy as np
+import pytest
+
+from argortqcpy import seawater
+
+# check values from Fofonoff and Millard (1983), which are given for IPTS-68 temperatures
+T68 = seawater.T68_CONVERSION
+
+
+@pytest.mark.parametrize(
+    "salinity,temperature_68,pressure,expected",
+    (
+        (0.0, 5.0, 0.0, 999.96675),
+        (35.0, 5.0, 0.0, 1027.67547),
+        (35.0, 25.0, 10000.0, 1062.53817),
+        (40.0, 40.0, 10000.0, 1059.82037),
+    ),
+)
+def test_density(salinity, temperature_68, pressure, expected):
+    """Test the density against check values."""
+    assert seawater.density(salinity, temperature_68 / T68, pressure) == pytest.approx(expected, abs=1e-5)
+
+
+def test_potential_temperature():
+    """Test the potential temperature against its check value."""
+    theta = seawater.potential_temperature(40.0, 40.0 / T68, 10000.0, 0.0)
+
+    assert theta * T68 == pytest.approx(36.89073, abs=1e-5)
+
+
+def test_potential_density_vectorised():
+    """Test that the potential density broadcasts over arrays, and is the density at the reference pressure."""
+    salinity = np.array([[35.0, 35.0], [34.0, 36.0]])
+    temperature = np.array([[10.0, 5.0], [2.0, 20.0]])
+    pressure = np.array([[100.0, 1000.0], [2000.0, 10.0]])
+
+    sigma = seawater.potential_density(salinity, temperature, pressure, pressure)
+
+    assert sigma.shape == (2, 2)
+    np.testing.assert_allclose(sigma, seawater.density(salinity, temperature, pressure))
@@ -0,0 +1,129 @@
+"""Tests for running checks on batches of profiles in shared memory."""
+
+import numpy as np
+import pytest
+from numpy import ma
+
+from argortqcpy.pipeline import DEFAULT_CHECKS, CheckPipeline
+from argortqcpy.profile import ProfileBatch
+from argortqcpy.shared import SharedBatch, SharedMemoryPool
+
+# shared memory needs Python 3.8 or later
+pytest.importorskip("multiprocessing.shared_memory")
+
+
+@pytest.fixture(name="batch")
+def fixture_batch():
+    """Return a batch of profiles of different lengths, with a spike, an impossible date and platform numbers."""
+    rng = np.random.default_rng(0)
+    shape = (20, 30)
+    pressure = np.cumsum(rng.uniform(1.0, 20.0, shape), axis=-1)
+    temperature = 20.0 - pressure / 100.0 + rng.normal(0.0, 0.01, shape)
+    temperature[5, 10] = 60.0
+    padding = np.arange(shape[1]) >= rng.integers(15, 31, shape[0])[:, np.newaxis]
+    julds = np.full(shape[0], 20000.0)
+    julds[7] = 1000.0
+
+    return ProfileBatch(
+        {
+            "PRES": ma.masked_array(pressure, mask=padding),
+            "TEMP": ma.masked_array(temperature, mask=padding),
+            "PSAL": ma.masked_array(35.0 + pressure / 1000.0, mask=padding),
+            "JULD": julds,
+            "LATITUDE": np.zeros(shape[0]),
+            "LONGITUDE": np.zeros(shape[0]),
+            "PLATFORM_NUMBER": np.array(["6900001"] * shape[0]),
+        }
+    )
+
+
+def assert_results_equal(result, expected):
+    """Assert that the flags and tests of two batch results are the same."""
+    assert sorted(result.output.get_output_property_names()) == sorted(expected.output.get_output_property_names())
+    for property_name in expected.output.get_output_property_names():
+        np.testing.assert_equal(
+            result.output.get_output_flags_for_property(property_name).filled(b" "),
+            expected.output.get_output_flags_for_property(property_name).filled(b" "),
+        )
+    np.testing.assert_equal(result.tests_performed, expected.tests_performed)
+    np.testing.assert_equal(result.tests_failed, expected.tests_failed)
+
+
+def test_shared_batch_views(batch):
+    """Test that a shared batch holds the data and missing values of the batch, giving views of them."""
+    with SharedBatch.create(batch) as shared_batch:
+        rows = shared_batch.get_batch(slice(2, 5))
+        data = shared_batch.view(shared_batch.layout.data["TEMP"])
+
+        for property_name in ("PRES", "TEMP", "JULD", "PLATFORM_NUMBER"):
+            np.testing.assert_equal(rows.get_property_data(property_name), batch.get_property_data(property_name)[2:5])
+        np.testing.assert_equal(
+            ma.getmaskarray(rows.get_property_data("TEMP")), ma.getmaskarray(batch.get_property_data("TEMP"))[2:5]
+        )
+        assert np.shares_memory(ma.getdata(rows.get_property_data("TEMP")), data)
+        assert "PLATFORM_NUMBER" not in shared_batch.layout.codes
+
+
+def test_shared_batch_rejects_objects():
+    """Test that a batch of objects cannot be shared."""
+    batch = ProfileBatch({"PRES": np.array([[object()]])})
+
+    with pytest.raises(ValueError, match="PRES"):
+        SharedBatch.create(batch)
+
+
+def test_run_rows_in_place(batch):
+    """Test that checking rows of a shared batch sets the flags and tests of the rows in place."""
+    expected = CheckPipeline(DEFAULT_CHECKS).run_batch(batch)
+
+    with SharedBatch.create(batch) as shared_batch:
+        pipeline = CheckPipeline(DEFAULT_CHECKS)
+        for start in range(0, batch.number_of_profiles, 8):
+            shared_batch.run_rows(pipeline, slice(start, start + 8))
+
+        result = shared_batch.get_result()
+        assert_results_equal(result, expected)
+        assert result.tests_failed[7] & 4
+
+
+def test_shared_memory_pool(batch):
+    """Test that a pool of workers checks every row of a batch, giving the same results as a single process."""
+    expected = CheckPipeline(DEFAULT_CHECKS).run_batch(batch)
+
+    with SharedMemoryPool(DEFAULT_CHECKS, workers=2) as pool:
+        with pool.run(batch, rows_per_task=3) as shared_batch:
+            assert_results_equal(shared_batch.get_result(), expected)
+
+        results = list(pool.map([batch, batch], rows_per_task=7))
+
+    assert len(results) == 2
+    for result in results:
+        assert result.output.profile is batch
+        assert_results_equal(result, expected)
+
+
+def test_shared_memory_pool_trajectory():
+    """Test that the speeds of a float are tested over all of its cycles, whichever tasks check its rows."""
+    julds = 20000.0 + np.arange(6.0)
+    longitudes = 0.1 * np.arange(6.0)
+    longitudes[3] = 40.0
+    batch = ProfileBatch(
+        {
+            "PRES": np.tile(np.arange(10.0, 60.0, 10.0), (6, 1)),
+            "TEMP": np.full((6, 5), 10.0),
+            "PSAL": np.full((6, 5), 35.0),
+            "JULD": julds,
+            "LATITUDE": np.zeros(6),
+            "LONGITUDE": longitudes,
+            "PLATFORM_NUMBER": np.array([b"6900001"] * 6),
+        }
+    )
+    expected = CheckPipeline(DEFAULT_CHECKS).run_batch(batch)
+    assert list(expected.tests_failed & 32) == [0, 0, 0, 32, 0, 0]
+
+    with SharedMemoryPool(DEFAULT_CHECKS, workers=2) as pool:
+        results = [result for rows_per_task in (1, 3) for result in pool.map([batch], rows_per_task=rows_per_task)]
+
+    assert len(results) == 2
+    for result in results:
+        assert_results_equal(result, expected)
@@ -0,0 +1,99 @@
+"""Tests for Argo checks comparing values with their neighbours."""
+
+import numpy as np
+from numpy import ma
+import pytest
+
+from argortqcpy.checks import ArgoQcFlag, GradientCheck, SpikeCheck, three_point_stencil
+from argortqcpy.profile import ProfileBatch
+
+GOOD = ArgoQcFlag.GOOD.value
+BAD = ArgoQcFlag.BAD.value
+
+
+def test_three_point_stencil_skips_invalid():
+    """Test that neighbours skip invalid values, including at the ends."""
+    values = np.array([1.0, 2.0, 3.0, 4.0, 5.0])
+    valid = np.array([False, True, False, True, True])
+
+    previous_values, next_values, has_neighbours = three_point_stencil(values, valid)
+
+    np.testing.assert_equal(has_neighbours, [False, False, False, True, False])
+    assert previous_values[3] == 2.0
+    assert next_values[3] == 5.0
+
+
+def test_three_point_stencil_2d():
+    """Test that neighbours are found along the last axis only."""
+    values = np.array([[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]])
+
+    previous_values, next_values, has_neighbours = three_point_stencil(values, np.ones_like(values, dtype=bool))
+
+    np.testing.assert_equal(has_neighbours, [[False, True, False], [False, True, False]])
+    np.testing.assert_equal(previous_values[:, 1], [1.0, 4.0])
+    np.testing.assert_equal(next_values[:, 1], [3.0, 6.0])
+
+
+@pytest.mark.parametrize(
+    "pressure,temperature,expected",
+    (
+        ([10, 20, 30, 40], [10.0, 17.0, 10.0, 10.0], [GOOD, BAD, GOOD, GOOD]),
+        ([10, 20, 30, 40], [10.0, 15.0, 10.0, 10.0], [GOOD, GOOD, GOOD, GOOD]),
+        ([600, 700, 800, 900], [5.0, 7.5, 5.0, 5.0], [GOOD, BAD, GOOD, GOOD]),
+        ([10, 20, 30, 40], [10.0, 9.0, 2.0, 1.0], [GOOD, GOOD, GOOD, GOOD]),
+    ),
+)
+def test_spike_check(make_fake_profile, pressure, temperature, expected):
+    """Test flagging spikes in temperature, with pressure-dependent thresholds."""
+    profile = make_fake_profile(PRES=pressure, TEMP=temperature, PSAL=[35.0] * len(pressure))
+
+    output = SpikeCheck(profile, None).run()
+
+    np.testing.assert_equal(output.get_output_flags_for_property("TEMP"), expected)
+    assert np.all(output.get_output_flags_for_property("PSAL") == GOOD)
+
+
+@pytest.mark.parametrize(
+    "pressure,salinity,expected",
+    (
+        ([10, 20, 30], [35.0, 37.0, 35.0], [GOOD, BAD, GOOD]),
+        ([10, 20, 30], [35.0, 36.0, 35.0], [GOOD, GOOD, GOOD]),
+        ([600, 700, 800], [35.0, 35.6, 35.0], [GOOD, BAD, GOOD]),
+    ),
+)
+def test_gradient_check(make_fake_profile, pressure, salinity, expected):
+    """Test flagging large gradients in salinity, with pressure-dependent thresholds."""
+    profile = make_fake_profile(PRES=pressure, TEMP=[10.0] * len(pressure), PSAL=salinity)
+
+    output = GradientCheck(profile, None).run()
+
+    np.testing.assert_equal(output.get_output_flags_for_property("PSAL"), expected)
+
+
+def test_spike_check_skips_masked(make_fake_profile):
+    """Test that masked neighbours are skipped, and masked values not flagged."""
+    temperature = ma.masked_array([10.0, 30.0, 17.0, 10.0], mask=[False, True, False, False])
+    profile = make_fake_profile(PRES=[10, 20, 30, 40], TEMP=temperature, PSAL=[35.0] * 4)
+
+    output = SpikeCheck(profile, None).run()
+
+    np.testing.assert_equal(output.get_output_flags_for_property("TEMP"), [GOOD, GOOD, BAD, GOOD])
+
+
+def test_spike_check_batch(make_fake_profile):
+    """Test that a batch gives the same flags as each profile alone."""
+    profiles = [
+        make_fake_profile(PRES=[10, 20, 30, 40, 50], TEMP=[10.0, 17.0, 10.0, 3.0, 10.0], PSAL=[35.0] * 5),
+        make_fake_profile(PRES=[10, 20, 30], TEMP=[10.0, 10.0, 20.0], PSAL=[35.0, 34.0, 35.0]),
+    ]
+
+    output = SpikeCheck.run_batch(ProfileBatch.from_profiles(profiles))
+
+    for index, profile in enumerate(profiles):
+        expected = SpikeCheck(profile, None).run()
+        for property_name in ("TEMP", "PSAL"):
+            flags = output.get_output_flags_for_property(property_name)[index]
+            np.testing.assert_equal(
+                flags[~flags.mask],
+                expected.get_output_flags_for_property(property_name),
+            )
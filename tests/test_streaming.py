@@ -0,0 +1,98 @@
+"""Tests for running checks in windows of levels."""
+
+import numpy as np
+from numpy import ma
+import pytest
+from netCDF4 import Dataset
+
+from argortqcpy.checks import CheckOutput, GlobalRangeCheck, PressureIncreasingCheck, RegionalRangeCheck
+from argortqcpy.pipeline import CheckPipeline
+from argortqcpy.profile import Profile, ProfileBatch, ProfileChunk
+from argortqcpy.streaming import run_streaming
+
+
+class NotStreamableCheck(GlobalRangeCheck):
+    """A check which cannot be run in windows of levels."""
+
+    streamable = False
+
+
+def _stream_flags(profile, chunk_size, property_name="TEMP"):
+    """Concatenate the flag codes of each window of a streamed run."""
+    return np.concatenate(
+        [
+            output.get_output_codes_for_property(property_name)
+            for _, output in run_streaming([GlobalRangeCheck, PressureIncreasingCheck], profile, chunk_size)
+        ],
+        axis=-1,
+    )
+
+
+@pytest.mark.parametrize("chunk_size", (1, 2, 3, 7, 100))
+def test_run_streaming_matches_whole_profile(make_fake_profile, chunk_size):
+    """Test that streaming gives the same flags as running on the whole profile."""
+    pressure = ma.masked_array([0, 1, 2, 1, 1.5, 3, 3, 50, 4, 5, 60], mask=[False] * 9 + [True, False])
+    profile = make_fake_profile(PRES=pressure, TEMP=np.linspace(20, 45, 11), PSAL=np.full(11, 35.0))
+
+    expected = CheckPipeline([GlobalRangeCheck, PressureIncreasingCheck]).run(profile).output
+
+    np.testing.assert_equal(_stream_flags(profile, chunk_size), expected.get_output_codes_for_property("TEMP"))
+
+
+def test_run_streaming_batch(make_fake_profile):
+    """Test streaming a batch of profiles carries the state of each profile separately."""
+    batch = ProfileBatch.from_profiles(
+        [
+            make_fake_profile(PRES=[0, 5, 10, 1, 2, 20], TEMP=[10] * 6, PSAL=[35] * 6),
+            make_fake_profile(PRES=[0, 1, 2, 3], TEMP=[10] * 4, PSAL=[35] * 4),
+        ]
+    )
+
+    expected = PressureIncreasingCheck(batch, None).run()
+
+    np.testing.assert_equal(_stream_flags(batch, 2), expected.get_output_codes_for_property("TEMP"))
+
+
+def test_run_streaming_reads_windows(argo_file, tmp_path):
+    """Test that a netCDF profile is read one window at a time."""
+    path = argo_file(tmp_path / "R6900001_001.nc", [[0.0, 10.0, 5.0, 20.0, 30.0]])
+    with Dataset(path) as dataset:
+        profile = Profile(dataset, profile_index=0)
+        windows = [levels for levels, _ in run_streaming([PressureIncreasingCheck], profile, 2)]
+
+        assert windows == [slice(0, 2), slice(2, 4), slice(4, 5)]
+        assert profile.get_number_of_levels() == 5
+        np.testing.assert_equal(profile.get_property_chunk("PRES", slice(2, 4)), [5.0, 20.0])
+        np.testing.assert_equal(_stream_flags(profile, 2), [1, 1, 4, 1, 1])
+
+
+def test_run_streaming_netcdf_without_position(argo_file, tmp_path):
+    """Test that checks needing a position are not required for windows of a netCDF profile without one."""
+    path = argo_file(tmp_path / "R6900001_001.nc", [[0.0, 10.0, 20.0, 30.0, 40.0]])
+    with Dataset(path) as dataset:
+        profile = Profile(dataset, profile_index=0)
+        outputs = [output for _, output in run_streaming([GlobalRangeCheck, RegionalRangeCheck], profile, 4)]
+
+        assert not ProfileChunk(profile, slice(0, 4)).has_property("LATITUDE")
+        assert len(outputs) == 2
+
+
+def test_profile_chunk(make_fake_profile):
+    """Test that a chunk gives a window of the profile's data."""
+    profile = make_fake_profile(PRES=[0, 1, 2, 3], TEMP=[4, 5, 6, 7], PSAL=[35] * 4)
+
+    chunk = ProfileChunk(profile, slice(1, 3))
+
+    np.testing.assert_equal(chunk.get_property_data("TEMP"), [5, 6])
+    assert CheckOutput(chunk).profile is chunk
+
+
+def test_run_streaming_rejects_checks_not_streamable(make_fake_profile):
+    """Test that checks which cannot be run in windows are rejected."""
+    profile = make_fake_profile(PRES=[0, 1], TEMP=[4, 5], PSAL=[35] * 2)
+
+    with pytest.raises(ValueError):
+        list(run_streaming([NotStreamableCheck], profile, 1))
+
+    with pytest.raises(ValueError):
+        list(run_streaming([GlobalRangeCheck], profile, 0))
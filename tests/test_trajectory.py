@@ -0,0 +1,95 @@
+"""Tests for the trajectory tests of the cycles of floats."""
+
+import datetime
+
+import numpy as np
+
+from argortqcpy.greylist import date_to_juld
+from argortqcpy.trajectory import (
+    EARLIEST_JULD,
+    EARTH_RADIUS,
+    current_juld,
+    evaluate_trajectory,
+    haversine_distance,
+)
+
+
+def test_current_juld():
+    """Test that the current date is measured in UTC, without warnings from naive dates."""
+    today = datetime.datetime.now(datetime.timezone.utc).strftime("%Y%m%d")
+    juld = current_juld()
+
+    assert date_to_juld(today) <= juld < date_to_juld(today) + 1.0
+
+
+def test_haversine_distance():
+    """Test great-circle distances along the equator, a meridian, and across the antimeridian."""
+    distance = haversine_distance([0.0, 0.0, 0.0], [0.0, 0.0, 179.0], [0.0, 90.0, 0.0], [90.0, 0.0, -179.0])
+
+    quarter = np.pi / 2.0 * EARTH_RADIUS
+    np.testing.assert_allclose(distance, [quarter, quarter, np.radians(2.0) * EARTH_RADIUS])
+
+
+def test_impossible_date():
+    """Test that dates before Argo or after the latest date are impossible, and missing dates are not flagged."""
+    tests = evaluate_trajectory(
+        [EARLIEST_JULD - 1.0, EARLIEST_JULD, 25000.0, 25001.0, np.nan], 0.0, 0.0, latest_juld=25000.0
+    )
+
+    np.testing.assert_equal(tests.impossible_date, [True, False, False, True, False])
+
+
+def test_impossible_location():
+    """Test that locations beyond the range of latitude and longitude are impossible."""
+    tests = evaluate_trajectory(
+        np.arange(20000.0, 20060.0, 10.0),
+        [0.0, 90.0, -90.1, 0.0, 0.0, np.nan],
+        [0.0, 180.0, 0.0, -180.1, 180.1, 0.0],
+    )
+
+    np.testing.assert_equal(tests.impossible_location, [False, False, True, True, True, False])
+
+
+def test_impossible_speed_isolates_cycle():
+    """Test that only a cycle too far from both of its neighbours fails the speed test."""
+    tests = evaluate_trajectory([20000.0, 20010.0, 20020.0, 20030.0], [0.0, 0.5, 40.0, 1.0], 0.0)
+
+    np.testing.assert_equal(tests.impossible_speed, [False, False, True, False])
+
+
+def test_impossible_speed_ends_and_pairs():
+    """Test that a cycle at either end is tested by its only neighbour, and a lone pair are both impossible."""
+    ends = evaluate_trajectory([20000.0, 20010.0, 20020.0, 20030.0], [40.0, 0.0, 0.5, 1.0], 0.0)
+    pair = evaluate_trajectory([20000.0, 20010.0], [0.0, 40.0], 0.0)
+    single = evaluate_trajectory([20000.0], [0.0], 0.0)
+
+    np.testing.assert_equal(ends.impossible_speed, [True, False, False, False])
+    np.testing.assert_equal(pair.impossible_speed, [True, True])
+    np.testing.assert_equal(single.impossible_speed, [False])
+
+
+def test_impossible_speed_orders_cycles_of_each_float():
+    """Test that the interleaved cycles of several floats are each ordered by date and tested separately."""
+    tests = evaluate_trajectory(
+        [20020.0, 20000.0, 20030.0, 20010.0, 20000.0, 20010.0, 20020.0],
+        [40.0, 0.0, 1.0, 0.5, 40.0, 40.5, 41.0],
+        0.0,
+        platform_numbers=["6900001", "6900001", "6900001", "6900001", "6900002", "6900002", "6900002"],
+    )
+
+    np.testing.assert_equal(tests.impossible_speed, [True, False, False, False, False, False, False])
+
+
+def test_impossible_speed_skips_impossible_and_missing_cycles():
+    """Test that cycles with impossible or missing dates and positions are not used for speeds."""
+    tests = evaluate_trajectory([20000.0, 20005.0, np.nan, 20010.0], [0.0, 95.0, 40.0, 0.5], 0.0)
+
+    np.testing.assert_equal(tests.impossible_location, [False, True, False, False])
+    np.testing.assert_equal(tests.impossible_speed, [False, False, False, False])
+
+
+def test_identical_dates():
+    """Test that cycles at the same date are too fast unless at the same position."""
+    tests = evaluate_trajectory([20000.0, 20000.0, 20010.0, 20010.0], [0.0, 0.0, 0.5, 5.0], 0.0)
+
+    np.testing.assert_equal(tests.impossible_speed, [False, False, False, True])
@@ -0,0 +1,131 @@
+"""Tests for the impossible date, location and speed checks."""
+
+import numpy as np
+from numpy import ma
+from netCDF4 import Dataset
+
+from argortqcpy.checks import ArgoQcFlag, ImpossibleDateCheck, ImpossibleLocationCheck, ImpossibleSpeedCheck
+from argortqcpy.pipeline import DEFAULT_CHECKS, TRAJECTORY_CHECKS, CheckPipeline, run_trajectory_checks
+from argortqcpy.profile import Profile, ProfileBatch
+from argortqcpy.trajectory import TRAJECTORY_PROPERTIES
+from argortqcpy.writer import write_check_output
+
+GOOD = ArgoQcFlag.GOOD.value
+BAD = ArgoQcFlag.BAD.value
+
+
+def test_checks_required_with_properties(make_fake_profile):
+    """Test that each check is only required if the profile has the properties it tests."""
+    profile = make_fake_profile(PRES=[0.0], JULD=20000.0)
+
+    assert ImpossibleDateCheck(profile, None).is_required()
+    assert not ImpossibleLocationCheck(profile, None).is_required()
+    assert not ImpossibleSpeedCheck(profile, None).is_required()
+
+
+def test_single_profile_checks(make_fake_profile):
+    """Test the checks of a single profile, with an impossible date and location."""
+    profile = make_fake_profile(PRES=[0.0], JULD=1000.0, LATITUDE=95.0, LONGITUDE=0.0)
+
+    output = ImpossibleDateCheck(profile, None).run()
+    ImpossibleLocationCheck(profile, None, output=output).run()
+
+    assert output.get_output_flags_for_property("JULD") == BAD
+    assert output.get_output_flags_for_property("LATITUDE") == BAD
+    assert output.get_output_flags_for_property("LONGITUDE") == BAD
+
+
+def test_impossible_speed_from_previous_profile(make_fake_profile):
+    """Test that the speed of a single profile is tested from the previous profile."""
+    previous = make_fake_profile(PRES=[0.0], JULD=20000.0, LATITUDE=0.0, LONGITUDE=0.0)
+    near = make_fake_profile(PRES=[0.0], JULD=20010.0, LATITUDE=1.0, LONGITUDE=0.0)
+    far = make_fake_profile(PRES=[0.0], JULD=20010.0, LATITUDE=40.0, LONGITUDE=0.0)
+
+    near_output = ImpossibleSpeedCheck(near, previous).run()
+    far_output = ImpossibleSpeedCheck(far, previous).run()
+    first_output = ImpossibleSpeedCheck(far, None).run()
+
+    assert near_output.get_output_flags_for_property("LATITUDE") == GOOD
+    for property_name in ("LATITUDE", "LONGITUDE", "JULD"):
+        assert far_output.get_output_flags_for_property(property_name) == BAD
+    assert first_output.get_output_flags_for_property("LATITUDE") == GOOD
+
+
+def test_batch_checks_share_single_evaluation(mocker):
+    """Test that the checks of a batch of cycles share a single evaluation of the trajectory tests."""
+    batch = ProfileBatch(
+        {
+            "JULD": np.array([20000.0, 20010.0, 20020.0, 20030.0]),
+            "LATITUDE": np.array([0.0, 0.5, 40.0, 1.0]),
+            "LONGITUDE": np.zeros(4),
+        }
+    )
+    evaluate_trajectory = mocker.spy(ImpossibleSpeedCheck, "_compute_trajectory_tests")
+
+    output = ImpossibleSpeedCheck(batch, None).run()
+    ImpossibleDateCheck(batch, None, output=output).run()
+
+    assert evaluate_trajectory.call_count == 1
+    np.testing.assert_equal(output.get_output_flags_for_property("LATITUDE"), [GOOD, GOOD, BAD, GOOD])
+    np.testing.assert_equal(output.get_output_flags_for_property("JULD"), [GOOD, GOOD, BAD, GOOD])
+
+
+def test_default_checks_include_trajectory_checks():
+    """Test that the trajectory checks are run by default, in the order of the Argo tests."""
+    assert list(DEFAULT_CHECKS[:4]) == [
+        ImpossibleDateCheck,
+        ImpossibleLocationCheck,
+        DEFAULT_CHECKS[2],
+        ImpossibleSpeedCheck,
+    ]
+    assert [check.argo_id for check in TRAJECTORY_CHECKS] == [2, 3, 5]
+
+
+def test_run_trajectory_checks(argo_file, tmp_path):
+    """Test that the checks of every cycle of a float's file are run at once and mapped back to each profile."""
+    path = argo_file(
+        tmp_path / "6900001_prof.nc",
+        [[0.0, 10.0]] * 4,
+        position=([0.0, 0.5, 40.0, 1.0], [0.0, 0.0, 0.0, 0.0]),
+        juld=[20000.0, 20010.0, 20020.0, 1000.0],
+        platform_number="6900001",
+    )
+
+    with Dataset(path, mode="a") as dataset:
+        profiles = [Profile(dataset, profile_index=index) for index in range(4)]
+        batch = ProfileBatch.from_dataset(dataset, TRAJECTORY_PROPERTIES)
+        results = run_trajectory_checks(profiles, batch=batch)
+        changes = write_check_output(results[2].output)
+        write_check_output(results[3].output)
+
+    assert [result.tests_performed for result in results] == [4 | 8 | 32] * 4
+    assert [result.tests_failed for result in results] == [0, 0, 32, 4]
+    assert results[2].output.profile is profiles[2]
+    assert results[2].output.get_output_flags_for_property("LATITUDE") == BAD
+    assert changes == {"JULD": 1, "LATITUDE": 1, "LONGITUDE": 1}
+    with Dataset(path) as dataset:
+        np.testing.assert_equal(ma.filled(dataset["POSITION_QC"][:], b" "), [b"0", b"0", BAD, GOOD])
+        np.testing.assert_equal(ma.filled(dataset["JULD_QC"][:], b" "), [b"0", b"0", BAD, BAD])
+
+
+def test_run_trajectory_checks_stacks_profiles(make_fake_profile):
+    """Test that the trajectory properties of the profiles are stacked when no batch is given."""
+    profiles = [
+        make_fake_profile(PRES=[0.0], JULD=juld, LATITUDE=latitude, LONGITUDE=0.0)
+        for juld, latitude in ((20000.0, 0.0), (20010.0, 40.0))
+    ]
+
+    results = run_trajectory_checks(profiles)
+
+    assert [result.tests_failed for result in results] == [32, 32]
+    assert [result.output.get_output_flags_for_property("LONGITUDE") for result in results] == [BAD, BAD]
+
+
+def test_pipeline_runs_trajectory_checks(make_fake_profile):
+    """Test that the pipeline runs the trajectory checks on single profiles."""
+    profile = make_fake_profile(PRES=[0.0], TEMP=[10.0], PSAL=[35.0], JULD=1000.0, LATITUDE=0.0, LONGITUDE=0.0)
+
+    result = CheckPipeline(DEFAULT_CHECKS).run(profile)
+
+    assert result.tests_performed & (4 | 8 | 32) == 4 | 8 | 32
+    assert result.tests_failed & (4 | 8 | 32) == 4
@@ -0,0 +1,127 @@
+"""Tests for writing check output to netCDF files."""
+
+import numpy as np
+from numpy import ma
+import pytest
+from netCDF4 import Dataset
+
+from argortqcpy.checks import ArgoQcFlag, CheckOutput, PressureIncreasingCheck
+from argortqcpy.profile import InMemoryProfile, Profile
+from argortqcpy.writer import grade_profiles, write_check_output
+
+
+@pytest.fixture(name="argo_path")
+def fixture_argo_path(tmp_path, argo_file):
+    """Write a two-profile file, the second profile having a decreasing pressure and a missing level."""
+    return argo_file(tmp_path / "6900001_prof.nc", [[0.0, 10.0, 20.0, 30.0], [0.0, 10.0, 5.0, np.nan]])
+
+
+@pytest.mark.parametrize(
+    "qc_flags,expected",
+    (
+        ([b"1", b"1", b"1", b"9"], b"A"),
+        ([b"1", b"1", b"1", b"4"], b"B"),
+        ([b"1", b"1", b"4", b"4"], b"C"),
+        ([b"1", b"4", b"4", b"4"], b"D"),
+        ([b"1", b"4", b"4", b"4", b"4"], b"E"),
+        ([b"4", b"4", b"3", b" "], b"F"),
+        ([b"9", b" ", b" ", b" "], b" "),
+    ),
+)
+def test_grade_profiles(qc_flags, expected):
+    """Test the grading of profiles from their QC flags."""
+    assert grade_profiles(np.array([qc_flags], dtype="S1"))[0] == expected
+
+
+def test_write_check_output(argo_path):
+    """Test writing flags of all profiles in a file."""
+    with Dataset(argo_path, mode="a") as dataset:
+        output = PressureIncreasingCheck(Profile(dataset), None).run()
+        changes = write_check_output(output)
+
+    assert changes["PRES"] == 7
+
+    with Dataset(argo_path) as dataset:
+        np.testing.assert_equal(
+            ma.filled(dataset["TEMP_QC"][:], b" "),
+            [[b"1", b"1", b"1", b"1"], [b"1", b"1", b"4", b" "]],
+        )
+        np.testing.assert_equal(ma.filled(dataset["PROFILE_TEMP_QC"][:], b" "), [b"A", b"C"])
+
+
+def test_write_check_output_only_changes(mocker, argo_path):
+    """Test that a second write of the same flags changes nothing."""
+    with Dataset(argo_path, mode="a") as dataset:
+        output = PressureIncreasingCheck(Profile(dataset), None).run()
+        write_check_output(output)
+        changes = write_check_output(output)
+
+    assert changes == {"PRES": 0, "TEMP": 0, "PSAL": 0}
+
+
+def test_write_check_output_single_profile(argo_path):
+    """Test writing flags for one profile of a file, with a slice of levels."""
+    with Dataset(argo_path, mode="a") as dataset:
+        profile = Profile(dataset, profile_index=1, levels=slice(1, 3))
+        output = CheckOutput(profile)
+        output.set_output_flag_for_property("PSAL", ArgoQcFlag.PROBABLY_BAD, where=slice(1, None))
+        write_check_output(output)
+
+    with Dataset(argo_path) as dataset:
+        np.testing.assert_equal(
+            ma.filled(dataset["PSAL_QC"][:], b" "),
+            [[b"0", b"0", b"0", b"0"], [b"0", b"1", b"3", b" "]],
+        )
+        np.testing.assert_equal(ma.filled(dataset["PROFILE_PSAL_QC"][:], b" "), [b" ", b"D"])
+
+
+def test_write_check_output_to_copy(tmp_path, argo_path):
+    """Test writing flags to a copy of the file, leaving the original unchanged."""
+    copy_path = tmp_path / "copy.nc"
+    with Dataset(argo_path) as dataset:
+        output = PressureIncreasingCheck(Profile(dataset), None).run()
+        write_check_output(output, copy_to=str(copy_path))
+
+    with Dataset(argo_path) as dataset:
+        assert np.all(ma.filled(dataset["PRES_QC"][0], b" ") == b"0")
+    with Dataset(copy_path) as dataset:
+        assert np.all(ma.filled(dataset["PRES_QC"][0], b" ") == b"1")
+
+
+def test_write_check_output_requires_netcdf_profile(fake_profile):
+    """Test that only outputs for netCDF profiles can be written."""
+    with pytest.raises(TypeError):
+        write_check_output(CheckOutput(fake_profile))
+
+
+def test_write_check_output_keeps_existing_flags(argo_path):
+    """Test that flags already in the file are only replaced by flags taking precedence over them."""
+    with Dataset(argo_path, mode="a") as dataset:
+        dataset["TEMP_QC"][0, 1] = b"4"
+        dataset["TEMP_QC"][0, 2] = b"2"
+        output = PressureIncreasingCheck(Profile(dataset), None).run()
+        changes = write_check_output(output)
+
+    assert changes["TEMP"] == 5
+
+    with Dataset(argo_path) as dataset:
+        np.testing.assert_equal(
+            ma.filled(dataset["TEMP_QC"][:], b" "),
+            [[b"1", b"4", b"2", b"1"], [b"1", b"1", b"4", b" "]],
+        )
+
+
+def test_write_check_output_in_memory(tmp_path, argo_path):
+    """Test that the flags of an in-memory profile are written to a copy of its file, and not in place."""
+    copy_path = tmp_path / "copy.nc"
+    with InMemoryProfile(argo_path.read_bytes()) as profile:
+        output = PressureIncreasingCheck(profile, None).run()
+        with pytest.raises(ValueError, match="copy"):
+            write_check_output(output)
+        write_check_output(output, copy_to=str(copy_path))
+
+    with Dataset(copy_path) as dataset:
+        np.testing.assert_equal(
+            ma.filled(dataset["PRES_QC"][:], b" "),
+            [[b"1", b"1", b"1", b"1"], [b"1", b"1", b"4", b" "]],
+        )